@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Catalog Memory Report
+Resident memory of a synthetic recipe catalog in three shapes:
+- every recipe as a full nested dict (the original RecipeManager.recipes)
+- summary dicts (the manifest before RecipeSummary)
+- RecipeSummary records (recipes/recipe_model.py)
+
+Usage: bench_catalog_memory.py [recipes]
+"""
+
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench_corpus import generate_recipes
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes"))
+from recipe_model import SUMMARY_FIELDS, RecipeSummary
+
+
+def write_corpus(count):
+    """Deterministic corpus, one recipe JSON per line, in a temp file"""
+    corpus = tempfile.NamedTemporaryFile('w', suffix=".ndjson", delete=False, encoding='utf-8')
+    with corpus:
+        for recipe in generate_recipes(count):
+            corpus.write(json.dumps(recipe))
+            corpus.write("\n")
+    return corpus.name
+
+
+def measure(build, corpus):
+    """Bytes retained by build(), which parses every line of the corpus"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(corpus, 'r', encoding='utf-8') as lines:
+        catalog = build(lines)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, seconds, catalog
+
+
+def full_dicts(lines):
+    catalog = {}
+    for line in lines:
+        recipe = json.loads(line)
+        catalog[recipe["id"]] = recipe
+    return catalog
+
+
+def summary_dicts(lines):
+    catalog = {}
+    for line in lines:
+        recipe = json.loads(line)
+        catalog[recipe["id"]] = {"id": recipe["id"],
+                                 **{f: recipe[f] for f in SUMMARY_FIELDS if f in recipe}}
+    return catalog
+
+
+def compact_records(lines):
+    catalog = {}
+    for line in lines:
+        recipe = json.loads(line)
+        catalog[recipe["id"]] = RecipeSummary.from_dict(recipe)
+    return catalog
+
+
+def main(count):
+    print(f"Catalog of {count} synthetic recipes")
+    corpus = write_corpus(count)
+    results = []
+    for label, build in (("full recipe dicts", full_dicts),
+                         ("summary dicts", summary_dicts),
+                         ("RecipeSummary records", compact_records)):
+        size, seconds, catalog = measure(build, corpus)
+        # Same questions list/categories/avg prep time answer, on each shape
+        start = time.perf_counter()
+        categories = {c for s in catalog.values() for c in s.get("category", [])}
+        avg = sum(s.get("prep_time_minutes", 0) for s in catalog.values()) / len(catalog)
+        query_ms = (time.perf_counter() - start) * 1000
+        results.append(size)
+        print(f"  {label:<24} {size / 1e6:8.1f} MB  {size / count:7.0f} B/recipe  "
+              f"build {seconds:5.2f}s  scan {query_ms:6.1f} ms  ({len(categories)} categories, "
+              f"avg prep {avg:.1f})")
+        del catalog
+    os.unlink(corpus)
+
+    print(f"RecipeSummary vs full dicts:    {results[0] / results[2]:.1f}x smaller")
+    print(f"RecipeSummary vs summary dicts: {results[1] / results[2]:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Synthetic Recipe Corpus
+Deterministic generator of recipes shaped like the ones the system stores:
+skewed category and tag distributions, ingredients in the units the
+grocery aggregator knows, OCR text laid out like a photographed recipe
+card. The same seed and settings always give the same corpus, so timings
+from bench_recipes.py are comparable across commits.
+
+Usage: bench_corpus.py <out.ndjson[.gz]|directory> [recipes] [--seed N]
+"""
+
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes"))
+from recipe_stream import open_stream
+
+# (label, relative weight) - a few labels are common, most are rare
+CATEGORY_WEIGHTS = [
+    ("dinner", 30), ("lunch", 12), ("breakfast", 8), ("chicken", 8), ("pasta", 7),
+    ("soup", 6), ("salad", 6), ("dessert", 6), ("rice", 5), ("seafood", 4),
+    ("red-meat", 4), ("snack", 3), ("brunch", 1),
+]
+TAG_WEIGHTS = [
+    ("quick", 20), ("family", 15), ("weeknight", 12), ("healthy", 10), ("kid-friendly", 8),
+    ("budget", 7), ("one-pot", 6), ("make-ahead", 5), ("comfort", 5), ("spicy", 4),
+    ("freezer", 2), ("holiday", 1),
+]
+
+# (name, units it is usually given in, quantity range, vegetarian)
+INGREDIENTS = [
+    ("all-purpose flour", ["cup", "g"], (1, 3), True),
+    ("granulated sugar", ["cup", "tbsp"], (1, 2), True),
+    ("butter", ["tbsp", "cup", "g"], (1, 4), True),
+    ("olive oil", ["tbsp", "tsp"], (1, 3), True),
+    ("salt", ["tsp", "pinch"], (1, 2), True),
+    ("black pepper", ["tsp", "pinch"], (1, 2), True),
+    ("garlic", ["clove"], (1, 4), True),
+    ("onion", ["", "cup"], (1, 2), True),
+    ("carrots", ["", "cup"], (1, 3), True),
+    ("celery", ["", "cup"], (1, 2), True),
+    ("tomatoes", ["can", ""], (1, 3), True),
+    ("rice", ["cup", "g"], (1, 2), True),
+    ("spaghetti", ["lb", "g"], (1, 2), True),
+    ("milk", ["cup", "ml"], (1, 2), True),
+    ("eggs", [""], (1, 4), True),
+    ("cheddar cheese", ["cup", "oz"], (1, 2), True),
+    ("parmesan", ["cup", "tbsp"], (1, 3), True),
+    ("spinach", ["cup", "bunch"], (1, 3), True),
+    ("bell pepper", [""], (1, 2), True),
+    ("black beans", ["can"], (1, 2), True),
+    ("vegetable broth", ["cup", "ml"], (2, 4), True),
+    ("chicken breast", ["lb", "g"], (1, 2), False),
+    ("chicken broth", ["cup", "ml"], (2, 4), False),
+    ("ground beef", ["lb", "g"], (1, 2), False),
+    ("bacon", ["slice"], (2, 6), False),
+    ("salmon", ["lb", "oz"], (1, 2), False),
+    ("shrimp", ["lb", "oz"], (1, 2), False),
+    ("soy sauce", ["tbsp"], (1, 3), True),
+    ("lemon juice", ["tbsp", "tsp"], (1, 2), True),
+    ("brown sugar", ["cup", "tbsp"], (1, 2), True),
+]
+
+VERBS = ["Chop", "Stir", "Simmer", "Whisk", "Bake", "Season", "Saute", "Fold", "Roast", "Drain"]
+FILLER = ["until", "golden", "the", "sauce", "minutes", "over", "medium", "heat", "with",
+          "fresh", "and", "gently", "bowl", "pan", "tender", "then", "serve", "warm"]
+NAME_WORDS = ["Easy", "Creamy", "Spicy", "Classic", "Lemon", "Garlic", "Herb", "Smoky",
+              "Golden", "Weeknight", "Grandma's", "Sheet-Pan", "Slow-Cooker", "Crispy"]
+DISHES = ["Casserole", "Stew", "Soup", "Bake", "Stir-Fry", "Salad", "Skillet", "Pasta",
+          "Curry", "Tacos", "Bowl", "Pie", "Muffins", "Risotto"]
+
+# OCR misreads applied to a small fraction of characters
+OCR_CONFUSIONS = {"l": "1", "O": "0", "rn": "m", "e": "c", ",": "."}
+
+
+def _weighted_sample(rng, weights, k):
+    """k distinct labels, drawn with the given relative weights"""
+    labels = [label for label, _ in weights]
+    cumulative = []
+    total = 0
+    for _, weight in weights:
+        total += weight
+        cumulative.append(total)
+    chosen = []
+    while len(chosen) < min(k, len(labels)):
+        label = rng.choices(labels, cum_weights=cumulative)[0]
+        if label not in chosen:
+            chosen.append(label)
+    return chosen
+
+
+def ocr_text(rng, recipe, noise=0.01):
+    """
+    A recipe card as OCR would return it: title, times, servings, an
+    ingredient list with fractions and a numbered method, with a few
+    misread characters
+
+    Args:
+        rng: random.Random to draw from
+        recipe: Recipe dictionary (see synthetic_recipe)
+        noise: Probability of an OCR misread per candidate character
+    """
+    lines = [recipe["name"], ""]
+    lines.append(f"Prep time: {recipe['prep_time_minutes']} minutes")
+    lines.append(f"Cook time: {recipe['cook_time_minutes']} minutes")
+    lines.append(f"Serves {recipe['servings']}")
+    lines.append("")
+    lines.append("Ingredients:")
+    for ingredient in recipe["ingredients"]:
+        quantity = ingredient["quantity"]
+        if quantity != int(quantity):
+            whole = int(quantity)
+            quantity = f"{whole} 1/2" if whole else "1/2"
+        unit = f" {ingredient['unit']}" if ingredient["unit"] else ""
+        lines.append(f"{quantity}{unit} {ingredient['name']}")
+    lines.append("")
+    lines.append("Instructions:")
+    for step_number, step in enumerate(recipe["instructions"], 1):
+        lines.append(f"{step_number}. {step}")
+    text = "\n".join(lines)
+
+    if noise:
+        chars = list(text)
+        for i, char in enumerate(chars):
+            if char in OCR_CONFUSIONS and rng.random() < noise:
+                chars[i] = OCR_CONFUSIONS[char]
+        text = "".join(chars)
+    return text
+
+
+def synthetic_recipe(rng, i, ingredients=(5, 12), steps=(4, 9), with_ocr=True):
+    """
+    One recipe in the data/<id>.json format
+
+    Args:
+        rng: random.Random to draw from
+        i: Sequence number, used for the id and to keep names unique
+        ingredients: (min, max) ingredient count
+        steps: (min, max) instruction count
+        with_ocr: Include an OCR-style "ocr_text" like photo imports have
+    """
+    prep = rng.randint(5, 40)
+    cook = rng.choice([0, 10, 15, 20, 25, 30, 45, 60, 90])
+    picked = rng.sample(INGREDIENTS, min(rng.randint(*ingredients), len(INGREDIENTS)))
+    recipe_ingredients = []
+    for name, units, (low, high), _ in picked:
+        quantity = rng.randint(low, high)
+        if rng.random() < 0.2:
+            quantity += 0.5
+        recipe_ingredients.append({"name": name, "quantity": quantity,
+                                   "unit": rng.choice(units), "notes": ""})
+    vegetarian = all(ingredient[3] for ingredient in picked)
+
+    instructions = []
+    for _ in range(rng.randint(*steps)):
+        words = " ".join(rng.choice(FILLER) for _ in range(rng.randint(6, 16)))
+        instructions.append(f"{rng.choice(VERBS)} the {rng.choice(picked)[0]} {words}.")
+
+    recipe = {
+        "id": f"{i:08x}",
+        "name": f"{rng.choice(NAME_WORDS)} {picked[0][0].title()} {rng.choice(DISHES)} {i}",
+        "category": _weighted_sample(rng, CATEGORY_WEIGHTS, rng.randint(1, 3)),
+        "tags": _weighted_sample(rng, TAG_WEIGHTS, rng.randint(0, 4)),
+        "prep_time_minutes": prep,
+        "cook_time_minutes": cook,
+        "total_time_minutes": prep + cook,
+        "servings": rng.choice([2, 4, 4, 6, 8]),
+        "difficulty": rng.choices(["easy", "medium", "hard"], [5, 4, 1])[0],
+        "source": "photo_ocr" if with_ocr else "manual",
+        "ingredients": recipe_ingredients,
+        "instructions": instructions,
+        "notes": "",
+        "created_date": "2026-01-01",
+        "rating": rng.choices([1, 2, 3, 4, 5], [1, 2, 5, 8, 6])[0],
+        "dietary": {"vegetarian": vegetarian, "vegan": False,
+                    "gluten_free": rng.random() < 0.15, "dairy_free": rng.random() < 0.1}
+    }
+    if with_ocr:
+        recipe["ocr_text"] = ocr_text(rng, recipe)
+    return recipe
+
+
+def generate_recipes(count, seed=42, **options):
+    """
+    Yield count synthetic recipes; same seed and options, same recipes
+
+    Args:
+        count: Number of recipes
+        seed: Random seed
+        **options: Passed to synthetic_recipe (ingredients, steps, with_ocr)
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        yield synthetic_recipe(rng, i, **options)
+
+
+def write_corpus(target, count, seed=42, **options):
+    """
+    Write a corpus as NDJSON (by file name, see recipe_stream.open_stream)
+    or, for a directory, as one <id>.json file per recipe
+
+    Returns:
+        Number of recipes written
+    """
+    target = Path(target)
+    written = 0
+    if target.suffix in (".ndjson", ".jsonl", ".gz", ".zst"):
+        with open_stream(target, "w") as f:
+            for recipe in generate_recipes(count, seed, **options):
+                f.write(json.dumps(recipe, ensure_ascii=False))
+                f.write("\n")
+                written += 1
+        return written
+
+    target.mkdir(parents=True, exist_ok=True)
+    for recipe in generate_recipes(count, seed, **options):
+        with open(target / f"{recipe['id']}.json", 'w', encoding='utf-8') as f:
+            json.dump(recipe, f, indent=2, ensure_ascii=False)
+        written += 1
+    return written
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] in ("-h", "--help"):
+        print(__doc__.strip().splitlines()[-1])
+        return
+
+    seed = 42
+    if "--seed" in args:
+        i = args.index("--seed")
+        seed = int(args[i + 1])
+        del args[i:i + 2]
+    count = int(args[1]) if len(args) > 1 else 1000
+    written = write_corpus(args[0], count, seed)
+    print(f"Wrote {written} recipes (seed {seed}) to {args[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+OCR Parser Micro-benchmark
+Lines/second of the single-pass parser in recipe_ocr_processor.py against
+the previous regex-per-call implementation (kept below verbatim as
+LegacyParser for comparison).
+
+Before timing, every line in PARSE_CASES is parsed and compared with its
+expected result; a mismatch is reported and the script exits 1, so a
+faster parser cannot silently change what it extracts. Add a case for
+every parsing bug fixed.
+
+Usage: bench_ocr_parser.py [pages]
+"""
+
+import re
+import sys
+import time
+
+from recipe_ocr_processor import RecipeOCRProcessor
+
+# Ingredient line -> (name, quantity, unit, notes)
+PARSE_CASES = [
+    ("2 cups flour", ("flour", 2.0, "cups", "")),
+    ("- 2 1/4 cups all-purpose flour", ("all-purpose flour", 2.25, "cups", "")),
+    ("1½ cups milk", ("milk", 1.5, "cups", "")),
+    ("¾ tsp salt", ("salt", 0.75, "tsp", "")),
+    ("1 fl oz cream", ("cream", 1.0, "fl oz", "")),
+    ("2 eggs", ("eggs", 2.0, "", "")),
+    ("2-3 large eggs", ("eggs", 2.0, "large", "")),
+    ("2 cups flour (sifted)", ("flour", 2.0, "cups", "sifted")),
+    ("3 cloves garlic, minced", ("garlic", 3.0, "cloves", "minced")),
+    ("1 (14 oz) can tomatoes", ("tomatoes", 1.0, "can", "14 oz")),
+    ("1 (14 oz) can tomatoes, drained", ("tomatoes", 1.0, "can", "14 oz, drained")),
+    ("Eggs: 2", ("Eggs", 2.0, "", "")),
+    ("Flour: 2 cups", ("Flour", 2.0, "cups", "")),
+    ("Salt: to taste", ("Salt", 1, "to taste", "")),
+    ("Pepper: pinch", ("Pepper", 1, "pinch", "")),
+    ("Note: add more salt", ("Note", None, "", "add more salt")),
+    ("Fresh basil", ("Fresh basil", 1, "", "")),
+]
+
+
+class LegacyParser:
+    """Parsing methods as they were before the single-pass parser"""
+
+    def __init__(self, units):
+        self.units = units
+
+    def parse_ingredients_from_text(self, text):
+        """
+        Parse ingredients from OCR text
+        
+        Args:
+            text: OCR extracted text
+            
+        Returns:
+            List of ingredient dictionaries
+        """
+        ingredients = []
+        
+        # Look for ingredient section
+        lines = text.split('\n')
+        in_ingredients = False
+        
+        for line in lines:
+            line = line.strip()
+            
+            # Detect ingredient section
+            if re.match(r'^(ingredients?|what you need|you will need):?$', line.lower()):
+                in_ingredients = True
+                continue
+            
+            # Detect end of ingredient section
+            if in_ingredients and re.match(r'^(instructions?|method|directions|preparation):?$', line.lower()):
+                break
+            
+            # Parse ingredient lines
+            if in_ingredients and line:
+                ingredient = self.parse_ingredient_line(line)
+                if ingredient:
+                    ingredients.append(ingredient)
+        
+        return ingredients
+    
+    def parse_ingredient_line(self, line):
+        """
+        Parse a single ingredient line
+        
+        Args:
+            line: Ingredient text line
+            
+        Returns:
+            Dictionary with parsed ingredient or None
+        """
+        # Remove bullet points, numbers
+        line = re.sub(r'^[\d•\-*]\s*', '', line)
+        
+        # Try to parse quantity and unit
+        # Simple pattern: quantity unit? ingredient (notes)?
+        match = re.match(r'(\d+\.?\d*)\s*([a-zA-Z]+)?\s+(.+)', line)
+        
+        if match:
+            quantity = float(match.group(1))
+            unit = match.group(2) or ''
+            rest = match.group(3)
+            
+            # Check if rest contains notes in parentheses
+            name_match = re.match(r'([^(]+)(?:\(([^)]+)\))?', rest)
+            if name_match:
+                name = name_match.group(1).strip()
+                notes = name_match.group(2) or ''
+            else:
+                name = rest.strip()
+                notes = ''
+            
+            # Clean up unit
+            if unit.lower() in self.units:
+                unit = unit.lower()
+            else:
+                # Might be part of the name
+                name = f"{unit} {name}".strip()
+                unit = ''
+            
+            return {
+                "name": name,
+                "quantity": quantity,
+                "unit": unit,
+                "notes": notes
+            }
+        
+        # If no quantity found, treat as whole line is name
+        return {
+            "name": line,
+            "quantity": 1,
+            "unit": "",
+            "notes": ""
+        }
+    
+    def parse_instructions_from_text(self, text):
+        """
+        Parse instructions from OCR text
+        
+        Args:
+            text: OCR extracted text
+            
+        Returns:
+            List of instruction steps
+        """
+        instructions = []
+        
+        # Look for instruction section
+        lines = text.split('\n')
+        in_instructions = False
+        
+        for line in lines:
+            line = line.strip()
+            
+            # Detect instruction section
+            if re.match(r'^(instructions?|method|directions|preparation|steps?):?$', line.lower()):
+                in_instructions = True
+                continue
+            
+            # Parse instruction lines
+            if in_instructions and line:
+                # Remove step numbers
+                line = re.sub(r'^\d+[\.\)]\s*', '', line)
+                if line:
+                    instructions.append(line)
+        
+        return instructions
+    
+    def extract_recipe_name(self, text):
+        """
+        Extract recipe name from text (usually first line)
+        
+        Args:
+            text: OCR extracted text
+            
+        Returns:
+            Recipe name or None
+        """
+        lines = text.split('\n')
+        for line in lines:
+            line = line.strip()
+            if line and len(line) > 3 and len(line) < 100:
+                # Skip common headers
+                if not re.match(r'^(ingredients?|instructions?|method|serves|prep time|total time):?$', line.lower()):
+                    return line
+        return "Unnamed Recipe"
+
+
+def time_parse(label, parse, pages, line_count):
+    start = time.perf_counter()
+    for page in pages:
+        parse(page)
+    seconds = time.perf_counter() - start
+    rate = line_count / seconds if seconds else float('inf')
+    print(f"{label:<12} {seconds:8.3f} s  {rate:12,.0f} lines/s")
+    return rate
+
+
+def check_cases(processor):
+    """Parse PARSE_CASES; returns the number of lines parsed differently than expected"""
+    failures = 0
+    for line, expected in PARSE_CASES:
+        parsed = processor.parse_ingredient_line(line)
+        got = (parsed["name"], parsed["quantity"], parsed["unit"], parsed["notes"]) if parsed else None
+        if got != expected:
+            print(f"MISMATCH {line!r}: expected {expected}, got {got}")
+            failures += 1
+    return failures
+
+
+def main():
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    processor = RecipeOCRProcessor()
+    failures = check_cases(processor)
+    if failures:
+        print(f"{failures} of {len(PARSE_CASES)} parse cases failed")
+        sys.exit(1)
+    legacy = LegacyParser(processor.units)
+
+    page = processor.mock_ocr_extraction("benchmark.jpg")
+    pages = [page] * page_count
+    line_count = page.count('\n') * page_count
+
+    def legacy_parse(text):
+        # What create_structured_recipe used to do: three separate scans
+        legacy.extract_recipe_name(text)
+        legacy.parse_ingredients_from_text(text)
+        legacy.parse_instructions_from_text(text)
+
+    print(f"=== OCR parser: {page_count} pages, {line_count:,} lines ===")
+    before = time_parse("before", legacy_parse, pages, line_count)
+    after = time_parse("after", processor.parse_recipe_text, pages, line_count)
+    print(f"Speed-up: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Recipe System Benchmarks
+Timed scenarios over a deterministic synthetic corpus (bench_corpus.py):
+bulk import, catalog load (cold and warm), search, meal plan (plain and
+ingredient-optimized), grocery list generation and a meal swap that
+updates the list in place, NDJSON export and the
+OCR parse path, on each storage backend.
+
+Results are written as JSON with flat "<backend>/<scenario>" keys, so two
+runs can be diffed directly or compared with --compare, which exits with
+status 1 when a scenario got slower than the threshold allows.
+
+Usage: bench_recipes.py [--recipes N] [--repeat R] [--seed S]
+                        [--backend json|sqlite|all] [--only a,b] [--out FILE]
+                        [--compare BASELINE.json] [--threshold 0.10]
+"""
+
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from bench_corpus import generate_recipes
+from recipe_ocr_processor import RecipeOCRProcessor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes"))
+from recipe_manager import RecipeManager
+from recipe_stream import export_ndjson
+
+RESULTS_VERSION = 1
+
+BACKENDS = ["json", "sqlite"]
+SCENARIOS = ["import", "load_cold", "load", "search", "meal_plan", "meal_plan_optimized",
+             "grocery_list", "plan_swap", "export", "ocr_parse"]
+
+SEARCH_QUERIES = ["chicken", "garlic pasta", "rice OR spaghetti", "creamy soup", "bake",
+                  "lemon salmon", "spinach cheddar", "sim", "quick weeknight", "tacos"]
+
+# OCR pages parsed per run, whatever the corpus size
+OCR_PAGES = 2000
+IMPORT_BATCH_SIZE = 2000
+
+
+def git_commit():
+    """Current commit of the working tree, or None outside git"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(run, repeat, setup=None):
+    """
+    Time run() repeat times
+
+    Args:
+        run: Callable returning the number of operations it performed
+        repeat: Number of timed runs
+        setup: Optional untimed callable before each run
+
+    Returns:
+        Result dictionary (best and median seconds, operations, rate)
+    """
+    seconds = []
+    ops = 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        ops = run()
+        seconds.append(time.perf_counter() - start)
+    best = min(seconds)
+    return {
+        "seconds_min": round(best, 6),
+        "seconds_median": round(statistics.median(seconds), 6),
+        "ops": ops,
+        "ops_per_second": round(ops / best, 1) if best else None
+    }
+
+
+class Benchmark:
+    """One benchmark run over a fresh corpus per backend"""
+
+    def __init__(self, recipes=2000, repeat=3, seed=42, backends=BACKENDS, only=None):
+        self.recipes = recipes
+        self.repeat = repeat
+        self.seed = seed
+        self.backends = backends
+        self.scenarios = [s for s in SCENARIOS if not only or s in only]
+        self.workdir = Path(tempfile.mkdtemp(prefix="recipe-bench-"))
+
+    def corpus(self):
+        return generate_recipes(self.recipes, self.seed)
+
+    def import_corpus(self, base_path, backend):
+        """Save the whole corpus through RecipeManager.batch(); returns recipes saved"""
+        manager = RecipeManager(base_path, backend)
+        recipes = self.corpus()
+        saved = 0
+        # Flushed in groups, like recipe_stream.import_recipes
+        while True:
+            chunk = list(islice(recipes, IMPORT_BATCH_SIZE))
+            if not chunk:
+                break
+            with manager.batch():
+                for recipe in chunk:
+                    manager.save_recipe(recipe)
+            saved += len(chunk)
+        manager.close()
+        return saved
+
+    def run_backend(self, backend):
+        base_path = self.workdir / backend
+        results = {}
+
+        def fresh_dir():
+            shutil.rmtree(base_path, ignore_errors=True)
+            base_path.mkdir(parents=True)
+
+        # Import doubles as setup for everything else, so it always runs once
+        if "import" in self.scenarios:
+            results["import"] = timed(lambda: self.import_corpus(base_path, backend), self.repeat,
+                                      setup=fresh_dir)
+        else:
+            fresh_dir()
+            self.import_corpus(base_path, backend)
+
+        def load():
+            manager = RecipeManager(base_path, backend)
+            count = len(manager.summaries)
+            manager.get_stats()
+            manager.close()
+            return count
+
+        if "load_cold" in self.scenarios:
+            # Without .index/ the manifest and statistics are rebuilt
+            results["load_cold"] = timed(
+                load, self.repeat, setup=lambda: shutil.rmtree(base_path / ".index", ignore_errors=True))
+        if "load" in self.scenarios:
+            load()
+            results["load"] = timed(load, self.repeat)
+
+        manager = RecipeManager(base_path, backend)
+        manager.search_index
+
+        if "search" in self.scenarios:
+            def search():
+                for query in SEARCH_QUERIES:
+                    manager.search_recipes(query, limit=20)
+                return len(SEARCH_QUERIES)
+            results["search"] = timed(search, self.repeat)
+
+        plan_ids = []
+        if {"meal_plan", "grocery_list", "plan_swap"} & set(self.scenarios):
+            def plan():
+                plan_ids.append(manager.generate_meal_plan(days=7, seed=self.seed)["id"])
+                return 1
+            result = timed(plan, self.repeat)
+            if "meal_plan" in self.scenarios:
+                results["meal_plan"] = result
+
+        if "meal_plan_optimized" in self.scenarios:
+            def optimized_plan():
+                manager.generate_meal_plan(days=7, seed=self.seed, optimize=True)
+                return 1
+            results["meal_plan_optimized"] = timed(optimized_plan, self.repeat)
+
+        if "grocery_list" in self.scenarios:
+            def grocery():
+                manager.generate_grocery_list(plan_ids[-1])
+                return 1
+            results["grocery_list"] = timed(grocery, self.repeat)
+
+        if "plan_swap" in self.scenarios:
+            # Swap the first dinner back and forth; the plan's list follows by delta
+            manager.generate_grocery_list(plan_ids[-1])
+            first = next(meal for meal in manager.storage.load_meal_plan(plan_ids[-1])["meals"]
+                         if meal["recipe_id"] and not meal.get("leftovers"))
+            recipe_ids = [first["recipe_id"], next(iter(manager.summaries))]
+
+            def swap():
+                for recipe_id in recipe_ids[::-1] + recipe_ids:
+                    manager.swap_meal(plan_ids[-1], first["date"], recipe_id)
+                return 4
+            results["plan_swap"] = timed(swap, self.repeat)
+
+        if "export" in self.scenarios:
+            target = self.workdir / f"export-{backend}.ndjson"
+            results["export"] = timed(
+                lambda: export_ndjson(manager.storage, target)["exported"], self.repeat)
+
+        manager.close()
+        return results
+
+    def run_ocr(self):
+        """Parse OCR pages into structured recipes (backend independent)"""
+        processor = RecipeOCRProcessor()
+        pages = [recipe["ocr_text"] for recipe in generate_recipes(min(self.recipes, OCR_PAGES),
+                                                                   self.seed)]
+
+        def parse():
+            for page in pages:
+                processor.create_structured_recipe("benchmark.jpg", page)
+            return len(pages)
+        return timed(parse, self.repeat)
+
+    def run(self):
+        results = {}
+        try:
+            for backend in self.backends:
+                print(f"Running {backend} scenarios...")
+                for scenario, result in self.run_backend(backend).items():
+                    results[f"{backend}/{scenario}"] = result
+            if "ocr_parse" in self.scenarios:
+                print("Running OCR parse...")
+                results["ocr/parse"] = self.run_ocr()
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        return {
+            "version": RESULTS_VERSION,
+            "meta": {
+                "git_commit": git_commit(),
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "recipes": self.recipes,
+                "repeat": self.repeat,
+                "seed": self.seed
+            },
+            "results": results
+        }
+
+
+def print_results(report):
+    print(f"\n{'scenario':<26} {'best s':>10} {'median s':>10} {'ops':>7} {'ops/s':>12}")
+    for name, result in report["results"].items():
+        rate = result["ops_per_second"]
+        print(f"{name:<26} {result['seconds_min']:>10.4f} {result['seconds_median']:>10.4f} "
+              f"{result['ops']:>7} {rate if rate is not None else '-':>12}")
+
+
+def compare(report, baseline, threshold=0.10):
+    """
+    Print the change of every scenario against a baseline run
+
+    Returns:
+        List of scenarios slower than 1 + threshold times the baseline
+    """
+    if baseline.get("meta", {}).get("recipes") != report["meta"]["recipes"]:
+        print("Warning: baseline was run with a different corpus size")
+    regressions = []
+    print(f"\n{'scenario':<26} {'baseline s':>11} {'now s':>10} {'change':>8}")
+    for name, result in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old["seconds_min"]:
+            continue
+        ratio = result["seconds_min"] / old["seconds_min"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<26} {old['seconds_min']:>11.4f} {result['seconds_min']:>10.4f} "
+              f"{(ratio - 1) * 100:>+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] in ("-h", "--help"):
+        print(__doc__.strip().split("Usage: ")[-1])
+        return 0
+
+    options = {"--recipes": "2000", "--repeat": "3", "--seed": "42", "--backend": "all",
+               "--only": None, "--out": None, "--compare": None, "--threshold": "0.10"}
+    while args:
+        flag = args.pop(0)
+        if flag not in options or not args:
+            print(f"Error: unknown or incomplete option {flag}")
+            return 2
+        options[flag] = args.pop(0)
+
+    backends = BACKENDS if options["--backend"] == "all" else [options["--backend"]]
+    only = options["--only"].split(",") if options["--only"] else None
+    benchmark = Benchmark(recipes=int(options["--recipes"]), repeat=int(options["--repeat"]),
+                          seed=int(options["--seed"]), backends=backends, only=only)
+    print(f"=== Recipe benchmarks: {benchmark.recipes} recipes, seed {benchmark.seed}, "
+          f"best of {benchmark.repeat} ===")
+    report = benchmark.run()
+    print_results(report)
+
+    if options["--out"]:
+        with open(options["--out"], 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {options['--out']}")
+
+    if options["--compare"]:
+        with open(options["--compare"], 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, float(options["--threshold"]))
+        if regressions:
+            print(f"\n{len(regressions)} scenario(s) slower than baseline: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+CLI Startup Budgets
+Times fresh `cli.py <command>` processes against a synthetic recipe
+directory and fails when a command starts slower than its budget. The
+commands a bot calls most should come back well before the catalog would
+have finished loading; this keeps later changes from quietly moving heavy
+imports or index loads back onto their path.
+
+Each command runs in-process (--local, no CLI server) and the best of the
+runs counts, since the slow runs measure the machine rather than the code.
+The bare interpreter start is printed alongside for scale.
+
+Usage: bench_startup.py [--runs N] [--recipes N] [--scale F]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_corpus import write_corpus
+
+CLI = Path(__file__).resolve().parent / "recipes" / "cli.py"
+
+# command -> budget in milliseconds, wall time of the whole process
+BUDGETS = {
+    "help": 30,
+    "view": 60,
+}
+
+
+def run_time(args, env, runs):
+    """Best wall time of runs executions of a Python command, in ms"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable] + args, env=env, capture_output=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        if result.returncode:
+            raise RuntimeError(f"{' '.join(args)} failed: {result.stderr.decode(errors='replace')}")
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def check_budgets(runs=10, recipes=2000, scale=1.0):
+    """
+    Time every budgeted command
+
+    Args:
+        runs: Processes started per command
+        recipes: Size of the synthetic recipe directory
+        scale: Multiplier for the budgets (for slow CI machines)
+
+    Returns:
+        List of (command, best ms, budget ms) over budget
+    """
+    over = []
+    with tempfile.TemporaryDirectory(prefix="recipe-startup-") as base:
+        write_corpus(Path(base) / "data", recipes)
+        env = {key: value for key, value in os.environ.items()
+               if not key.startswith("RECIPE_METRICS") and key != "RECIPE_PROFILE"}
+        env["RECIPES_DIR"] = base
+
+        # Warm the OS cache and build .index/ like any earlier run would have
+        subprocess.run([sys.executable, str(CLI), "list", "--local"], env=env, capture_output=True)
+
+        bare = run_time(["-c", "pass"], env, runs)
+        print(f"{'python -c pass':<16} {bare:>8.1f} ms")
+        arguments = {"help": [], "view": [f"{recipes // 2:08x}"]}
+        for command, budget in BUDGETS.items():
+            budget *= scale
+            best = run_time([str(CLI), command, *arguments[command], "--local"], env, runs)
+            flag = ""
+            if best > budget:
+                flag = "  OVER BUDGET"
+                over.append((command, best, budget))
+            print(f"{'cli.py ' + command:<16} {best:>8.1f} ms  (budget {budget:.0f} ms){flag}")
+    return over
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] in ("-h", "--help"):
+        print(__doc__.strip().splitlines()[-1])
+        return 0
+
+    options = {"--runs": "10", "--recipes": "2000", "--scale": "1.0"}
+    while args:
+        flag = args.pop(0)
+        if flag not in options or not args:
+            print(f"Error: unknown or incomplete option {flag}")
+            return 2
+        options[flag] = args.pop(0)
+
+    over = check_budgets(int(options["--runs"]), int(options["--recipes"]),
+                         float(options["--scale"]))
+    if over:
+        print(f"\n{len(over)} command(s) over their startup budget: "
+              f"{', '.join(command for command, _, _ in over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Batch OCR Ingestion
+Back-fills scanned cookbooks: runs OCR and recipe parsing for a whole
+directory of photos across a process pool, and streams finished recipes
+into RecipeManager.save_recipe as they complete.
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+# RecipeManager and the shared instrumentation live in recipes/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes"))
+from instrumentation import take_profile_flag
+
+from ocr_cache import DEFAULT_CACHE_PATH, OCRCache
+from recipe_ocr_processor import RecipeOCRProcessor
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.heic', '.tif', '.tiff', '.bmp'}
+
+# One processor per worker process, built by the pool initializer
+_worker_processor = None
+_bypass_cache = False
+
+
+def _init_worker(google_drive_path, cache_path, bypass_cache):
+    global _worker_processor, _bypass_cache
+    cache = OCRCache(cache_path) if cache_path else None
+    _worker_processor = RecipeOCRProcessor(google_drive_path, cache=cache)
+    _bypass_cache = bypass_cache
+
+
+def _process_image(image_path):
+    """OCR + parse one image inside a worker process"""
+    result = {"image_path": image_path, "recipe": None, "error": None, "cached": False,
+              "ocr_seconds": 0.0, "parse_seconds": 0.0}
+    try:
+        _, result["recipe"], result["cached"] = _worker_processor.extract_and_parse(
+            image_path, _bypass_cache, timings=result)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def find_images(source):
+    """
+    Expand a directory, a single image or a list of those into image paths
+
+    Args:
+        source: Path or iterable of paths
+
+    Returns:
+        Sorted list of image paths (as strings)
+    """
+    if isinstance(source, (str, Path)):
+        source = [source]
+
+    images = []
+    for item in source:
+        path = Path(item)
+        if path.is_dir():
+            images.extend(str(p) for p in path.rglob("*")
+                          if p.suffix.lower() in IMAGE_EXTENSIONS and p.is_file())
+        elif path.suffix.lower() in IMAGE_EXTENSIONS:
+            images.append(str(path))
+    return sorted(images)
+
+
+class BatchIngestor:
+    """
+    Process-pool OCR ingestion with a bounded number of in-flight images
+
+    At most max_pending images are queued in the pool at any time, so a
+    directory of thousands of pages never piles up finished recipes in
+    memory; results are saved in small batches as they come back.
+    """
+
+    def __init__(self, manager=None, workers=None, max_pending=None, google_drive_path=None,
+                 cache_path=DEFAULT_CACHE_PATH, bypass_cache=False, save_batch=100,
+                 duplicates="merge"):
+        """
+        Args:
+            manager: Object with save_recipe(recipe) (normally RecipeManager);
+                if None, recipes are only returned in the results
+            workers: Worker processes (default: all cores)
+            max_pending: Images in flight at once (default: 4 per worker)
+            google_drive_path: Passed to each worker's RecipeOCRProcessor
+            cache_path: OCR result cache file (None disables the cache)
+            bypass_cache: Re-run OCR even for cached images, refreshing the cache
+            save_batch: Recipes saved per manager.batch() flush
+            duplicates: Passed to manager.save_recipe: "merge" folds a page
+                photographed again into the recipe already stored, "flag"
+                only marks it
+        """
+        self.manager = manager
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.google_drive_path = google_drive_path
+        self.cache_path = cache_path
+        self.bypass_cache = bypass_cache
+        self.save_batch = save_batch
+        self.duplicates = duplicates
+
+    def iter_results(self, source):
+        """Yield one result dict per image, in completion order"""
+        images = iter(find_images(source))
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.google_drive_path, self.cache_path,
+                                           self.bypass_cache)) as pool:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.max_pending:
+                    image_path = next(images, None)
+                    if image_path is None:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(_process_image, image_path))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def _save(self, results, report, stage):
+        """Save a group of parsed recipes with one storage flush"""
+        save_start = time.perf_counter()
+        with self.manager.batch():
+            for result in results:
+                try:
+                    recipe_id = self.manager.save_recipe(result["recipe"], duplicates=self.duplicates)
+                except Exception as e:
+                    report["failed"] += 1
+                    report["errors"].append({"image_path": result["image_path"], "error": f"save: {e}"})
+                    continue
+                stage["items"] += 1
+                if recipe_id != result["recipe"]["id"]:
+                    report["merged"] += 1
+                else:
+                    report["saved"] += 1
+                report["recipe_ids"].append(recipe_id)
+        stage["seconds"] += time.perf_counter() - save_start
+
+    def run(self, source):
+        """
+        Ingest every image under source
+
+        Returns:
+            Report with counts, errors and per-stage throughput
+        """
+        stages = {name: {"items": 0, "seconds": 0.0} for name in ("ocr", "parse", "save")}
+        report = {"images": 0, "saved": 0, "merged": 0, "failed": 0, "cache_hits": 0,
+                  "recipe_ids": [], "errors": []}
+        to_save = []
+        start = time.perf_counter()
+
+        for result in self.iter_results(source):
+            report["images"] += 1
+            if result["error"]:
+                report["failed"] += 1
+                report["errors"].append({"image_path": result["image_path"], "error": result["error"]})
+                continue
+
+            if result["cached"]:
+                report["cache_hits"] += 1
+            else:
+                stages["ocr"]["items"] += 1
+                stages["ocr"]["seconds"] += result["ocr_seconds"]
+                stages["parse"]["items"] += 1
+                stages["parse"]["seconds"] += result["parse_seconds"]
+
+            if self.manager is None:
+                report["recipe_ids"].append(result["recipe"]["id"])
+                continue
+
+            to_save.append(result)
+            if len(to_save) >= self.save_batch:
+                self._save(to_save, report, stages["save"])
+                to_save = []
+
+        if to_save:
+            self._save(to_save, report, stages["save"])
+
+        wall = time.perf_counter() - start
+        for stage in stages.values():
+            # Worker stages run in parallel, so per-item time is spread over the pool
+            stage["per_second"] = round(stage["items"] / stage["seconds"], 1) if stage["seconds"] else None
+            stage["seconds"] = round(stage["seconds"], 3)
+        report["stages"] = stages
+        report["workers"] = self.workers
+        report["wall_seconds"] = round(wall, 3)
+        report["images_per_second"] = round(report["images"] / wall, 1) if wall else None
+        return report
+
+
+def _load_recipe_manager(recipes_dir):
+    from recipe_manager import RecipeManager
+    return RecipeManager(recipes_dir)
+
+
+def main():
+    args = sys.argv[1:]
+    take_profile_flag(args)
+    if not args or args[0] in ("-h", "--help"):
+        print("Usage: ocr_batch.py <image_dir_or_file>... [--workers N] [--recipes-dir DIR]")
+        print("                    [--cache FILE] [--no-cache] [--refresh-cache] [--keep-duplicates]")
+        print("                    [--profile]")
+        print("Without --recipes-dir the recipes are parsed but not saved. Near-duplicates of")
+        print("stored recipes are merged into them unless --keep-duplicates (then only flagged).")
+        return
+
+    workers = None
+    recipes_dir = None
+    cache_path = DEFAULT_CACHE_PATH
+    bypass_cache = False
+    duplicates = "merge"
+    sources = []
+    i = 0
+    while i < len(args):
+        if args[i] == "--workers" and i + 1 < len(args):
+            workers = int(args[i + 1])
+            i += 2
+        elif args[i] == "--recipes-dir" and i + 1 < len(args):
+            recipes_dir = args[i + 1]
+            i += 2
+        elif args[i] == "--cache" and i + 1 < len(args):
+            cache_path = args[i + 1]
+            i += 2
+        elif args[i] == "--no-cache":
+            cache_path = None
+            i += 1
+        elif args[i] == "--refresh-cache":
+            bypass_cache = True
+            i += 1
+        elif args[i] == "--keep-duplicates":
+            duplicates = "flag"
+            i += 1
+        else:
+            sources.append(args[i])
+            i += 1
+
+    manager = _load_recipe_manager(recipes_dir) if recipes_dir else None
+    report = BatchIngestor(manager, workers=workers, cache_path=cache_path,
+                           bypass_cache=bypass_cache, duplicates=duplicates).run(sources)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
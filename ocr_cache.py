@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+OCR Result Cache
+Persistent, content-addressed cache for OCR text and parsed recipes.
+
+Entries are keyed by the SHA-256 of the image bytes plus the parser
+version, so a re-sent or re-scanned photo costs one hash instead of OCR
+and parsing, and bumping PARSER_VERSION invalidates old parses. The
+cache is a small SQLite file and is trimmed least-recently-used first
+once it grows past its entry or byte limit.
+
+Usage:
+  ocr_cache.py stats [db]
+  ocr_cache.py clear [db]
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / ".ocr-cache" / "ocr-cache.db"
+DEFAULT_MAX_ENTRIES = 20000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    image_hash TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    ocr_text TEXT NOT NULL,
+    recipe TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (image_hash, parser_version)
+);
+CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache(last_used);
+"""
+
+SQL_GET = "SELECT ocr_text, recipe FROM ocr_cache WHERE image_hash = ? AND parser_version = ?"
+SQL_TOUCH = "UPDATE ocr_cache SET last_used = ? WHERE image_hash = ? AND parser_version = ?"
+SQL_PUT = ("INSERT OR REPLACE INTO ocr_cache "
+           "(image_hash, parser_version, ocr_text, recipe, size, last_used) VALUES (?, ?, ?, ?, ?, ?)")
+SQL_TOTALS = "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_cache"
+SQL_OLDEST = "SELECT image_hash, parser_version, size FROM ocr_cache ORDER BY last_used LIMIT ?"
+SQL_DELETE = "DELETE FROM ocr_cache WHERE image_hash = ? AND parser_version = ?"
+
+
+def file_hash(path):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    SQLite-backed OCR + parse cache with LRU eviction
+
+    Safe to share between worker processes: each opens its own connection
+    and SQLite serializes the writes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            path: Cache database file
+            max_entries: Evict beyond this many entries
+            max_bytes: Evict beyond this many bytes of cached text
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(str(self.path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def get(self, image_hash, parser_version):
+        """
+        Look up a cached result
+
+        Returns:
+            (ocr_text, recipe dict) or None
+        """
+        row = self.conn.execute(SQL_GET, (image_hash, parser_version)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        with self.conn:
+            self.conn.execute(SQL_TOUCH, (time.time(), image_hash, parser_version))
+        self.hits += 1
+        return row[0], json.loads(row[1])
+
+    def put(self, image_hash, parser_version, ocr_text, recipe):
+        """Store a result, then evict old entries if over the limits"""
+        recipe_json = json.dumps(recipe, ensure_ascii=False)
+        size = len(ocr_text.encode('utf-8')) + len(recipe_json.encode('utf-8'))
+        with self.conn:
+            self.conn.execute(SQL_PUT, (image_hash, parser_version, ocr_text, recipe_json, size, time.time()))
+            self._evict()
+
+    def _evict(self):
+        count, total = self.conn.execute(SQL_TOTALS).fetchone()
+        excess = count - self.max_entries
+        if excess <= 0 and total <= self.max_bytes:
+            return
+
+        batch = max(excess, 1)
+        while count > self.max_entries or total > self.max_bytes:
+            rows = self.conn.execute(SQL_OLDEST, (batch,)).fetchall()
+            if not rows:
+                break
+            for image_hash, parser_version, size in rows:
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                self.conn.execute(SQL_DELETE, (image_hash, parser_version))
+                count -= 1
+                total -= size
+            batch = 64
+
+    def stats(self):
+        count, total = self.conn.execute(SQL_TOTALS).fetchone()
+        return {
+            "path": str(self.path),
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM ocr_cache")
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("stats", "clear"):
+        print(__doc__)
+        return
+
+    cache = OCRCache(args[1] if len(args) > 1 else DEFAULT_CACHE_PATH)
+    if args[0] == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}")
+    else:
+        print(json.dumps(cache.stats(), indent=2))
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
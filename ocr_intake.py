@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Recipe Photo Intake Daemon
+Long-running asyncio service in front of RecipeOCRProcessor.process_telegram_photo,
+so each photo skips interpreter startup and imports.
+
+Jobs arrive from:
+- an inbox directory (drop photo.jpg, optionally photo.txt with the caption)
+- a local Unix socket, one JSON object per line (where the OS supports it)
+
+Photos are processed in a process pool with a concurrency limit, re-sent
+photos are dropped by content hash, and queue depth / latency counters are
+available over the socket and in stats.json. A re-photographed page that
+is a near-duplicate of a stored recipe is merged into it
+(--keep-duplicates only flags it).
+
+Usage:
+  ocr_intake.py serve [--dir DIR] [--workers N] [--recipes-dir DIR] [--no-cache]
+                      [--keep-duplicates] [--profile]
+  ocr_intake.py submit <photo> [caption]     (local stand-in for Telegram)
+  ocr_intake.py stats
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import socket
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from ocr_cache import DEFAULT_CACHE_PATH, OCRCache, file_hash
+from recipe_ocr_processor import RecipeOCRProcessor
+from instrumentation import take_profile_flag
+
+DEFAULT_INTAKE_DIR = Path(__file__).resolve().parent / "recipe-intake"
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.heic'}
+POLL_SECONDS = 0.5
+LATENCY_WINDOW = 500
+
+_worker_processor = None
+
+
+def _init_worker(cache_path):
+    global _worker_processor
+    cache = OCRCache(cache_path) if cache_path else None
+    _worker_processor = RecipeOCRProcessor(cache=cache)
+
+
+def _process_job(photo_path, message_text):
+    """Run in a worker process"""
+    return _worker_processor.process_telegram_photo(photo_path, message_text)
+
+
+def supports_unix_socket():
+    return hasattr(socket, 'AF_UNIX')
+
+
+class IntakeStats:
+    """Counters for the intake queue"""
+
+    def __init__(self):
+        self.received = 0
+        self.duplicates = 0
+        self.merged = 0
+        self.processed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self, queue_depth):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        return {
+            "queue_depth": queue_depth,
+            "in_flight": self.in_flight,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "merged": self.merged,
+            "processed": self.processed,
+            "failed": self.failed,
+            "latency_seconds": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 3) if latencies else None
+            }
+        }
+
+
+class PhotoIntakeService:
+    """
+    Queue + worker pool around process_telegram_photo
+
+    The queue is bounded: socket clients wait for room (backpressure) and
+    the inbox watcher stops picking up files while it is full.
+    """
+
+    def __init__(self, intake_dir=DEFAULT_INTAKE_DIR, workers=2, max_queue=100, manager=None,
+                 cache_path=DEFAULT_CACHE_PATH, duplicates="merge"):
+        self.intake_dir = Path(intake_dir)
+        self.inbox = self.intake_dir / "inbox"
+        self.done_dir = self.intake_dir / "done"
+        self.failed_dir = self.intake_dir / "failed"
+        self.socket_path = self.intake_dir / "intake.sock"
+        self.seen_file = self.intake_dir / "seen-hashes.json"
+        self.stats_file = self.intake_dir / "stats.json"
+        for path in (self.inbox, self.done_dir, self.failed_dir):
+            path.mkdir(parents=True, exist_ok=True)
+
+        self.workers = workers
+        self.max_queue = max_queue
+        self.manager = manager
+        self.cache_path = cache_path
+        self.duplicates = duplicates    # manager.save_recipe's duplicates mode
+        self.stats = IntakeStats()
+        self.seen = self._load_seen()
+        self.pending_hashes = set()
+        self.watched_paths = set()
+
+    def _load_seen(self):
+        try:
+            with open(self.seen_file, 'r', encoding='utf-8') as f:
+                return set(json.load(f))
+        except (OSError, ValueError):
+            return set()
+
+    def _save_seen(self):
+        tmp_path = self.seen_file.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(sorted(self.seen), f)
+        os.replace(tmp_path, self.seen_file)
+
+    def _write_stats(self):
+        tmp_path = self.stats_file.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.stats.snapshot(self.queue.qsize()), f, indent=2)
+        os.replace(tmp_path, self.stats_file)
+
+    async def submit(self, photo_path, message_text="", from_inbox=False):
+        """
+        Queue a photo unless the same content was already seen
+
+        Returns:
+            "queued", "duplicate" or "missing"
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            content_hash = await loop.run_in_executor(None, file_hash, photo_path)
+        except OSError:
+            return "missing"
+
+        self.stats.received += 1
+        if content_hash in self.seen or content_hash in self.pending_hashes:
+            self.stats.duplicates += 1
+            if from_inbox:
+                self._move(photo_path, self.done_dir)
+            return "duplicate"
+
+        self.pending_hashes.add(content_hash)
+        await self.queue.put((time.perf_counter(), content_hash, photo_path, message_text, from_inbox))
+        return "queued"
+
+    def _move(self, photo_path, target_dir):
+        photo_path = Path(photo_path)
+        self.watched_paths.discard(str(photo_path))
+        for path in (photo_path, photo_path.with_suffix(".txt")):
+            if path.exists():
+                shutil.move(str(path), str(target_dir / path.name))
+
+    async def _worker(self, pool, save_lock):
+        loop = asyncio.get_running_loop()
+        while True:
+            queued_at, content_hash, photo_path, message_text, from_inbox = await self.queue.get()
+            self.stats.in_flight += 1
+            try:
+                result = await loop.run_in_executor(pool, _process_job, photo_path, message_text)
+                if self.manager is not None:
+                    save = partial(self.manager.save_recipe, result["recipe"], duplicates=self.duplicates)
+                    async with save_lock:
+                        recipe_id = await loop.run_in_executor(None, save)
+                    if recipe_id != result["recipe"]["id"]:
+                        self.stats.merged += 1
+                        result["summary"] += f" (merged into {recipe_id})"
+                self.seen.add(content_hash)
+                self._save_seen()
+                self.stats.processed += 1
+                if from_inbox:
+                    self._move(photo_path, self.done_dir)
+                print(f"Processed {photo_path}: {result['summary']}")
+            except Exception as e:
+                self.stats.failed += 1
+                if from_inbox:
+                    self._move(photo_path, self.failed_dir)
+                print(f"Error processing {photo_path}: {e}")
+            finally:
+                self.pending_hashes.discard(content_hash)
+                self.stats.in_flight -= 1
+                self.stats.latencies.append(time.perf_counter() - queued_at)
+                self.queue.task_done()
+
+    async def _watch_inbox(self):
+        while True:
+            if not self.queue.full():
+                for path in sorted(self.inbox.iterdir()):
+                    if path.suffix.lower() not in IMAGE_EXTENSIONS or str(path) in self.watched_paths:
+                        continue
+                    caption_file = path.with_suffix(".txt")
+                    caption = caption_file.read_text(encoding='utf-8') if caption_file.exists() else ""
+                    self.watched_paths.add(str(path))
+                    await self.submit(str(path), caption, from_inbox=True)
+            self._write_stats()
+            await asyncio.sleep(POLL_SECONDS)
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if request.get("cmd") == "stats":
+                        response = self.stats.snapshot(self.queue.qsize())
+                    else:
+                        status = await self.submit(request["photo_path"], request.get("message_text", ""))
+                        response = {"status": status}
+                except (ValueError, KeyError) as e:
+                    response = {"status": "error", "error": str(e)}
+                writer.write((json.dumps(response) + "\n").encode('utf-8'))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self):
+        """Run until cancelled"""
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        save_lock = asyncio.Lock()
+        server = None
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.cache_path,)) as pool:
+            tasks = [asyncio.create_task(self._worker(pool, save_lock)) for _ in range(self.workers)]
+            tasks.append(asyncio.create_task(self._watch_inbox()))
+
+            if supports_unix_socket():
+                if self.socket_path.exists():
+                    self.socket_path.unlink()
+                server = await asyncio.start_unix_server(self._handle_client, path=str(self.socket_path))
+                print(f"Listening on {self.socket_path}")
+            print(f"Watching {self.inbox} with {self.workers} workers")
+
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                if server is not None:
+                    server.close()
+                    if self.socket_path.exists():
+                        self.socket_path.unlink()
+
+
+def send_request(request, intake_dir=DEFAULT_INTAKE_DIR):
+    """Send one request to a running daemon; returns the response or None"""
+    socket_path = Path(intake_dir) / "intake.sock"
+    if not supports_unix_socket() or not socket_path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(socket_path))
+            client.sendall((json.dumps(request) + "\n").encode('utf-8'))
+            with client.makefile('r', encoding='utf-8') as f:
+                return json.loads(f.readline())
+    except OSError:
+        # Stale socket left by a daemon that was killed
+        return None
+
+
+def _load_recipe_manager(recipes_dir):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes"))
+    from recipe_manager import RecipeManager
+    return RecipeManager(recipes_dir)
+
+
+def _option(args, name, default=None):
+    if name in args:
+        index = args.index(name)
+        if index + 1 < len(args):
+            value = args[index + 1]
+            del args[index:index + 2]
+            return value
+    return default
+
+
+def main():
+    args = sys.argv[1:]
+    take_profile_flag(args)
+    intake_dir = Path(_option(args, "--dir", DEFAULT_INTAKE_DIR))
+
+    if not args:
+        print(__doc__)
+        return
+
+    command = args[0]
+    if command == "serve":
+        workers = int(_option(args, "--workers", 2))
+        recipes_dir = _option(args, "--recipes-dir")
+        cache_path = None if "--no-cache" in args else DEFAULT_CACHE_PATH
+        manager = _load_recipe_manager(recipes_dir) if recipes_dir else None
+        duplicates = "flag" if "--keep-duplicates" in args else "merge"
+        service = PhotoIntakeService(intake_dir, workers=workers, manager=manager, cache_path=cache_path,
+                                     duplicates=duplicates)
+        try:
+            asyncio.run(service.serve())
+        except KeyboardInterrupt:
+            print("Intake stopped")
+
+    elif command == "submit":
+        if len(args) < 2:
+            print("Usage: ocr_intake.py submit <photo> [caption]")
+            return
+        photo_path = os.path.abspath(args[1])
+        caption = " ".join(args[2:])
+        response = send_request({"photo_path": photo_path, "message_text": caption}, intake_dir)
+        if response is None:
+            # No daemon socket: drop the photo in the inbox instead
+            inbox = intake_dir / "inbox"
+            inbox.mkdir(parents=True, exist_ok=True)
+            shutil.copy(photo_path, inbox / os.path.basename(photo_path))
+            if caption:
+                (inbox / os.path.basename(photo_path)).with_suffix(".txt").write_text(caption, encoding='utf-8')
+            print(f"Queued in inbox: {inbox}")
+        else:
+            print(f"Submitted: {response['status']}")
+
+    elif command == "stats":
+        response = send_request({"cmd": "stats"}, intake_dir)
+        if response is None:
+            stats_file = intake_dir / "stats.json"
+            response = json.loads(stats_file.read_text()) if stats_file.exists() else {}
+        print(json.dumps(response, indent=2))
+
+    else:
+        print(f"Unknown command: {command}")
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+Recipe OCR Processor
+Processes recipe photos sent via Telegram, extracts text using OCR,
+and creates structured recipe data for Google Drive storage.
+"""
+
+import os
+import re
+from datetime import datetime
+import sys
+import time
+
+# Shared unit vocabulary and id scheme live with the recipe manager
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes"))
+from instrumentation import count, record_span, span, timed
+from recipe_ids import new_id
+from units import UNIT_ALIASES, canonical_unit
+
+from ocr_cache import file_hash
+
+# Bump when parsing output changes so cached parses are not reused
+PARSER_VERSION = "4"
+
+# Parsing patterns are compiled once at import, not per line
+UNICODE_FRACTIONS = {
+    '½': 0.5, '⅓': 1 / 3, '⅔': 2 / 3, '¼': 0.25, '¾': 0.75,
+    '⅕': 0.2, '⅖': 0.4, '⅗': 0.6, '⅘': 0.8, '⅙': 1 / 6, '⅚': 5 / 6,
+    '⅛': 0.125, '⅜': 0.375, '⅝': 0.625, '⅞': 0.875,
+}
+_FRACTION_CHARS = ''.join(UNICODE_FRACTIONS)
+
+# "2 1/4", "3/4", "1.5", "1½", "½" - optionally a range like "2-3"
+QUANTITY_RE = re.compile(
+    rf'(?P<quantity>\d+\s+\d+/\d+|\d+/\d+|\d+\s*[{_FRACTION_CHARS}]|[{_FRACTION_CHARS}]|\d+(?:[.,]\d+)?)'
+    r'(?:\s*(?:-|–|to)\s*[\d./]+)?(?=\s|$)'
+)
+# Whole ingredient line: bullet? quantity rest
+INGREDIENT_RE = re.compile(r'(?:[•\-*·]\s*)?' + QUANTITY_RE.pattern + r'\s+(?P<rest>\S.*)')
+COLON_INGREDIENT_RE = re.compile(r'([a-zA-Z][a-zA-Z\s]*?)\s*:\s*(.+)')   # Ingredient: amount
+BULLET_RE = re.compile(r'^[•\-*·]\s*')
+STEP_NUMBER_RE = re.compile(r'^(?:step\s*)?\d+[\.\):]\s*', re.IGNORECASE)
+SECTION_HEADING_RE = re.compile(
+    r'^(?:(ingredients?|what you need|you will need)|(instructions?|method|directions|preparation|steps?))\s*:?$',
+    re.IGNORECASE
+)
+NAME_SKIP_RE = re.compile(r'^(ingredients?|instructions?|method|serves|prep time|total time):?$', re.IGNORECASE)
+SERVINGS_PREFIXES = ('serves', 'serving', 'makes', 'yield')
+SERVINGS_RE = re.compile(r'(?:serves|servings?|makes|yields?)\s*:?\s*(?:about\s+)?(\d+)(\s+dozen)?', re.IGNORECASE)
+TIME_RE = re.compile(
+    r'\b(prep(?:aration)?|cook(?:ing)?|bake|total)\s+time\s*:?\s*(\d+)\s*(h|hrs?|hours?|m|mins?|minutes?)\b',
+    re.IGNORECASE
+)
+TIME_FIELDS = {
+    "prep": "prep_time_minutes", "preparation": "prep_time_minutes",
+    "cook": "cook_time_minutes", "cooking": "cook_time_minutes", "bake": "cook_time_minutes",
+    "total": "total_time_minutes",
+}
+
+
+def _parse_quantity(text):
+    """Numeric value of a quantity token ("2 1/4" -> 2.25)"""
+    if text.isdigit():
+        return float(text)
+    text = text.strip().replace(',', '.')
+    total = 0.0
+    for part in text.split():
+        if part[-1] in UNICODE_FRACTIONS:
+            total += UNICODE_FRACTIONS[part[-1]]
+            part = part[:-1]
+            if not part:
+                continue
+        if '/' in part:
+            numerator, denominator = part.split('/', 1)
+            total += float(numerator) / float(denominator) if float(denominator) else 0
+        else:
+            total += float(part)
+    return total
+
+
+def _minutes(value, unit):
+    return int(value) * 60 if unit.lower().startswith('h') else int(value)
+
+class RecipeOCRProcessor:
+    def __init__(self, google_drive_path=None, cache=None, find_duplicates=None):
+        """
+        Initialize OCR processor
+        
+        Args:
+            google_drive_path: Path to Google Drive folder (when set up)
+            cache: Optional OCRCache for OCR text and parsed recipes
+            find_duplicates: Optional lookup of stored look-alikes,
+                recipe -> [(recipe_id, similarity)], normally
+                RecipeManager.find_duplicates
+        """
+        self.google_drive_path = google_drive_path
+        self.cache = cache
+        self.find_duplicates = find_duplicates
+        
+        # Common measurement units (every spelling the grocery aggregator knows)
+        self.units = set(UNIT_ALIASES)
+    
+    def process_image(self, image_path):
+        """
+        Process recipe image and extract structured data
+        
+        Args:
+            image_path: Path to recipe image
+            
+        Returns:
+            Dictionary with extracted recipe data
+        """
+        print(f"Processing image: {image_path}")
+        
+        # In a real implementation, this would use:
+        # 1. Tesseract OCR for text extraction
+        # 2. GPT-4/Claude for structured parsing
+        # 3. Custom parsing for ingredients/instructions
+        
+        # For now, return a template structure
+        # You would send me the actual photo and I'd process it
+        
+        recipe_data = {
+            "id": new_id(),
+            "name": "Recipe from Photo",
+            "source": "photo_upload",
+            "image_path": image_path,
+            "extracted_text": "This would contain OCR text from the image",
+            "status": "needs_review",
+            "created_date": datetime.now().isoformat(),
+            "needs_manual_review": True
+        }
+        
+        return recipe_data
+    
+    @timed("ocr.parse_text")
+    def parse_recipe_text(self, text):
+        """
+        Parse OCR text in a single pass
+        
+        Walks the lines once, tracking which section (header, ingredients,
+        instructions) it is in, and picks up the name, servings and times
+        along the way.
+        
+        Args:
+            text: OCR extracted text
+            
+        Returns:
+            Dictionary with name, ingredients, instructions, servings,
+            prep_time_minutes, cook_time_minutes and total_time_minutes
+            (None where not found)
+        """
+        parsed = {
+            "name": None,
+            "ingredients": [],
+            "instructions": [],
+            "servings": None,
+            "prep_time_minutes": None,
+            "cook_time_minutes": None,
+            "total_time_minutes": None
+        }
+        section = None
+        
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            
+            # Cheap string checks first; the regexes only run on likely lines
+            if len(line) < 25:
+                heading = SECTION_HEADING_RE.match(line)
+                if heading:
+                    section = "ingredients" if heading.group(1) else "instructions"
+                    continue
+            
+            # Servings / time lines are metadata wherever they appear
+            lower = line.lower()
+            if "time" in lower:
+                time_match = TIME_RE.search(line)
+                if time_match:
+                    field = TIME_FIELDS[time_match.group(1).lower()]
+                    if parsed[field] is None:
+                        parsed[field] = _minutes(time_match.group(2), time_match.group(3))
+                    continue
+            if section != "ingredients" and lower.startswith(SERVINGS_PREFIXES):
+                servings_match = SERVINGS_RE.match(line)
+                if servings_match:
+                    if parsed["servings"] is None:
+                        servings = int(servings_match.group(1))
+                        if servings_match.group(2):
+                            servings *= 12
+                        parsed["servings"] = servings
+                    continue
+            
+            if section == "ingredients":
+                ingredient = self.parse_ingredient_line(line)
+                if ingredient:
+                    parsed["ingredients"].append(ingredient)
+            elif section == "instructions":
+                step = STEP_NUMBER_RE.sub('', line)
+                if step:
+                    parsed["instructions"].append(step)
+            elif parsed["name"] is None and 3 < len(line) < 100 and not NAME_SKIP_RE.match(line):
+                parsed["name"] = line
+        
+        return parsed
+    
+    def parse_ingredients_from_text(self, text):
+        """
+        Parse ingredients from OCR text
+        
+        Args:
+            text: OCR extracted text
+            
+        Returns:
+            List of ingredient dictionaries
+        """
+        return self.parse_recipe_text(text)["ingredients"]
+    
+    def parse_ingredient_line(self, line):
+        """
+        Parse a single ingredient line
+        
+        Handles whole, decimal, mixed ("2 1/4"), plain ("3/4") and unicode
+        ("1½") quantities, one- or two-word units, and notes in parentheses
+        or after a comma.
+        
+        Args:
+            line: Ingredient text line
+            
+        Returns:
+            Dictionary with parsed ingredient or None
+        """
+        # Bullet and quantity in one precompiled match; the unit is a set
+        # lookup and the notes a partition rather than more regex work
+        match = INGREDIENT_RE.match(line.strip())
+        if match:
+            rest = match.group('rest')
+            notes = ''
+            if '(' in rest:
+                # "1 (14 oz) can tomatoes": the name goes on after the note
+                before, _, inside = rest.partition('(')
+                notes, _, after = inside.partition(')')
+                rest = f"{before.strip()} {after.strip()}".strip()
+            
+            unit = ''
+            first, _, remainder = rest.partition(' ')
+            candidate = first.lower().rstrip('.')
+            if remainder:
+                second, _, after = remainder.partition(' ')
+                pair = f"{candidate} {second.lower()}"
+                if after and pair in self.units:
+                    unit, rest = pair, after
+                elif candidate in self.units:
+                    unit, rest = candidate, remainder
+            
+            if ',' in rest:
+                rest, _, comment = rest.partition(',')
+                notes = f"{notes.strip()}, {comment.strip()}" if notes.strip() else comment
+            
+            return {
+                "name": rest.strip(),
+                "quantity": _parse_quantity(match.group('quantity')),
+                "unit": unit,
+                "notes": notes.strip()
+            }
+        
+        line = BULLET_RE.sub('', line).strip()
+        if not line:
+            return None
+        
+        # "Salt: to taste", "Eggs: 2", "Flour: 2 cups" style lines
+        colon = COLON_INGREDIENT_RE.match(line)
+        if colon:
+            name, amount_text = colon.group(1).strip(), colon.group(2).strip()
+            quantity = QUANTITY_RE.fullmatch(amount_text)
+            if quantity:
+                return {"name": name, "quantity": _parse_quantity(quantity.group('quantity')),
+                        "unit": "", "notes": ""}
+            amount = self.parse_ingredient_line(amount_text)
+            if amount and amount["name"] != amount_text:
+                if not amount["unit"] and amount["name"].lower().rstrip('.') in self.units:
+                    # Only a unit followed the quantity
+                    amount["unit"] = amount["name"].lower().rstrip('.')
+                return dict(amount, name=name)
+            if canonical_unit(amount_text):
+                # A unit or phrase with no number: "Salt: to taste", "Pepper: pinch"
+                return {"name": name, "quantity": 1, "unit": amount_text.lower(), "notes": ""}
+            # "Note: add more salt" - free text, not an amount
+            return {"name": name, "quantity": None, "unit": "", "notes": amount_text}
+        
+        # If no quantity found, treat as whole line is name
+        return {
+            "name": line,
+            "quantity": 1,
+            "unit": "",
+            "notes": ""
+        }
+    
+    def parse_instructions_from_text(self, text):
+        """
+        Parse instructions from OCR text
+        
+        Args:
+            text: OCR extracted text
+            
+        Returns:
+            List of instruction steps
+        """
+        return self.parse_recipe_text(text)["instructions"]
+    
+    def extract_recipe_name(self, text):
+        """
+        Extract recipe name from text (usually first line)
+        
+        Args:
+            text: OCR extracted text
+            
+        Returns:
+            Recipe name or None
+        """
+        return self.parse_recipe_text(text)["name"] or "Unnamed Recipe"
+    
+    @timed("ocr.structure")
+    def create_structured_recipe(self, image_path, ocr_text):
+        """
+        Create structured recipe data from OCR text
+        
+        Args:
+            image_path: Path to original image
+            ocr_text: Extracted OCR text
+            
+        Returns:
+            Structured recipe dictionary
+        """
+        # Extract basic info in one pass over the text
+        parsed = self.parse_recipe_text(ocr_text)
+        name = parsed["name"] or "Unnamed Recipe"
+        ingredients = parsed["ingredients"]
+        instructions = parsed["instructions"]
+        
+        # Use times printed on the page, else estimate (would need ML model in production)
+        prep_time = parsed["prep_time_minutes"]
+        if prep_time is None:
+            prep_time = 30 if len(ingredients) > 5 else 15
+        cook_time = parsed["cook_time_minutes"]
+        if cook_time is None:
+            cook_time = 45 if "oven" in ocr_text.lower() or "bake" in ocr_text.lower() else 20
+        total_time = parsed["total_time_minutes"] or prep_time + cook_time
+        
+        recipe = {
+            "id": new_id(),
+            "name": name,
+            "category": ["uncategorized"],
+            "prep_time_minutes": prep_time,
+            "cook_time_minutes": cook_time,
+            "total_time_minutes": total_time,
+            "servings": parsed["servings"] or 4,  # Default 4
+            "difficulty": "medium",
+            "source": "photo_ocr",
+            "source_details": f"OCR from {os.path.basename(image_path)}",
+            "ingredients": ingredients,
+            "instructions": instructions,
+            "notes": "Automatically extracted from photo. Please review and edit.",
+            "tags": ["photo-upload", "needs-review"],
+            "image_path": image_path,
+            "ocr_text": ocr_text,  # Keep original OCR for reference
+            "created_date": datetime.now().strftime('%Y-%m-%d'),
+            "last_updated": datetime.now().strftime('%Y-%m-%d'),
+            "rating": 3,
+            "dietary": {
+                "vegetarian": self.is_vegetarian(ingredients),
+                "vegan": False,  # Would need more analysis
+                "gluten_free": False,
+                "dairy_free": False
+            },
+            "status": "draft",
+            "needs_review": True
+        }
+        
+        self.flag_duplicates(recipe)
+        return recipe
+    
+    def flag_duplicates(self, recipe):
+        """
+        List stored recipes this draft looks like under possible_duplicates,
+        e.g. the same page photographed twice (needs find_duplicates)
+        """
+        recipe.pop("possible_duplicates", None)
+        if self.find_duplicates is None:
+            return
+        with span("ocr.duplicates"):
+            matches = self.find_duplicates(recipe)
+        if matches:
+            recipe["possible_duplicates"] = [recipe_id for recipe_id, _ in matches]
+    
+    def is_vegetarian(self, ingredients):
+        """
+        Basic check if recipe appears vegetarian
+        
+        Args:
+            ingredients: List of ingredient dictionaries
+            
+        Returns:
+            Boolean
+        """
+        meat_keywords = ['beef', 'chicken', 'pork', 'lamb', 'fish', 'seafood', 
+                        'bacon', 'sausage', 'meat', 'steak', 'mince']
+        
+        for ingredient in ingredients:
+            name = ingredient['name'].lower()
+            if any(keyword in name for keyword in meat_keywords):
+                return False
+        return True
+    
+    @timed("ocr.save")
+    def save_to_google_drive(self, recipe_data, drive_folder_id=None):
+        """
+        Save recipe to Google Drive
+        
+        Args:
+            recipe_data: Structured recipe dictionary
+            drive_folder_id: Google Drive folder ID
+            
+        Returns:
+            Dictionary with save results
+        """
+        # This would integrate with Google Drive API
+        # For now, return mock response
+        
+        print(f"Would save recipe to Google Drive: {recipe_data['name']}")
+        
+        # Create JSON file
+        filename = f"{recipe_data['id']}.json"
+        
+        # In real implementation:
+        # 1. Upload image to Google Drive
+        # 2. Create recipe JSON file
+        # 3. Update index file
+        
+        return {
+            "success": True,
+            "recipe_id": recipe_data['id'],
+            "filename": filename,
+            "message": "Recipe saved to Google Drive (mock)"
+        }
+    
+    @timed("ocr.process_photo")
+    def process_telegram_photo(self, photo_path, message_text=""):
+        """
+        Process recipe photo sent via Telegram
+        
+        Args:
+            photo_path: Path to downloaded photo
+            message_text: Optional caption/text from Telegram
+            
+        Returns:
+            Processing results
+        """
+        print(f"Processing Telegram photo: {photo_path}")
+        print(f"Message: {message_text}")
+        
+        # Steps 1-2: OCR and structured recipe (cached by image content)
+        ocr_text, recipe, _ = self.extract_and_parse(photo_path)
+        
+        # Step 3: If message contains recipe name, use it
+        if message_text and "recipe:" in message_text.lower():
+            name_match = re.search(r'recipe:\s*(.+)', message_text, re.IGNORECASE)
+            if name_match:
+                recipe['name'] = name_match.group(1).strip()
+        
+        # Step 4: Save to Google Drive
+        save_result = self.save_to_google_drive(recipe)
+        
+        return {
+            "recipe": recipe,
+            "save_result": save_result,
+            "needs_review": recipe['needs_review'],
+            "summary": f"Extracted '{recipe['name']}' with {len(recipe['ingredients'])} ingredients"
+        }
+    
+    def extract_and_parse(self, image_path, bypass_cache=False, timings=None):
+        """
+        OCR and parse an image, reusing a cached result for the same content
+        
+        Args:
+            image_path: Path to recipe image
+            bypass_cache: Skip the lookup (the fresh result is still stored)
+            timings: Optional dict that receives ocr_seconds / parse_seconds
+            
+        Returns:
+            (ocr_text, recipe, cached)
+        """
+        image_hash = None
+        hit = None
+        with span("ocr.cache_lookup"):
+            if self.cache is not None:
+                try:
+                    image_hash = file_hash(image_path)
+                except OSError:
+                    pass
+            if image_hash is not None and not bypass_cache:
+                hit = self.cache.get(image_hash, PARSER_VERSION)
+        
+        if image_hash is not None and not bypass_cache:
+            count("ocr_cache_hits" if hit is not None else "ocr_cache_misses")
+            if hit is not None:
+                ocr_text, recipe = hit
+                # Same content, new ingestion: fresh id, dates and location
+                today = datetime.now().strftime('%Y-%m-%d')
+                recipe.update({
+                    "id": new_id(),
+                    "image_path": image_path,
+                    "source_details": f"OCR from {os.path.basename(image_path)}",
+                    "created_date": today,
+                    "last_updated": today
+                })
+                # The catalog may have changed since the parse was cached
+                self.flag_duplicates(recipe)
+                return ocr_text, recipe, True
+        
+        start = time.perf_counter()
+        ocr_text = self.extract_text(image_path)
+        ocr_done = time.perf_counter()
+        recipe = self.create_structured_recipe(image_path, ocr_text)
+        record_span("ocr.extract_text", ocr_done - start)
+        if timings is not None:
+            timings["ocr_seconds"] = ocr_done - start
+            timings["parse_seconds"] = time.perf_counter() - ocr_done
+        if image_hash is not None:
+            self.cache.put(image_hash, PARSER_VERSION, ocr_text, recipe)
+        return ocr_text, recipe, False
+    
+    def extract_text(self, image_path):
+        """
+        Run OCR on an image
+        
+        In production: Use Tesseract or cloud OCR service
+        """
+        return self.mock_ocr_extraction(image_path)
+    
+    def mock_ocr_extraction(self, image_path):
+        """
+        Mock OCR extraction for demonstration
+        
+        In production, replace with actual OCR
+        """
+        # This is example OCR output
+        return """Easy Chocolate Chip Cookies
+
+Ingredients:
+2 1/4 cups all-purpose flour
+1 teaspoon baking soda
+1 teaspoon salt
+1 cup butter, softened
+3/4 cup granulated sugar
+3/4 cup packed brown sugar
+1 teaspoon vanilla extract
+2 large eggs
+2 cups semisweet chocolate chips
+1 cup chopped nuts (optional)
+
+Instructions:
+1. Preheat oven to 375°F (190°C).
+2. In small bowl, mix flour, baking soda and salt; set aside.
+3. In large bowl, beat butter, granulated sugar, brown sugar and vanilla until creamy.
+4. Add eggs, one at a time, beating well after each addition.
+5. Gradually beat in flour mixture.
+6. Stir in chocolate chips and nuts.
+7. Drop by rounded tablespoon onto ungreased baking sheets.
+8. Bake 9 to 11 minutes or until golden brown.
+9. Cool on baking sheets for 2 minutes; remove to wire racks to cool completely.
+
+Makes about 5 dozen cookies."""
+
+def main():
+    """Test the OCR processor"""
+    processor = RecipeOCRProcessor()
+    
+    print("=== Recipe OCR Processor ===")
+    print("This system will:")
+    print("1. Process recipe photos you send via Telegram")
+    print("2. Extract text using OCR")
+    print("3. Parse ingredients and instructions")
+    print("4. Create structured recipe data")
+    print("5. Save to Google Drive")
+    print("\nReady to process your recipe photos!")
+    
+    # Example usage
+    test_image = "path/to/recipe/photo.jpg"
+    
+    print(f"\nTo use:")
+    print(f"1. Send a recipe photo via Telegram")
+    print(f"2. Add caption like 'Recipe: Chocolate Chip Cookies'")
+    print(f"3. I'll process it and add to your database")
+    
+    return processor
+
+if __name__ == "__main__":
+    processor = main()
\ No newline at end of file
@@ -1,224 +1,662 @@
 #!/usr/bin/env python3
 """
 Simple CLI for Recipe Manager
+
+Commands are looked up in COMMANDS and import and build only what they use:
+help loads nothing past this file, view and export open the recipe store
+without the manager's indexes and statistics, everything else gets a
+RecipeManager. bench_startup.py holds the startup time budgets.
 """
 
-import json
-import sys
 import os
 import sys
-import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Try to import RecipeManager
-try:
-    from recipe_manager import RecipeManager
-except ImportError:
-    # Fallback: define minimal RecipeManager
-    import json
-    import uuid
-    from datetime import datetime
-    from pathlib import Path
-    
-    class RecipeManager:
-        def __init__(self, base_path):
-            self.base_path = Path(base_path)
-            self.data_path = self.base_path / "data"
-            self.data_path.mkdir(exist_ok=True)
-            self.recipes = {}
-            
-        def save_recipe(self, recipe_data):
-            if 'id' not in recipe_data:
-                recipe_data['id'] = str(uuid.uuid4())[:8]
-            
-            filename = f"{recipe_data['id']}.json"
-            filepath = self.data_path / filename
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(recipe_data, f, indent=2, ensure_ascii=False)
-            
-            self.recipes[recipe_data['id']] = recipe_data
-            return recipe_data['id']
-
-def print_help():
+RECIPES_DIR = os.environ.get("RECIPES_DIR", "C:/Users/Home/.openclaw/workspace/recipes")
+
+# Answered without a manager, so never forwarded to a server
+LOCAL_COMMANDS = {"help", "serve"}
+
+# Matches `cli search` prints unless --limit says otherwise
+SEARCH_LIMIT = 20
+
+class CommandContext:
+    """What a command may use, each part built on first access"""
+
+    def __init__(self, base_path, manager=None):
+        """
+        Args:
+            base_path: Recipe base directory
+            manager: Already loaded RecipeManager (the CLI server passes its own)
+        """
+        self.base_path = base_path
+        self._manager = manager
+        self._storage = None
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            from recipe_manager import RecipeManager
+            # Reuse a store already opened for this command rather than
+            # opening it (and replaying its journal) a second time
+            self._manager = RecipeManager(self.base_path, self._storage or "json")
+        return self._manager
+
+    @property
+    def storage(self):
+        """Recipe store alone, for commands that only read and write records"""
+        if self._manager is not None:
+            return self._manager.storage
+        if self._storage is None:
+            from recipe_storage import open_storage
+            self._storage = open_storage(self.base_path)
+        return self._storage
+
+    def load_errors(self):
+        """Recipe files a catalog rescan during this command could not read"""
+        storage = self._manager.storage if self._manager is not None else self._storage
+        report = storage.load_report if storage is not None else None
+        return report.errors if report is not None else []
+
+    def close(self):
+        # A manager handed in belongs to the caller
+        if self._storage is not None:
+            self._storage.close()
+
+def print_help(context=None, args=None):
     print("""
 Family Recipe Manager CLI
 
 Commands:
   help                    Show this help
-  list                    List all recipes
-  stats                   Show database statistics
+  list [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+                          List all recipes, or those added in a date range
+  stats                   Show database statistics (counts, averages,
+                          ratings, difficulty, time percentiles, tags)
   categories              List all categories
-  plan [days]             Generate meal plan (default: 7 days)
-  grocery <plan_id>       Generate grocery list for meal plan
-  add <json_file>         Add recipe from JSON file
+  plan [days] [--optimize] [--meals breakfast,lunch,dinner]
+                          Generate meal plan (default: 7 days of dinners,
+                          up to 92); --optimize picks recipes that share
+                          ingredients. Households in households.json get
+                          their own meals, diets and servings
+  plan swap <plan_id> <date> <recipe_id> [--meal TYPE] [--household NAME]
+  plan add <plan_id> <date> <recipe_id> [--meal TYPE] [--household NAME]
+  plan remove <plan_id> <date> [--meal TYPE] [--household NAME]
+                          Edit a plan; its grocery list is updated in place
+  grocery <plan_id>       Generate grocery list for meal plan (leaves out
+                          what the pantry already holds)
+  pantry                  Show the pantry inventory
+  pantry add <qty> [unit] <name> [--expires YYYY-MM-DD]
+  pantry use <qty> [unit] <name>
+  pantry remove <name>    Update the pantry inventory
+  cook [count]            Recipes you can make from what is in the pantry
+  add <path> [--offset N] Add recipes from a JSON file, a directory of JSON
+                          files or an NDJSON stream (.ndjson/.jsonl, .gz,
+                          .zst, or - for stdin)
   view <recipe_id>        View recipe details
-  search <term>           Search recipes by name/tag
-  export                  Export all recipes to single JSON
+  delete <recipe_id>      Delete a recipe
+  search <terms> [--limit N]
+                          Search recipes (name, tags, ingredients, steps;
+                          terms are ANDed, use OR for alternatives); shows
+                          the best 20 matches (--limit 0 for all)
+  dedupe [--threshold X] [--merge]
+                          List near-duplicate recipes (similar title and
+                          ingredients, default similarity 0.7); --merge
+                          folds each group into one recipe
+  migrate-ids             Give recipes with old 8-digit ids time-sortable
+                          ones (old ids keep working)
+  export [file] [--offset N]
+                          Stream all recipes to NDJSON (default
+                          export-all.ndjson.gz; .json for one JSON document)
+  serve [--watch SECONDS] Keep the catalog loaded and answer commands over
+                          a local socket; other cli.py calls forward to it
+                          automatically (--local runs a command in-process)
+
+Any command takes --profile: timings, file counters, cProfile and
+tracemalloc captures are written to recipe-metrics.json / recipe-profile.*
+(or set RECIPE_METRICS=file.json|file.prom and RECIPE_PROFILE=cpu|memory|all)
   """)
 
-def main():
-    manager = RecipeManager("C:/Users/Home/.openclaw/workspace/recipes")
-    
-    if len(sys.argv) < 2:
-        print_help()
-        return
-    
-    command = sys.argv[1].lower()
-    
-    if command == "help":
-        print_help()
-    
-    elif command == "list":
-        recipes = manager.list_recipes()
-        print(f"\nFound {len(recipes)} recipes:")
-        for i, recipe in enumerate(recipes, 1):
-            print(f"{i}. {recipe['name']} ({recipe.get('prep_time_minutes', '?')} min)")
-            if 'category' in recipe:
-                print(f"   Categories: {', '.join(recipe['category'])}")
-            print()
-    
-    elif command == "stats":
-        stats = manager.get_stats()
-        print("\n=== Recipe Database Statistics ===")
-        print(f"Total recipes: {stats['total_recipes']}")
-        print(f"Categories: {', '.join(stats['categories'])}")
-        print(f"Average prep time: {stats['avg_prep_time']:.1f} minutes")
-        print(f"Meal plans: {stats['meal_plans_count']}")
-        print(f"Grocery lists: {stats['grocery_lists_count']}")
-    
-    elif command == "categories":
-        categories = manager.get_categories()
-        print("\nRecipe Categories:")
-        for cat in categories:
-            count = len(manager.list_recipes(cat))
-            print(f"  {cat}: {count} recipes")
-    
-    elif command == "plan":
-        days = 7
-        if len(sys.argv) > 2:
+def list_command(context, args):
+    from datetime import date
+    args = list(args)
+    dates = {}
+    for flag in ("--since", "--until"):
+        if flag in args:
             try:
-                days = int(sys.argv[2])
-            except:
-                print("Error: days must be a number")
+                dates[flag] = date.fromisoformat(args[args.index(flag) + 1])
+            except (IndexError, ValueError):
+                print(f"Error: {flag} takes a date (YYYY-MM-DD)")
                 return
-        
-        print(f"\nGenerating {days}-day meal plan...")
-        meal_plan = manager.generate_meal_plan(days=days)
-        
-        print(f"\nMeal Plan ID: {meal_plan['id']}")
-        print(f"Dates: {meal_plan['start_date']} to {meal_plan['end_date']}")
-        print("\nMeals:")
-        for meal in meal_plan['meals']:
-            print(f"  {meal['date']} ({meal['day']}): {meal['recipe_name']}")
-    
-    elif command == "grocery":
-        if len(sys.argv) < 3:
-            print("Error: Please provide meal plan ID")
-            print("Usage: cli grocery <plan_id>")
+    if dates:
+        # A range scan over the time-sortable ids
+        recipes = context.manager.recipes_added(dates.get("--since", 0), dates.get("--until"))
+    else:
+        recipes = context.manager.list_recipes()
+    print(f"\nFound {len(recipes)} recipes:")
+    for i, recipe in enumerate(recipes, 1):
+        print(f"{i}. {recipe['name']} ({recipe.get('prep_time_minutes', '?')} min)")
+        if 'category' in recipe:
+            print(f"   Categories: {', '.join(recipe['category'])}")
+        print()
+
+def stats_command(context, args):
+    stats = context.manager.get_stats()
+    print("\n=== Recipe Database Statistics ===")
+    print(f"Total recipes: {stats['total_recipes']}")
+    print(f"Categories: {', '.join(stats['categories'])}")
+    print(f"Average prep time: {stats['avg_prep_time']:.1f} minutes")
+    print(f"Meal plans: {stats['meal_plans_count']}")
+    print(f"Grocery lists: {stats['grocery_lists_count']}")
+
+    averages = stats['averages']
+    print(f"Average cook time: {averages['cook_time_minutes']:.1f} minutes")
+    print(f"Average total time: {averages['total_time_minutes']:.1f} minutes")
+    print(f"Average servings: {averages['servings']:.1f}")
+    if stats['total_time_percentiles']:
+        print("Total time percentiles: " + ", ".join(
+            f"p{p} {minutes} min" for p, minutes in stats['total_time_percentiles'].items()))
+    if stats['rating_distribution']:
+        print(f"\nRatings (average {stats['avg_rating']:.1f}):")
+        for rating, count in stats['rating_distribution'].items():
+            print(f"  {rating}: {count}")
+    if stats['difficulty_distribution']:
+        print("\nDifficulty:")
+        for level, count in stats['difficulty_distribution'].items():
+            print(f"  {level}: {count}")
+    if stats['dietary_counts']:
+        print("\nDietary:")
+        for flag, count in stats['dietary_counts'].items():
+            print(f"  {flag}: {count}")
+    if stats['tag_counts']:
+        print("\nTop tags:")
+        for tag, count in list(stats['tag_counts'].items())[:10]:
+            print(f"  {tag}: {count}")
+
+def categories_command(context, args):
+    # Straight from the running category histogram
+    counts = context.manager.get_category_counts()
+    print("\nRecipe Categories:")
+    for cat, count in counts.items():
+        print(f"  {cat}: {count} recipes")
+
+def plan_command(context, args):
+    args = list(args)
+    if args and args[0] in ("swap", "add", "remove"):
+        plan_edit_command(context, args)
+        return
+    optimize = "--optimize" in args
+    if optimize:
+        args.remove("--optimize")
+    meals = None
+    if "--meals" in args:
+        index = args.index("--meals")
+        meals = [m for m in (args[index + 1] if index + 1 < len(args) else "").split(",") if m]
+        del args[index:index + 2]
+        if not meals:
+            print("Error: --meals takes meal types, e.g. breakfast,lunch,dinner")
             return
-        
-        plan_id = sys.argv[2]
-        print(f"\nGenerating grocery list for meal plan {plan_id}...")
-        grocery_list = manager.generate_grocery_list(plan_id)
-        
-        if not grocery_list:
-            print("Error: Meal plan not found")
+    days = 7
+    if args:
+        try:
+            days = int(args[0])
+        except ValueError:
+            print("Error: days must be a number")
             return
-        
-        print(f"\nGrocery List ID: {grocery_list['id']}")
-        print(f"Total items: {grocery_list['total_items']}")
-        print("\nItems:")
-        for item in grocery_list['items']:
+
+    print(f"\nGenerating {days}-day meal plan...")
+    try:
+        meal_plan = context.manager.generate_meal_plan(days=days, optimize=optimize, meals=meals)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    print(f"\nMeal Plan ID: {meal_plan['id']}")
+    print(f"Dates: {meal_plan['start_date']} to {meal_plan['end_date']}")
+    print("\nMeals:")
+    several = bool(meal_plan.get('meals_per_day') or meal_plan.get('households'))
+    for meal in meal_plan['meals']:
+        print(f"  {meal['date']} ({meal['day']}): {_meal_line(meal, several)}")
+    if 'optimization' in meal_plan:
+        before = meal_plan['optimization']['before']
+        after = meal_plan['optimization']['after']
+        print(f"\nItems to buy: {before['distinct_items']} -> {after['distinct_items']}, "
+              f"single-use perishables: {before['single_use_perishables']} -> "
+              f"{after['single_use_perishables']} "
+              f"({meal_plan['optimization']['plans_evaluated']} plans compared)")
+
+def _meal_line(meal, with_meal_type=True):
+    """'[household] meal: recipe (details)' for plan listings"""
+    line = meal['recipe_name']
+    if with_meal_type:
+        line = f"{meal.get('meal_type', 'dinner')}: {line}"
+    if meal.get('household'):
+        line = f"[{meal['household']}] {line}"
+    if meal.get('leftovers'):
+        line += " (leftovers)"
+    elif meal.get('servings'):
+        line += f" ({meal['servings']} servings)"
+    return line
+
+def plan_edit_command(context, args):
+    action = args[0]
+    options = {}
+    for flag in ("--meal", "--household"):
+        if flag in args:
+            index = args.index(flag)
+            options[flag] = args[index + 1] if index + 1 < len(args) else ""
+            del args[index:index + 2]
+    meal_type = options.get("--meal")
+    household = options.get("--household")
+    needed = 3 if action == "remove" else 4
+    if len(args) != needed:
+        print(f"Usage: cli plan {action} <plan_id> <date>" + ("" if action == "remove" else " <recipe_id>")
+              + " [--meal TYPE] [--household NAME]")
+        return
+
+    manager = context.manager
+    plan_id, date = args[1], args[2]
+    try:
+        if action == "swap":
+            meal_plan = manager.swap_meal(plan_id, date, args[3], meal_type, household)
+        elif action == "add":
+            meal_plan = manager.add_meal(plan_id, date, args[3], meal_type or "dinner", household)
+        else:
+            meal_plan = manager.remove_meal(plan_id, date, meal_type, household)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if meal_plan is None:
+        print("Error: Meal plan not found")
+        return
+
+    print(f"\nMeals on {date}:")
+    for meal in meal_plan['meals']:
+        if meal['date'] == date:
+            print(f"  {_meal_line(meal)}")
+    if meal_plan.get('grocery_list_id'):
+        grocery_list = manager.storage.load_grocery_list(meal_plan['grocery_list_id'])
+        print(f"Grocery list {grocery_list['id']} updated: {grocery_list['total_items']} items")
+
+def grocery_command(context, args):
+    if not args:
+        print("Error: Please provide meal plan ID")
+        print("Usage: cli grocery <plan_id>")
+        return
+
+    plan_id = args[0]
+    print(f"\nGenerating grocery list for meal plan {plan_id}...")
+    grocery_list = context.manager.generate_grocery_list(plan_id)
+
+    if not grocery_list:
+        print("Error: Meal plan not found")
+        return
+
+    print(f"\nGrocery List ID: {grocery_list['id']}")
+    print(f"Total items: {grocery_list['total_items']}")
+    print("\nItems:")
+    for item in grocery_list['items']:
+        print(f"  {item['quantity']} {item.get('unit', '')} {item['name']}")
+    if grocery_list.get('from_pantry'):
+        print("\nAlready in the pantry:")
+        for item in grocery_list['from_pantry']:
             print(f"  {item['quantity']} {item.get('unit', '')} {item['name']}")
-    
-    elif command == "add":
-        if len(sys.argv) < 3:
-            print("Error: Please provide JSON file path")
-            print("Usage: cli add <json_file>")
-            return
-        
-        json_file = sys.argv[2]
-        if not os.path.exists(json_file):
-            print(f"Error: File not found: {json_file}")
-            return
-        
+    if grocery_list.get('check_pantry'):
+        print("\nIn the pantry in another unit - check there is enough:")
+        for item in grocery_list['check_pantry']:
+            have = ", ".join(item['in_pantry'])
+            print(f"  {item['quantity']} {item.get('unit', '')} {item['name']} (have {have})")
+
+def _parse_amount(args):
+    """<quantity> [unit] <name...> -> (quantity, unit, name)"""
+    from units import canonical_unit
+    quantity = float(args[0])
+    unit = ""
+    rest = args[1:]
+    if len(rest) > 1 and canonical_unit(rest[0]) is not None:
+        unit = rest[0]
+        rest = rest[1:]
+    return quantity, unit, " ".join(rest)
+
+def pantry_command(context, args):
+    args = list(args)
+    pantry = context.manager.pantry
+    action = args[0] if args else "list"
+
+    if action == "list":
+        items = pantry.items()
+        print(f"\nPantry ({len(items)} items):")
+        for item in items:
+            expiry = ""
+            if item.get('expired'):
+                expiry = f" (expired {item['expires']})"
+            elif item['expires']:
+                expiry = f" (use by {item['expires']})"
+            print(f"  {item['quantity']} {item['unit']} {item['name']}{expiry}")
+        return
+
+    if action == "remove":
+        name = " ".join(args[1:])
+        if pantry.remove(name):
+            pantry.save()
+            print(f"Removed {name} from the pantry")
+        else:
+            print(f"Error: {name} is not in the pantry")
+        return
+
+    if action not in ("add", "use"):
+        print(f"Error: unknown pantry action: {action}")
+        print("Usage: cli pantry [add|use|remove] ...")
+        return
+
+    expires = None
+    if "--expires" in args:
+        index = args.index("--expires")
+        expires = args[index + 1] if index + 1 < len(args) else ""
+        del args[index:index + 2]
+    try:
+        quantity, unit, name = _parse_amount(args[1:])
+    except (IndexError, ValueError):
+        print(f"Error: Usage: cli pantry {action} <quantity> [unit] <name>")
+        return
+
+    amount = " ".join(part for part in (f"{quantity:g}", unit, name) if part)
+    if action == "add":
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                recipe_data = json.load(f)
-            
-            recipe_id = manager.save_recipe(recipe_data)
-            print(f"Recipe added successfully! ID: {recipe_id}")
-            print(f"Name: {recipe_data['name']}")
-        
-        except Exception as e:
-            print(f"Error adding recipe: {e}")
-    
-    elif command == "view":
-        if len(sys.argv) < 3:
-            print("Error: Please provide recipe ID")
-            print("Usage: cli view <recipe_id>")
+            pantry.add(name, quantity, unit, expires)
+        except ValueError as e:
+            print(f"Error: {e}")
             return
-        
-        recipe_id = sys.argv[2]
-        recipe = manager.recipes.get(recipe_id)
-        
-        if not recipe:
-            print(f"Error: Recipe not found: {recipe_id}")
+        print(f"Added {amount} to the pantry")
+    else:
+        missing = pantry.use(name, quantity, unit)
+        print(f"Used {amount}" + (" (not all of it was there)" if missing else ""))
+    pantry.save()
+
+def cook_command(context, args):
+    limit = 10
+    if args:
+        try:
+            limit = int(args[0])
+        except ValueError:
+            print("Error: count must be a number")
             return
-        
-        print(f"\n=== {recipe['name']} ===")
-        print(f"ID: {recipe['id']}")
-        print(f"Categories: {', '.join(recipe.get('category', []))}")
-        print(f"Prep time: {recipe.get('prep_time_minutes', '?')} minutes")
-        print(f"Servings: {recipe.get('servings', '?')}")
-        print(f"Difficulty: {recipe.get('difficulty', 'unknown')}")
-        
-        if 'ingredients' in recipe and recipe['ingredients']:
-            print("\nIngredients:")
-            for ing in recipe['ingredients']:
+
+    results = context.manager.cook_from_pantry(limit=limit)
+    if not results:
+        print("Nothing in the pantry matches a recipe yet (add items with: cli pantry add)")
+        return
+    print("\nRecipes from what you have:")
+    for result in results:
+        print(f"  {result['name']} (ID: {result['id']}) - {result['coverage']:.0%} on hand")
+        if result['missing']:
+            print(f"    missing: {', '.join(result['missing'])}")
+
+def add_command(context, args):
+    if not args:
+        print("Error: Please provide JSON file path")
+        print("Usage: cli add <json_file|directory|ndjson> [--offset N]")
+        return
+
+    from recipe_stream import import_recipes, is_stream_path
+    json_file = args[0]
+    if json_file != "-" and not os.path.exists(json_file):
+        print(f"Error: File not found: {json_file}")
+        return
+
+    if json_file == "-" or os.path.isdir(json_file) or is_stream_path(json_file):
+        offset = 0
+        if "--offset" in args[1:2]:
+            try:
+                offset = int(args[2])
+            except (IndexError, ValueError):
+                print("Error: offset must be a number")
+                return
+        report = import_recipes(context.manager, json_file, offset=offset)
+        print(f"Added {report['added']} recipes")
+        if report['errors']:
+            print(f"Skipped {report['failed']} invalid records:")
+            for error in report['errors'][:10]:
+                print(f"  {error}")
+        print(f"Resume offset: {report['next_offset']}")
+        return
+
+    import json
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            recipe_data = json.load(f)
+
+        recipe_id = context.manager.save_recipe(recipe_data)
+        print(f"Recipe added successfully! ID: {recipe_id}")
+        print(f"Name: {recipe_data['name']}")
+        if recipe_data.get('possible_duplicates'):
+            print(f"Possible duplicate of: {', '.join(recipe_data['possible_duplicates'])}"
+                  " (see cli.py dedupe)")
+
+    except Exception as e:
+        print(f"Error adding recipe: {e}")
+
+def view_command(context, args):
+    if not args:
+        print("Error: Please provide recipe ID")
+        print("Usage: cli view <recipe_id>")
+        return
+
+    # One record read; no indexes or statistics needed
+    recipe_id = context.storage.resolve_id(args[0])
+    recipe = context.storage.recipes.get(recipe_id)
+
+    if not recipe:
+        print(f"Error: Recipe not found: {recipe_id}")
+        return
+
+    print(f"\n=== {recipe['name']} ===")
+    print(f"ID: {recipe['id']}")
+    print(f"Categories: {', '.join(recipe.get('category', []))}")
+    print(f"Prep time: {recipe.get('prep_time_minutes', '?')} minutes")
+    print(f"Servings: {recipe.get('servings', '?')}")
+    print(f"Difficulty: {recipe.get('difficulty', 'unknown')}")
+
+    if 'ingredients' in recipe and recipe['ingredients']:
+        print("\nIngredients:")
+        for ing in recipe['ingredients']:
+            if ing.get('quantity') is None:
+                # Scanned "Label: text" lines with no amount
+                print(f"  {ing['name']}: {ing.get('notes', '')}")
+            else:
                 print(f"  {ing['quantity']} {ing.get('unit', '')} {ing['name']}")
-        
-        if 'instructions' in recipe and recipe['instructions']:
-            print("\nInstructions:")
-            for i, step in enumerate(recipe['instructions'], 1):
-                print(f"  {i}. {step}")
-    
-    elif command == "search":
-        if len(sys.argv) < 3:
-            print("Error: Please provide search term")
-            print("Usage: cli search <term>")
+
+    if 'instructions' in recipe and recipe['instructions']:
+        print("\nInstructions:")
+        for i, step in enumerate(recipe['instructions'], 1):
+            print(f"  {i}. {step}")
+
+def delete_command(context, args):
+    if not args:
+        print("Error: Please provide recipe ID")
+        print("Usage: cli delete <recipe_id>")
+        return
+
+    manager = context.manager
+    recipe_id = manager.storage.resolve_id(args[0])
+    if manager.delete_recipe(recipe_id):
+        print(f"Deleted recipe {recipe_id}")
+    else:
+        print(f"Error: Recipe not found: {recipe_id}")
+
+def search_command(context, args):
+    args = list(args)
+    limit = SEARCH_LIMIT
+    if "--limit" in args:
+        index = args.index("--limit")
+        try:
+            limit = int(args[index + 1])
+        except (IndexError, ValueError):
+            print("Error: --limit takes a number of results")
             return
-        
-        term = sys.argv[2].lower()
-        results = []
-        
-        for recipe in manager.recipes.values():
-            if (term in recipe['name'].lower() or 
-                any(term in tag.lower() for tag in recipe.get('tags', [])) or
-                any(term in cat.lower() for cat in recipe.get('category', []))):
-                results.append(recipe)
-        
+        del args[index:index + 2]
+    if not args:
+        print("Error: Please provide search term")
+        print("Usage: cli search <term> [--limit N]")
+        return
+
+    term = " ".join(args)
+    results = context.manager.search_recipes(term, limit=limit)
+
+    if len(results) == limit:
+        print(f"\nBest {limit} recipes matching '{term}' (--limit N for more):")
+    else:
         print(f"\nFound {len(results)} recipes matching '{term}':")
-        for recipe in results:
-            print(f"  {recipe['name']} (ID: {recipe['id']})")
-    
-    elif command == "export":
-        export_data = {
-            "export_date": datetime.now().strftime('%Y-%m-%d'),
-            "total_recipes": len(manager.recipes),
-            "recipes": list(manager.recipes.values())
-        }
-        
-        export_file = "C:/Users/Home/.openclaw/workspace/recipes/export-all.json"
-        with open(export_file, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"Exported {len(manager.recipes)} recipes to {export_file}")
-    
+    for recipe in results:
+        print(f"  {recipe['name']} (ID: {recipe['id']})")
+
+def export_command(context, args):
+    from recipe_stream import export_json, export_ndjson
+    args = list(args)
+    offset = 0
+    if "--offset" in args:
+        index = args.index("--offset")
+        try:
+            offset = int(args[index + 1])
+        except (IndexError, ValueError):
+            print("Error: offset must be a number")
+            return
+        del args[index:index + 2]
+
+    export_file = args[0] if args else os.path.join(context.base_path, "export-all.ndjson.gz")
+    storage = context.storage
+
+    # Recipes are written one at a time, never all held in memory
+    if export_file.endswith(".json"):
+        exported = export_json(storage, export_file, total=len(storage.recipes))
+        print(f"Exported {exported} recipes to {export_file}")
     else:
+        result = export_ndjson(storage, export_file, offset=offset)
+        print(f"Exported {result['exported']} recipes to {export_file}")
+        print(f"Resume offset: {result['next_offset']}")
+
+def dedupe_command(context, args):
+    args = list(args)
+    merge = "--merge" in args
+    threshold = None
+    if "--threshold" in args:
+        try:
+            threshold = float(args[args.index("--threshold") + 1])
+        except (IndexError, ValueError):
+            print("Error: --threshold takes a similarity between 0 and 1")
+            return
+
+    manager = context.manager
+    groups = manager.find_duplicate_groups(threshold)
+    if not groups:
+        print("No near-duplicate recipes found")
+        return
+
+    summaries = manager.summaries
+    print(f"\nFound {len(groups)} groups of near-duplicates:")
+    for group in groups:
+        print(f"\n  similarity {group['similarity']:.2f}")
+        for recipe_id in group["ids"]:
+            summary = summaries.get(recipe_id)
+            print(f"    {recipe_id}  {summary['name'] if summary else '?'}")
+
+    if merge:
+        print()
+        for keep_id, merged_ids in manager.merge_duplicate_groups(groups):
+            print(f"Merged {', '.join(merged_ids)} into {keep_id}")
+
+def migrate_ids_command(context, args):
+    renamed = context.manager.migrate_ids()
+    if not renamed:
+        print("All recipe ids are already time-sortable")
+        return
+    print(f"Gave {len(renamed)} recipes new ids; old ids are kept in id-aliases.json")
+
+# command -> handler(context, args); args are the words after the command
+COMMANDS = {
+    "help": print_help,
+    "list": list_command,
+    "stats": stats_command,
+    "categories": categories_command,
+    "plan": plan_command,
+    "grocery": grocery_command,
+    "pantry": pantry_command,
+    "cook": cook_command,
+    "add": add_command,
+    "view": view_command,
+    "delete": delete_command,
+    "search": search_command,
+    "dedupe": dedupe_command,
+    "migrate-ids": migrate_ids_command,
+    "export": export_command,
+}
+
+def serve_command(args):
+    watch = 2.0
+    if "--watch" in args:
+        try:
+            watch = float(args[args.index("--watch") + 1])
+        except (IndexError, ValueError):
+            print("Error: --watch takes a number of seconds")
+            return
+    from cli_server import serve
+    from recipe_manager import RecipeManager
+    serve(RECIPES_DIR, lambda: RecipeManager(RECIPES_DIR), run_command, watch)
+
+def main():
+    argv = list(sys.argv)
+    profiling = False
+    if "--profile" in argv:
+        from instrumentation import take_profile_flag
+        profiling = take_profile_flag(argv)
+    local = "--local" in argv
+    if local:
+        argv.remove("--local")
+    command = argv[1].lower() if len(argv) > 1 else "help"
+
+    if command == "serve":
+        serve_command(argv[2:])
+        return
+
+    # A running server already has everything loaded; stdin can't be forwarded
+    if command not in LOCAL_COMMANDS and not local and not profiling and "-" not in argv[2:3]:
+        from cli_client import forward
+        response = forward(RECIPES_DIR, argv)
+        if response is not None:
+            sys.stdout.write(response["output"])
+            if response["status"]:
+                sys.exit(response["status"])
+            return
+
+    run_command(None, argv)
+
+def run_command(manager, argv):
+    """
+    Run one CLI command
+
+    Args:
+        manager: Loaded RecipeManager to use, or None to build what the
+            command needs
+        argv: Full argument list (argv[0] is the program name)
+    """
+    command = argv[1].lower() if len(argv) > 1 else "help"
+    handler = COMMANDS.get(command)
+    if handler is None:
         print(f"Unknown command: {command}")
         print_help()
+        return
+
+    context = CommandContext(RECIPES_DIR, manager)
+    try:
+        handler(context, argv[2:])
+        # A server reports these once, when it loads
+        errors = context.load_errors() if manager is None else []
+        if errors:
+            print(f"Skipped {len(errors)} unreadable recipe file(s):", file=sys.stderr)
+            for error in errors[:5]:
+                print(f"  {error['path']}: {error['error']}", file=sys.stderr)
+    finally:
+        context.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
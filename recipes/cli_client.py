@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+CLI Client
+The half of the CLI server protocol cli.py needs to forward a command:
+find the socket, send the argument list, read back the output. Kept apart
+from cli_server.py so forwarding doesn't import socketserver.
+"""
+
+import json
+import os
+import socket
+
+SOCKET_NAME = ".cli.sock"
+
+# Commands whose arguments are local file paths, made absolute before
+# forwarding since the server has its own working directory
+PATH_ARGUMENT_COMMANDS = {"add", "export"}
+
+
+def supports_unix_socket():
+    return hasattr(socket, 'AF_UNIX')
+
+
+def socket_path(base_path):
+    return os.path.join(base_path, SOCKET_NAME)
+
+
+def _absolute_paths(argv):
+    """Copy of argv with file arguments of add/export made absolute"""
+    argv = list(argv)
+    if len(argv) > 2 and argv[1] in PATH_ARGUMENT_COMMANDS:
+        for i in range(2, len(argv)):
+            if argv[i - 1] == "--offset" or argv[i].startswith("--") or argv[i] == "-":
+                continue
+            argv[i] = os.path.abspath(argv[i])
+    return argv
+
+
+def forward(base_path, argv):
+    """
+    Run a CLI command in a running server
+
+    Args:
+        base_path: Recipe base directory the server was started for
+        argv: Full argument list (argv[0] is the program name)
+
+    Returns:
+        {"output": str, "status": int}, or None if no server is listening
+    """
+    path = socket_path(base_path)
+    if not supports_unix_socket() or not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+            request = {"argv": _absolute_paths(argv)}
+            client.sendall((json.dumps(request) + "\n").encode('utf-8'))
+            with client.makefile('r', encoding='utf-8') as f:
+                line = f.readline()
+        return json.loads(line) if line else None
+    except (OSError, ValueError):
+        # Stale socket left by a server that was killed
+        return None
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+CLI Server
+Resident process behind cli.py: keeps one RecipeManager - catalog, search
+index, secondary indexes, statistics - loaded and answers CLI commands
+over a local Unix socket, so each `cli.py <command>` only pays for
+connecting instead of starting up and reloading the catalog.
+
+cli.py forwards to the server automatically when its socket exists
+(<recipes>/.cli.sock) and runs the command itself otherwise. The server
+watches the storage (storage.watch_fingerprint(): per-file mtime and size
+of recipes, meal plans and grocery lists with the JSON backend) and
+reloads when any of them change on disk behind its back, edits in place
+included.
+
+Usage: cli.py serve [--watch SECONDS]
+"""
+
+import io
+import json
+import signal
+import socketserver
+import time
+import traceback
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from cli_client import forward, socket_path, supports_unix_socket
+
+WATCH_INTERVAL = 2.0
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            argv = request["argv"]
+        except (ValueError, KeyError, TypeError):
+            response = {"output": "Error: malformed request\n", "status": 2}
+        else:
+            response = self.server.execute(argv)
+        self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+
+
+class CLIServer(socketserver.UnixStreamServer):
+    """
+    Serves CLI commands one at a time against a warm RecipeManager
+
+    Requests are handled sequentially, so commands never see each other's
+    half-finished writes, exactly as if they had been run one after another.
+    """
+
+    def __init__(self, base_path, make_manager, run_command, watch_interval=WATCH_INTERVAL):
+        """
+        Args:
+            base_path: Recipe base directory (the socket is created in it)
+            make_manager: Callable returning a fresh RecipeManager
+            run_command: Callable(manager, argv) that prints the command output
+            watch_interval: Seconds between checks for external changes
+        """
+        self.base_path = Path(base_path)
+        self.make_manager = make_manager
+        self.run_command = run_command
+        self.watch_interval = watch_interval
+        self.manager = None
+        self.fingerprint = None
+        self.next_check = 0
+        self.requests = 0
+
+        path = Path(socket_path(base_path))
+        if forward(base_path, ["cli.py", "ping"]) is not None:
+            raise RuntimeError(f"A CLI server is already listening on {path}")
+        if path.exists():
+            path.unlink()
+        super().__init__(str(path), _RequestHandler)
+        self.load()
+
+    def load(self):
+        """(Re)build the manager and warm everything commands read"""
+        if self.manager is not None:
+            self.manager.close()
+        start = time.perf_counter()
+        manager = self.make_manager()
+        manager.summaries
+        manager.stats
+        manager.search_index
+        manager.secondary_index
+        self.manager = manager
+        self.fingerprint = manager.storage.watch_fingerprint()
+        print(f"Loaded {len(manager.summaries)} recipes in {time.perf_counter() - start:.2f}s")
+        for error in manager.load_errors():
+            print(f"  Skipped {error['path']}: {error['error']}")
+
+    def execute(self, argv):
+        """Run one command, returning its printed output and status"""
+        self.requests += 1
+        if len(argv) > 1 and argv[1] == "ping":
+            return {"output": "pong\n", "status": 0}
+
+        output = io.StringIO()
+        status = 0
+        storage = self.manager.storage
+        before = storage.fingerprint()
+        with redirect_stdout(output):
+            try:
+                self.run_command(self.manager, argv)
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception:
+                traceback.print_exc(file=output)
+                status = 1
+        # Our own writes are not external changes. Any write moves the cheap
+        # fingerprint, so the full per-file one is only retaken after writes
+        if storage.fingerprint() != before:
+            self.fingerprint = storage.watch_fingerprint()
+        return {"output": output.getvalue(), "status": status}
+
+    def service_actions(self):
+        """Called between requests by serve_forever(): watch for external changes"""
+        now = time.monotonic()
+        if now < self.next_check:
+            return
+        self.next_check = now + self.watch_interval
+        try:
+            current = self.manager.storage.watch_fingerprint()
+        except OSError:
+            return
+        if current != self.fingerprint:
+            print("Recipes changed on disk; reloading")
+            self.load()
+
+    def server_close(self):
+        super().server_close()
+        path = Path(socket_path(self.base_path))
+        if path.exists():
+            path.unlink()
+        if self.manager is not None:
+            self.manager.close()
+
+
+def serve(base_path, make_manager, run_command, watch_interval=WATCH_INTERVAL):
+    """Run a CLI server until interrupted"""
+    if not supports_unix_socket():
+        print("Error: this platform has no Unix sockets; run commands directly")
+        return
+    try:
+        server = CLIServer(base_path, make_manager, run_command, watch_interval)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Serving CLI commands on {socket_path(base_path)} (Ctrl+C to stop)")
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    # Service managers stop daemons with SIGTERM; clean up the socket then too
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever(poll_interval=0.5)
+    except KeyboardInterrupt:
+        print(f"\nServer stopped after {server.requests} requests")
+    finally:
+        server.server_close()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Index
+Finds recipes that are probably the same dish entered twice - the same
+cookbook page photographed twice, or a recipe saved from a URL and again
+from a photo - without comparing against every stored recipe.
+
+A recipe is reduced to a set of shingles: the words and word pairs of its
+normalized title and its normalized ingredient names (pantry staples left
+out - nearly every recipe has salt). Its MinHash signature holds, for
+each of 40 hash functions, the smallest hash of any shingle; the share
+of equal slots estimates the Jaccard similarity of two recipes. The
+signature is cut into 10 LSH bands of 4 slots and two recipes become
+candidates only if some band matches exactly, so a lookup touches a few
+buckets instead of the whole catalog. Candidates are then compared
+exactly, on 32-bit fingerprints of their shingles.
+
+Like the secondary indexes, this one lives in memory; it is built from the
+catalog summaries on first use and kept current by RecipeManager.
+"""
+
+import re
+import sys
+from array import array
+from functools import lru_cache
+from hashlib import shake_128
+
+from plan_optimizer import PANTRY_STAPLES
+
+NUM_HASHES = 40
+BANDS = 10
+ROWS = NUM_HASHES // BANDS      # a pair at similarity s shares a band with p = 1 - (1 - s^4)^10
+
+# Estimated Jaccard similarity at which recipes are reported as duplicates,
+# and (higher) at which RecipeManager.save_recipe may merge them
+DUPLICATE_THRESHOLD = 0.7
+MERGE_THRESHOLD = 0.9
+
+# A signature is one int: NUM_HASHES 32-bit slots in 64-bit lanes, so each
+# has a guard bit above it and slot-wise arithmetic never carries over
+_LANE = 64
+_SLOT = (1 << 32) - 1
+_GUARDS = sum(1 << (_LANE * i + 32) for i in range(NUM_HASHES))
+_BAND = (1 << (_LANE * ROWS)) - 1
+_BAND_SHIFTS = [_LANE * ROWS * band for band in range(BANDS)]
+
+_WORDS_RE = re.compile(r"[a-z0-9]+")
+# Words that do not tell two dishes apart
+_TITLE_NOISE = {"a", "an", "and", "the", "with", "of", "in", "my", "easy", "best", "recipe", "homemade"}
+
+
+def normalize_title(name):
+    """Lowercase title words, without punctuation and filler words"""
+    return [w for w in _WORDS_RE.findall((name or "").lower()) if w not in _TITLE_NOISE]
+
+
+def shingles(summary):
+    """Title words and word pairs, and ingredient names other than pantry staples"""
+    words = normalize_title(summary.get('name'))
+    result = {"t:" + word for word in words}
+    result.update(f"t:{a} {b}" for a, b in zip(words, words[1:]))
+    result.update("i:" + name for name in summary.get('ingredient_names', ())
+                  if name not in PANTRY_STAPLES)
+    return result
+
+
+@lru_cache(maxsize=8192)
+def _hashes(shingle):
+    """A shingle's NUM_HASHES hashes (4 bytes of SHAKE output each), packed into one int"""
+    # Words and ingredient names repeat across a catalog, hence the cache
+    slots = array('Q', array('I', shake_128(shingle.encode()).digest(4 * NUM_HASHES)))
+    return int.from_bytes(slots.tobytes(), sys.byteorder)
+
+
+def _slot_min(a, b):
+    """Slot-wise minimum of two packed signatures, all slots at once"""
+    # Every slot's guard bit survives the subtraction exactly where a >= b
+    take_b = (((a | _GUARDS) - b) & _GUARDS) >> 32
+    return a ^ ((a ^ b) & (take_b * _SLOT))
+
+
+def sketch(summary):
+    """
+    (MinHash signature, shingle fingerprints) of a recipe, or (None, None)
+    if it has no shingles
+
+    The signature of a union is the slot-wise minimum of its parts'. A
+    shingle's first hash doubles as its 32-bit fingerprint, which is all
+    an exact Jaccard comparison needs.
+    """
+    vectors = [_hashes(shingle) for shingle in shingles(summary)]
+    if not vectors:
+        return None, None
+    sig = vectors[0]
+    for vector in vectors[1:]:
+        sig = _slot_min(sig, vector)
+    return sig, array('I', sorted({vector & _SLOT for vector in vectors}))
+
+
+def jaccard(a, b):
+    """Jaccard similarity of two fingerprint arrays"""
+    common = len(set(a).intersection(b))
+    return common / (len(a) + len(b) - common)
+
+
+def _band_keys(sig):
+    return [sig >> shift & _BAND for shift in _BAND_SHIFTS]
+
+
+class DuplicateIndex:
+    """MinHash/LSH buckets over recipe summaries, with fingerprints to verify candidates"""
+
+    def __init__(self, summaries=None):
+        self.signatures = {}    # recipe id -> packed MinHash signature
+        self.fingerprints = {}  # recipe id -> shingle fingerprints
+        # One dict per band: band key -> recipe id, or list of ids once shared
+        self.buckets = [{} for _ in range(BANDS)]
+        if summaries:
+            for summary in summaries.values():
+                self.add(summary)
+
+    def add(self, summary, sketched=None):
+        """
+        Index (or re-index) one recipe summary
+
+        Args:
+            sketched: sketch(summary), if the caller already has it (e.g.
+                from a find() just before)
+        """
+        recipe_id = summary['id']
+        self.remove(recipe_id)
+        sig, fingerprints = sketched or sketch(summary)
+        if sig is None:
+            return
+        self.signatures[recipe_id] = sig
+        self.fingerprints[recipe_id] = fingerprints
+        for bucket, key in zip(self.buckets, _band_keys(sig)):
+            members = bucket.get(key)
+            if members is None:
+                bucket[key] = recipe_id
+            elif isinstance(members, list):
+                members.append(recipe_id)
+            else:
+                bucket[key] = [members, recipe_id]
+
+    def remove(self, recipe_id):
+        """Drop a recipe; returns False if it was not indexed"""
+        sig = self.signatures.pop(recipe_id, None)
+        if sig is None:
+            return False
+        del self.fingerprints[recipe_id]
+        for bucket, key in zip(self.buckets, _band_keys(sig)):
+            members = bucket.get(key)
+            if isinstance(members, list):
+                members.remove(recipe_id)
+                if len(members) == 1:
+                    bucket[key] = members[0]
+            elif members == recipe_id:
+                del bucket[key]
+        return True
+
+    def find(self, summary, threshold=DUPLICATE_THRESHOLD, sketched=None):
+        """
+        Indexed recipes that look like summary (its own id excluded)
+
+        Args:
+            sketched: sketch(summary), if the caller already has it; pass
+                the same to add() so a new recipe is sketched once
+
+        Returns:
+            List of (recipe id, similarity), most similar first
+        """
+        sig, fingerprints = sketched or sketch(summary)
+        if sig is None:
+            return []
+        candidates = set()
+        for bucket, key in zip(self.buckets, _band_keys(sig)):
+            members = bucket.get(key)
+            if isinstance(members, list):
+                candidates.update(members)
+            elif members is not None:
+                candidates.add(members)
+        candidates.discard(summary['id'])
+
+        matches = []
+        for recipe_id in candidates:
+            score = jaccard(fingerprints, self.fingerprints[recipe_id])
+            if score >= threshold:
+                matches.append((recipe_id, round(score, 2)))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+
+    def groups(self, threshold=DUPLICATE_THRESHOLD):
+        """
+        Clusters of near-duplicates across the whole index
+
+        Only recipes sharing an LSH bucket are compared, and pairs at or
+        above threshold are joined transitively.
+
+        Returns:
+            List of {"ids": sorted ids, "similarity": lowest similarity of
+            a joining pair}, largest clusters first
+        """
+        parent = {}
+
+        def root(recipe_id):
+            while parent.get(recipe_id, recipe_id) != recipe_id:
+                recipe_id = parent[recipe_id]
+            return recipe_id
+
+        fingerprints = self.fingerprints
+        checked = set()
+        joined = []     # (a, b, similarity) of pairs at or above threshold
+        for bucket in self.buckets:
+            for members in bucket.values():
+                if not isinstance(members, list):
+                    continue
+                for i, a in enumerate(members):
+                    shingles_a = set(fingerprints[a])
+                    size_a = len(shingles_a)
+                    for b in members[i + 1:]:
+                        pair = (a, b) if a < b else (b, a)
+                        if pair in checked:
+                            continue
+                        checked.add(pair)
+                        common = len(shingles_a.intersection(fingerprints[b]))
+                        score = common / (size_a + len(fingerprints[b]) - common)
+                        if score >= threshold:
+                            joined.append((a, b, score))
+                            ra, rb = root(a), root(b)
+                            if ra != rb:
+                                parent[rb] = ra
+
+        clusters = {}
+        for a, b, score in joined:
+            cluster = clusters.setdefault(root(a), {"ids": set(), "similarity": 1.0})
+            cluster["ids"].update((a, b))
+            cluster["similarity"] = min(cluster["similarity"], score)
+        result = [{"ids": sorted(cluster["ids"]), "similarity": round(cluster["similarity"], 2)}
+                  for cluster in clusters.values()]
+        result.sort(key=lambda group: (-len(group["ids"]), group["ids"]))
+        return result
+
+    def __len__(self):
+        return len(self.signatures)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Grocery Aggregation
+Sums recipe ingredients into a shopping list with canonical units and
+normalized ingredient names.
+
+Ingredient rows are appended to flat arrays (group id, base quantity) and
+summed in one batch at the end - with NumPy when it is installed and the
+rows are many, plain array arithmetic otherwise.
+
+A saved grocery list also keeps its base-unit totals, so when its meal
+plan is edited the list is updated by a delta - the stored totals, minus
+the removed recipe's ingredient vector (recipe_vector), plus the new
+one's, summed the same way - instead of re-reading every recipe in the
+plan.
+"""
+
+from array import array
+
+from units import DENSITIES, MASS, VOLUME, from_base, normalize_name, to_base
+
+_numpy = False   # not looked for yet
+
+# Fewer rows than this are summed without NumPy, which is slower to import
+# than the sum takes
+NUMPY_MIN_ROWS = 4096
+
+
+def _load_numpy():
+    """NumPy if it is installed; looked for on first use, since it is slow to import"""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
+
+
+def ingredient_amount(name, quantity, unit):
+    """
+    (normalized name, dimension, base quantity) of an ingredient line
+
+    Volume amounts of ingredients with a known density are converted to
+    mass, so "2 cups flour" and "250 g flour" compare and add up.
+    """
+    name = normalize_name(name or '')
+    dimension, base_quantity, _ = to_base(quantity or 0, unit or '')
+    if dimension == VOLUME and name in DENSITIES:
+        dimension = MASS
+        base_quantity *= DENSITIES[name]
+    return name, dimension, base_quantity
+
+
+def format_quantity(quantity):
+    quantity = round(quantity, 2)
+    return int(quantity) if quantity == int(quantity) else quantity
+
+
+class GroceryAggregator:
+    """
+    Accumulates ingredient rows and sums them per (name, dimension)
+
+    Volume amounts of ingredients with a known density are converted to
+    mass, so "2 cups flour" and "250 g flour" become one line. Rows come
+    from recipes (add_recipe) or from ready-made vectors and totals
+    (add_vector), so full lists and plan-edit deltas are summed alike.
+    """
+
+    def __init__(self):
+        self._groups = {}               # (name, dimension) -> group id
+        self._keys = []                 # group id -> (name, dimension)
+        self._group_ids = array('l')
+        self._quantities = array('d')
+
+    def _group(self, key):
+        group_id = self._groups.get(key)
+        if group_id is None:
+            group_id = len(self._keys)
+            self._groups[key] = group_id
+            self._keys.append(key)
+        return group_id
+
+    def add_ingredient(self, ingredient, scale=1.0):
+        name, dimension, base_quantity = ingredient_amount(
+            ingredient.get('name', ''), ingredient.get('quantity'), ingredient.get('unit', ''))
+        if not name:
+            return
+
+        self._group_ids.append(self._group((name, dimension)))
+        self._quantities.append(base_quantity * scale)
+
+    def add_recipe(self, recipe, scale=1.0):
+        """Add every ingredient of a recipe, multiplied by scale"""
+        for ingredient in recipe.get('ingredients', []):
+            self.add_ingredient(ingredient, scale)
+
+    def add_vector(self, vector, scale=1.0):
+        """
+        Add ((name, dimension), base quantity) pairs - a recipe_vector(), or
+        a list's stored totals - multiplied by scale (-1 takes a recipe out)
+        """
+        group = self._group
+        self._group_ids.extend(group(key) for key, _ in vector)
+        self._quantities.extend(base_quantity * scale for _, base_quantity in vector)
+
+    def totals(self):
+        """
+        Base-unit total per (name, dimension)
+
+        Totals that come to (about) zero are left out, so a list does not
+        keep "0 cups milk" after the only recipe using milk is swapped out.
+        """
+        numpy = _load_numpy() if len(self._quantities) >= NUMPY_MIN_ROWS else None
+        if numpy is not None:
+            sums = numpy.bincount(
+                numpy.frombuffer(self._group_ids, dtype=numpy.dtype(self._group_ids.typecode)),
+                weights=numpy.frombuffer(self._quantities, dtype=numpy.float64),
+                minlength=len(self._keys)
+            ).tolist()
+        else:
+            sums = array('d', bytes(8 * len(self._keys)))
+            quantities = self._quantities
+            for i, group_id in enumerate(self._group_ids):
+                sums[group_id] += quantities[i]
+        return {key: total for key, total in zip(self._keys, sums) if abs(total) > 1e-9}
+
+    def items(self):
+        """Shopping list items sorted by name"""
+        return format_items(self.totals())
+
+
+def format_items(totals):
+    """Shopping list items, sorted by name, for base-unit totals per (name, dimension)"""
+    items = []
+    for (name, dimension), total in sorted(totals.items()):
+        quantity, unit = from_base(dimension, total)
+        items.append({
+            "name": name,
+            "quantity": format_quantity(quantity),
+            "unit": unit
+        })
+    return items
+
+
+def recipe_vector(recipe):
+    """
+    A recipe's ingredients summed per (name, dimension) in base units
+
+    Returns:
+        Tuple of ((name, dimension), base quantity) pairs; callers cache
+        these per recipe, so they are immutable
+    """
+    vector = {}
+    for ingredient in recipe.get('ingredients', []):
+        name, dimension, base_quantity = ingredient_amount(
+            ingredient.get('name', ''), ingredient.get('quantity'), ingredient.get('unit', ''))
+        if name:
+            vector[(name, dimension)] = vector.get((name, dimension), 0.0) + base_quantity
+    return tuple(vector.items())
+
+
+def totals_to_json(totals):
+    """Base-unit totals as [[name, dimension, quantity], ...] for a saved list"""
+    return [[name, dimension, quantity] for (name, dimension), quantity in sorted(totals.items())]
+
+
+def totals_from_json(rows):
+    """((name, dimension), quantity) pairs of a saved list's totals, for add_vector()"""
+    return [((name, dimension), quantity) for name, dimension, quantity in rows]
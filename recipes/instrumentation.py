@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Instrumentation
+Timing spans, counters and opt-in profiling for the recipe manager and
+the OCR processor.
+
+Everything is off by default; span() then hands back one shared no-op
+context manager and count() returns after a single flag check. Turn it on
+with environment variables (picked up at import) or from code:
+
+    RECIPE_METRICS=metrics.json   collect, write JSON at exit (.prom for
+                                  Prometheus text format)
+    RECIPE_PROFILE=cpu|memory|all also capture cProfile and/or tracemalloc
+                                  into recipe-profile.prof / -memory.txt
+                                  (RECIPE_PROFILE_OUT changes the prefix)
+
+The CLIs accept --profile, which is the same as RECIPE_PROFILE=all with
+metrics written to recipe-metrics.json.
+"""
+
+import atexit
+import functools
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+DEFAULT_METRICS_FILE = "recipe-metrics.json"
+DEFAULT_PROFILE_PREFIX = "recipe-profile"
+MEMORY_TOP_LINES = 30
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+class _State:
+    enabled = False
+    metrics_file = None
+    profile = None
+    profile_prefix = DEFAULT_PROFILE_PREFIX
+    profiler = None
+    owner_pid = None
+
+
+_state = _State()
+spans = {}      # name -> [calls, total seconds, max seconds]
+counters = {}   # name -> value
+
+
+class _NullSpan:
+    """What span() returns while instrumentation is off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_span(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def enabled():
+    return _state.enabled
+
+
+def span(name):
+    """
+    Context manager timing a block under name, e.g.
+
+        with span("manager.plan"):
+            ...
+    """
+    if not _state.enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def timed(name):
+    """Decorator: time every call of a function as a span"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_span(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def record_span(name, seconds):
+    """Add one timing to a span (for code that measures time itself)"""
+    if not _state.enabled:
+        return
+    entry = spans.get(name)
+    if entry is None:
+        spans[name] = [1, seconds, seconds]
+        return
+    entry[0] += 1
+    entry[1] += seconds
+    if seconds > entry[2]:
+        entry[2] = seconds
+
+
+def count(name, value=1):
+    """Add value to a counter, e.g. count("files_written") or count("bytes_read", n)"""
+    if _state.enabled:
+        counters[name] = counters.get(name, 0) + value
+
+
+def snapshot():
+    """Spans and counters collected so far"""
+    return {
+        "pid": os.getpid(),
+        "spans": {name: {"calls": calls, "total_seconds": round(total, 6),
+                         "mean_seconds": round(total / calls, 6), "max_seconds": round(peak, 6)}
+                  for name, (calls, total, peak) in sorted(spans.items())},
+        "counters": dict(sorted(counters.items()))
+    }
+
+
+def reset():
+    spans.clear()
+    counters.clear()
+
+
+def _metric_name(name):
+    return _NAME_RE.sub("_", name)
+
+
+def prometheus_text(data=None):
+    """Spans and counters in the Prometheus text exposition format"""
+    data = data or snapshot()
+    lines = []
+    if data["spans"]:
+        for metric, key, kind in (("recipe_span_calls_total", "calls", "counter"),
+                                  ("recipe_span_seconds_total", "total_seconds", "counter"),
+                                  ("recipe_span_seconds_max", "max_seconds", "gauge")):
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, values in data["spans"].items():
+                lines.append(f'{metric}{{span="{name}"}} {values[key]}')
+    for name, value in data["counters"].items():
+        metric = f"recipe_{_metric_name(name)}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path):
+    """Write the collected metrics; Prometheus text for .prom files, else JSON"""
+    path = Path(path)
+    data = snapshot()
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.suffix == ".prom":
+            f.write(prometheus_text(data))
+        else:
+            json.dump(data, f, indent=2)
+    return path
+
+
+def start_profile(kind="all"):
+    """Start cProfile ("cpu"), tracemalloc ("memory") or both ("all")"""
+    # Imported here: every CLI start pays for this module, few profile
+    import cProfile
+    import tracemalloc
+    if kind in ("cpu", "all") and _state.profiler is None:
+        _state.profiler = cProfile.Profile()
+        _state.profiler.enable()
+    if kind in ("memory", "all") and not tracemalloc.is_tracing():
+        tracemalloc.start(10)
+    _state.profile = kind
+
+
+def stop_profile(prefix=None):
+    """
+    Stop profiling and write the captures
+
+    Returns:
+        List of files written (<prefix>.prof for pstats/snakeviz,
+        <prefix>-memory.txt with the largest allocation sites)
+    """
+    import tracemalloc
+    prefix = prefix or _state.profile_prefix
+    written = []
+    if _state.profiler is not None:
+        _state.profiler.disable()
+        _state.profiler.dump_stats(f"{prefix}.prof")
+        _state.profiler = None
+        written.append(f"{prefix}.prof")
+    if _state.profile in ("memory", "all") and tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:MEMORY_TOP_LINES]
+        tracemalloc.stop()
+        with open(f"{prefix}-memory.txt", 'w', encoding='utf-8') as f:
+            f.write(f"current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n\n")
+            for stat in top:
+                f.write(f"{stat}\n")
+        written.append(f"{prefix}-memory.txt")
+    _state.profile = None
+    return written
+
+
+def configure(metrics_file=DEFAULT_METRICS_FILE, profile=None, profile_prefix=None):
+    """
+    Turn instrumentation on for this process
+
+    Args:
+        metrics_file: Written at exit (None to only collect in memory)
+        profile: None, "cpu", "memory" or "all"
+        profile_prefix: Path prefix of the profile captures
+    """
+    first = not _state.enabled
+    _state.enabled = True
+    _state.metrics_file = metrics_file
+    _state.owner_pid = os.getpid()
+    if profile_prefix:
+        _state.profile_prefix = profile_prefix
+    if profile:
+        start_profile(profile)
+    if first:
+        atexit.register(_write_at_exit)
+
+
+def _write_at_exit():
+    # Worker processes inherit the configuration but not the job of writing it
+    if os.getpid() != _state.owner_pid:
+        return
+    written = stop_profile() if _state.profile else []
+    if _state.metrics_file:
+        written.append(str(export(_state.metrics_file)))
+    if written:
+        print(f"Instrumentation written to {', '.join(written)}")
+
+
+def configure_from_env(environ=os.environ):
+    """Apply RECIPE_METRICS / RECIPE_PROFILE / RECIPE_PROFILE_OUT"""
+    metrics_file = environ.get("RECIPE_METRICS")
+    profile = environ.get("RECIPE_PROFILE")
+    if not metrics_file and not profile:
+        return False
+    if profile and profile not in ("cpu", "memory", "all"):
+        profile = "all"
+    # Subprocesses see the same variables; only the first process exports
+    owner = environ.get("RECIPE_METRICS_OWNER")
+    if owner and owner != str(os.getpid()):
+        configure(metrics_file=None, profile=None)
+        return True
+    environ["RECIPE_METRICS_OWNER"] = str(os.getpid())
+    configure(metrics_file=metrics_file, profile=profile,
+              profile_prefix=environ.get("RECIPE_PROFILE_OUT"))
+    return True
+
+
+def take_profile_flag(argv):
+    """
+    Remove --profile from an argument list and turn profiling on if it
+    was there
+
+    Returns:
+        True if the flag was given
+    """
+    if "--profile" not in argv:
+        return False
+    argv.remove("--profile")
+    configure(metrics_file=_state.metrics_file or DEFAULT_METRICS_FILE, profile="all")
+    return True
+
+
+configure_from_env()
@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+Meal Plan Solver
+Constraint-aware recipe selection for RecipeManager.generate_meal_plan,
+following the rules in recipe-webapp/meal-planner-rules.js
+
+Every constraint is precomputed as a candidate bitset (bit i = recipe i), so
+working out which recipes may go on a given day is a handful of integer
+AND/NOT operations. A backtracking search then fills the days. If no plan
+satisfies every soft constraint, each is relaxed on its own before any two
+are relaxed together, and so on, so giving up one rule never drops others.
+With optimize=True the plan is then improved for shared ingredients (see
+plan_optimizer.py).
+
+A plan can have several meals a day and several household profiles, each
+with its own dietary flags and servings. Every (household, meal) pair is
+a track of one slot per day, solved on its own, because no rule links
+two tracks. Tracks with the same meal type, dietary flags and time limit
+share one memoized candidate bitset (CandidateSets.candidates), so a
+quarter of breakfasts, lunches and dinners for two households costs about
+as much to filter as a single week.
+"""
+
+import math
+import random
+from datetime import timedelta
+from itertools import combinations
+
+from secondary_index import bits_from_positions, recipe_time
+
+DEFAULT_RULES = {
+    "max_cooking_time": 60,         # minutes, or {"weekday": 45, "sunday": 120}
+    "vegetarian_days": 2,           # minimum vegetarian dinners per week
+    "leftover_nights": 1,           # nights per week that reuse the previous dinner
+    "dietary_days": {},             # other minimums per week, e.g. {"vegan": 1}
+    "no_repeat_days": 7,            # a recipe is not repeated within this many days
+    "no_consecutive_categories": ["pasta", "rice"],
+    "min_days_between": {"seafood": 3, "red-meat": 2},
+    "max_per_week": {"pasta": 2, "red-meat": 3},
+    "skip_days": [],                # e.g. ["friday", "saturday"] for takeaway nights
+    "meals": ["dinner"],            # meals planned per day, e.g. ["breakfast", "lunch", "dinner"]
+    # Other meals get their own time limit and repeat window; the weekly
+    # rules above (vegetarian_days, leftovers, categories) are for dinners
+    "meal_rules": {
+        "breakfast": {"max_cooking_time": 20, "no_repeat_days": 2},
+        "lunch": {"max_cooking_time": 30, "no_repeat_days": 3},
+    },
+}
+
+# Longest plan: a quarter
+MAX_PLAN_DAYS = 92
+
+# Soft constraints, in the order they are tried relaxed when a plan is
+# infeasible: singly first, then in combinations of two, three, ...
+RELAXATION_ORDER = [
+    "category_spacing",
+    "dietary_days",
+    "no_repeat",
+    "max_cooking_time",
+]
+
+MEAL_TYPE_CATEGORIES = {
+    "breakfast": ["breakfast", "brunch"],
+    "lunch": ["lunch", "brunch"],
+    "dinner": ["dinner", "main", "main-course"],
+}
+NON_DINNER_CATEGORIES = ["breakfast", "brunch", "lunch", "snack", "dessert"]
+# Order of meals within a day (other meal types come after these)
+MEAL_ORDER = {"breakfast": 0, "lunch": 1, "dinner": 2}
+
+# Upper bound on search nodes per set of relaxed constraints (and per slot, for long plans)
+SEARCH_BUDGET = 5000
+SEARCH_BUDGET_PER_SLOT = 50
+
+
+def household_profiles(households):
+    """
+    Normalized household profiles
+
+    Args:
+        households: List of dicts with any of "name", "servings" (people
+            to cook for), "dietary" (flags every meal must have, e.g.
+            ["vegetarian"]) and "meals" (meal types this household is
+            planned for; default: the plan's)
+
+    Returns:
+        List of {"name", "servings", "dietary", "meals"} dicts
+    """
+    profiles = []
+    for i, household in enumerate(households or []):
+        dietary = household.get("dietary") or []
+        if isinstance(dietary, str):
+            dietary = [dietary]
+        profiles.append({
+            "name": household.get("name") or f"household {i + 1}",
+            "servings": household.get("servings"),
+            "dietary": sorted(dietary),
+            "meals": household.get("meals")
+        })
+    return profiles
+
+
+def meal_scale(servings, recipe_servings):
+    """Factor to scale a recipe's ingredients by to cook servings portions"""
+    if not servings or not recipe_servings:
+        return 1.0
+    return round(servings / recipe_servings, 2)
+
+
+def pick_bit(bits, rng):
+    """Position of a uniformly random set bit"""
+    count = bits.bit_count()
+    size = bits.bit_length()
+
+    # Dense sets: rejection sampling is cheaper than walking the bytes
+    if count * 8 >= size:
+        while True:
+            pos = rng.randrange(size)
+            if bits >> pos & 1:
+                return pos
+
+    target = rng.randrange(count)
+    for byte_index, byte in enumerate(bits.to_bytes((size + 7) // 8, 'little')):
+        if not byte:
+            continue
+        ones = byte.bit_count()
+        if target < ones:
+            for bit in range(8):
+                if byte >> bit & 1:
+                    if target == 0:
+                        return byte_index * 8 + bit
+                    target -= 1
+        target -= ones
+    raise ValueError("empty bitset")
+
+
+class CandidateSets:
+    """Per-constraint candidate bitsets over a recipe catalog"""
+
+    def __init__(self, summaries):
+        self.ids = list(summaries)
+        self.summaries = [summaries[recipe_id] for recipe_id in self.ids]
+        self.size = len(self.ids)
+        self.all = (1 << self.size) - 1
+        self.times = [recipe_time(s) for s in self.summaries]
+
+        by_category = {}
+        by_dietary = {}
+        for pos, summary in enumerate(self.summaries):
+            for category in summary.get('category', []):
+                by_category.setdefault(category, []).append(pos)
+            for flag, value in summary.get('dietary', {}).items():
+                if value:
+                    by_dietary.setdefault(flag, []).append(pos)
+
+        self.category = {c: bits_from_positions(p, self.size) for c, p in by_category.items()}
+        self.dietary = {f: bits_from_positions(p, self.size) for f, p in by_dietary.items()}
+        self._time_bits = {}
+        self._meal_type_bits = {}
+        self._candidates = {}
+
+    def category_bits(self, category):
+        return self.category.get(category, 0)
+
+    def dietary_bits(self, flag):
+        return self.dietary.get(flag, 0)
+
+    def time_bits(self, max_minutes):
+        """Recipes that fit in max_minutes (unknown times always fit)"""
+        if max_minutes is None:
+            return self.all
+        bits = self._time_bits.get(max_minutes)
+        if bits is None:
+            positions = [pos for pos, t in enumerate(self.times) if t is None or t <= max_minutes]
+            bits = bits_from_positions(positions, self.size)
+            self._time_bits[max_minutes] = bits
+        return bits
+
+    def meal_type_bits(self, meal_type):
+        """
+        Recipes suitable for a meal type: explicitly tagged with it, or -
+        for dinner - not tagged as some other kind of meal
+        """
+        bits = self._meal_type_bits.get(meal_type)
+        if bits is None:
+            bits = 0
+            for category in MEAL_TYPE_CATEGORIES.get(meal_type, [meal_type]):
+                bits |= self.category_bits(category)
+            if meal_type == "dinner":
+                other = 0
+                for category in NON_DINNER_CATEGORIES:
+                    other |= self.category_bits(category)
+                bits |= self.all & ~other
+            self._meal_type_bits[meal_type] = bits
+        return bits
+
+    def candidates(self, meal_type, dietary=(), max_minutes=None):
+        """
+        Recipes for a meal type that have every dietary flag and fit in
+        max_minutes - memoized, since every slot of a track and every
+        household with the same flags asks for the same set
+        """
+        key = (meal_type, tuple(dietary), max_minutes)
+        bits = self._candidates.get(key)
+        if bits is None:
+            bits = self.meal_type_bits(meal_type) & self.time_bits(max_minutes)
+            for flag in dietary:
+                bits &= self.dietary_bits(flag)
+            self._candidates[key] = bits
+        return bits
+
+    def dietary_only(self, dietary=()):
+        """Recipes with every one of the dietary flags"""
+        bits = self.all
+        for flag in dietary:
+            bits &= self.dietary_bits(flag)
+        return bits
+
+
+class MealPlanSolver:
+    """
+    Backtracking meal plan search over candidate bitsets
+
+    Days are grouped into 7-day blocks for the per-week rules
+    (vegetarian_days, leftover_nights, max_per_week). solve_plan() fills
+    one track of slots per household and meal type.
+    """
+
+    def __init__(self, summaries, preferences=None, seed=None):
+        self.rules = dict(DEFAULT_RULES)
+        if preferences:
+            self.rules.update(preferences)
+        self.sets = CandidateSets(summaries)
+        self.rng = random.Random(seed)
+        self.optimization = None
+        self._matrix = None
+
+        # No-consecutive categories are a spacing of two days
+        self.spacing = dict(self.rules["min_days_between"])
+        for category in self.rules["no_consecutive_categories"]:
+            self.spacing[category] = max(self.spacing.get(category, 0), 2)
+
+        self.quotas = dict(self.rules["dietary_days"])
+        if self.rules["vegetarian_days"]:
+            self.quotas["vegetarian"] = max(self.quotas.get("vegetarian", 0),
+                                            self.rules["vegetarian_days"])
+
+    @property
+    def matrix(self):
+        """plan_optimizer.IngredientMatrix over the candidates, built once for every track"""
+        if self._matrix is None:
+            from plan_optimizer import IngredientMatrix
+            self._matrix = IngredientMatrix(self.sets.summaries)
+        return self._matrix
+
+    def _meal_rule(self, meal_type, rule):
+        return self.rules["meal_rules"].get(meal_type, {}).get(rule, self.rules[rule])
+
+    def max_time_for(self, day_name, meal_type="dinner"):
+        limit = self._meal_rule(meal_type, "max_cooking_time")
+        if not isinstance(limit, dict):
+            return limit
+        if day_name in limit:
+            return limit[day_name]
+        key = "weekend" if day_name in ("saturday", "sunday") else "weekday"
+        return limit.get(key, limit.get("default"))
+
+    def build_slots(self, start_date, days, meal_type="dinner", household=None):
+        """
+        One slot per day, marked cook / leftover / skip
+
+        Args:
+            household: Profile from household_profiles() the track is for
+        """
+        skip_days = {d.lower() for d in self.rules["skip_days"]}
+        dietary = tuple(household["dietary"]) if household else ()
+        repeat_days = self._meal_rule(meal_type, "no_repeat_days")
+        slots = []
+        for i in range(days):
+            date = start_date + timedelta(days=i)
+            day_name = date.strftime('%A').lower()
+            slots.append({
+                "index": i,
+                "day_index": i,
+                "date": date,
+                "day_name": day_name,
+                "block": i // 7,
+                "meal_type": meal_type,
+                "household": household,
+                "dietary": dietary,
+                "repeat_days": repeat_days,
+                "kind": "skip" if day_name in skip_days and meal_type == "dinner" else "cook",
+                "max_time": self.max_time_for(day_name, meal_type),
+                "block_slots": range(i - i % 7, min(days, i - i % 7 + 7))
+            })
+
+        # Spread leftover nights evenly through each week
+        leftovers = self.rules["leftover_nights"] if meal_type == "dinner" else 0
+        if leftovers:
+            for block_start in range(0, days, 7):
+                block = slots[block_start:block_start + 7]
+                for k in range(min(leftovers, len(block) - 1)):
+                    slot = block[(k + 1) * len(block) // (leftovers + 1)]
+                    if slot["index"] > 0 and slot["kind"] == "cook":
+                        slot["kind"] = "leftover"
+        return slots
+
+    def _block_quotas(self, slots):
+        """Dietary minimums per block, scaled down for short blocks"""
+        cook_slots = {}
+        block_days = {}
+        for slot in slots:
+            if slot["meal_type"] != "dinner":
+                continue
+            block_days[slot["block"]] = block_days.get(slot["block"], 0) + 1
+            if slot["kind"] == "cook":
+                cook_slots[slot["block"]] = cook_slots.get(slot["block"], 0) + 1
+
+        quotas = {}
+        for block, cooks in cook_slots.items():
+            quotas[block] = {
+                flag: min(cooks, math.ceil(need * block_days[block] / 7))
+                for flag, need in self.quotas.items()
+            }
+        return quotas
+
+    def _domain(self, k, slots, assigned, active, block_quotas):
+        """Bitset of recipes allowed in slot k given the earlier assignments"""
+        slot = slots[k]
+        sets = self.sets
+        domain = sets.candidates(slot["meal_type"], slot["dietary"],
+                                 slot["max_time"] if "max_cooking_time" in active else None)
+        dinner = slot["meal_type"] == "dinner"
+
+        if "no_repeat" in active:
+            window = slot["repeat_days"]
+            recent = 0
+            for j in range(k - 1, -1, -1):
+                if slot["day_index"] - slots[j]["day_index"] >= window:
+                    break
+                if assigned[j] is not None:
+                    recent |= 1 << assigned[j]
+            domain &= ~recent
+
+        if "category_spacing" in active and dinner:
+            block_counts = {}
+            for j in range(k - 1, -1, -1):
+                pos = assigned[j]
+                if pos is None or slots[j]["kind"] != "cook":
+                    continue
+                gap = slot["day_index"] - slots[j]["day_index"]
+                same_block = slots[j]["block"] == slot["block"]
+                if not same_block and gap >= max(self.spacing.values(), default=0):
+                    break
+                for category in sets.summaries[pos].get('category', []):
+                    if gap < self.spacing.get(category, 0):
+                        domain &= ~sets.category_bits(category)
+                    if same_block:
+                        block_counts[category] = block_counts.get(category, 0) + 1
+            for category, limit in self.rules["max_per_week"].items():
+                if block_counts.get(category, 0) >= limit:
+                    domain &= ~sets.category_bits(category)
+
+        if "dietary_days" in active and self.quotas and dinner:
+            remaining = 0
+            counts = {flag: 0 for flag in self.quotas}
+            for j in slot["block_slots"]:
+                if slots[j]["kind"] != "cook":
+                    continue
+                if j >= k:
+                    remaining += 1
+                elif assigned[j] is not None:
+                    dietary = sets.summaries[assigned[j]].get('dietary', {})
+                    for flag in counts:
+                        if dietary.get(flag):
+                            counts[flag] += 1
+            for flag, need in block_quotas.get(slot["block"], {}).items():
+                still_needed = need - counts[flag]
+                if still_needed > remaining:
+                    return 0
+                if still_needed == remaining:
+                    domain &= sets.dietary_bits(flag)
+
+        return domain
+
+    def _assign(self, k, slots, assigned, active, block_quotas, budget):
+        if k == len(slots):
+            return True
+        if slots[k]["kind"] != "cook":
+            return self._assign(k + 1, slots, assigned, active, block_quotas, budget)
+
+        domain = self._domain(k, slots, assigned, active, block_quotas)
+        while domain:
+            if budget[0] <= 0:
+                break
+            budget[0] -= 1
+            pos = pick_bit(domain, self.rng)
+            assigned[k] = pos
+            if self._assign(k + 1, slots, assigned, active, block_quotas, budget):
+                return True
+            domain &= ~(1 << pos)
+        assigned[k] = None
+        return False
+
+    def solve_slots(self, slots):
+        """
+        Fill cook slots with recipe positions
+
+        The fewest constraints are relaxed that give a plan: every one
+        kept, then each relaxed on its own, then pairs, and so on.
+
+        Returns:
+            (assigned positions per slot, list of relaxed constraints)
+        """
+        if not self.sets.size:
+            return [None] * len(slots), list(RELAXATION_ORDER)
+
+        block_quotas = self._block_quotas(slots)
+        budget = max(SEARCH_BUDGET, SEARCH_BUDGET_PER_SLOT * len(slots))
+        for count in range(len(RELAXATION_ORDER) + 1):
+            for relaxed in combinations(RELAXATION_ORDER, count):
+                active = set(RELAXATION_ORDER) - set(relaxed)
+                assigned = [None] * len(slots)
+                if self._assign(0, slots, assigned, active, block_quotas, [budget]):
+                    return assigned, list(relaxed)
+
+        # Meal type alone cannot be satisfied: fall back to any recipe the
+        # household may eat (dietary flags are never relaxed)
+        pool = self.sets.dietary_only(slots[0]["dietary"]) if slots else 0
+        assigned = [pick_bit(pool, self.rng) if pool and slot["kind"] == "cook" else None
+                    for slot in slots]
+        return assigned, list(RELAXATION_ORDER) + ["meal_type"]
+
+    def solve(self, start_date, days, meal_type="dinner", optimize=False):
+        """
+        Plan `days` days of one meal from start_date
+
+        Args:
+            optimize: Rework the plan to share ingredients; the before/after
+                report is left in self.optimization
+
+        Returns:
+            (list of meal dicts, list of warnings)
+        """
+        return self.solve_plan(start_date, days, [meal_type], optimize=optimize)
+
+    def solve_plan(self, start_date, days, meals=None, households=None, optimize=False):
+        """
+        Plan several meals a day for one or more households
+
+        Args:
+            meals: Meal types per day (default: the "meals" rule)
+            households: Household profiles (see household_profiles); each
+                gets its own meals, limited to its dietary flags and
+                scaled to its servings
+            optimize: Rework each dinner track to share ingredients
+
+        Returns:
+            (list of meal dicts in date and meal order, list of warnings)
+        """
+        if not 1 <= days <= MAX_PLAN_DAYS:
+            raise ValueError(f"Plans cover 1 to {MAX_PLAN_DAYS} days, not {days}")
+        meal_types = meals or self.rules["meals"]
+        profiles = household_profiles(households) or [None]
+        tracks = []
+        for household in profiles:
+            wanted = (household or {}).get("meals") or meal_types
+            for meal_type in sorted(wanted, key=lambda m: MEAL_ORDER.get(m, len(MEAL_ORDER))):
+                tracks.append(self.build_slots(start_date, days, meal_type, household))
+
+        self.optimization = None
+        warnings = []
+        planned = []
+        for track, slots in enumerate(tracks):
+            assigned, relaxed = self.solve_slots(slots)
+            if optimize and "meal_type" not in relaxed and slots[0]["meal_type"] == "dinner":
+                assigned = self._optimize(slots, assigned, relaxed)
+            label = ""
+            if len(tracks) > 1:
+                household = slots[0]["household"]
+                label = (f"{household['name']} " if household else "") + f"{slots[0]['meal_type']}: "
+            warnings.extend(f"{label}Relaxed '{name}' to find a plan" for name in relaxed)
+            for slot, meal in zip(slots, self._track_meals(slots, assigned)):
+                planned.append((slot["day_index"], MEAL_ORDER.get(slot["meal_type"], len(MEAL_ORDER)),
+                                track, meal))
+        planned.sort(key=lambda entry: entry[:3])
+        return [meal for *_, meal in planned], warnings
+
+    def _optimize(self, slots, assigned, relaxed):
+        """Run PlanOptimizer on one track; reports add up in self.optimization"""
+        from plan_optimizer import PlanOptimizer
+        active = set(RELAXATION_ORDER) - set(relaxed)
+        optimizer = PlanOptimizer(self, slots, active, self._block_quotas(slots))
+        assigned, report = optimizer.optimize(assigned)
+        if self.optimization is None:
+            self.optimization = report
+        else:
+            for part in ("before", "after"):
+                for key, value in report[part].items():
+                    self.optimization[part][key] += value
+            self.optimization["plans_evaluated"] += report["plans_evaluated"]
+        return assigned
+
+    def _track_meals(self, slots, assigned):
+        """Meal dicts for one solved track"""
+        meals = []
+        last_cooked = None
+        last_meal = None
+        for slot, pos in zip(slots, assigned):
+            meal = {
+                "date": slot["date"].strftime('%Y-%m-%d'),
+                "day": slot["date"].strftime('%A'),
+                "recipe_id": None,
+                "recipe_name": "No meal planned",
+                "meal_type": slot["meal_type"]
+            }
+            household = slot["household"]
+            if household is not None:
+                meal["household"] = household["name"]
+            if slot["kind"] == "cook" and pos is not None:
+                last_cooked = pos
+                last_meal = meal
+                meal["recipe_id"] = self.sets.ids[pos]
+                meal["recipe_name"] = self.sets.summaries[pos].get('name', '')
+                if household is not None and household["servings"]:
+                    meal["servings"] = household["servings"]
+            elif slot["kind"] == "leftover" and last_cooked is not None:
+                meal["recipe_id"] = self.sets.ids[last_cooked]
+                meal["recipe_name"] = self.sets.summaries[last_cooked].get('name', '')
+                meal["leftovers"] = True
+                # Cooked the night before, in a bigger batch
+                if "servings" in last_meal:
+                    last_meal["servings"] += household["servings"]
+            elif slot["kind"] == "skip":
+                meal["skipped"] = True
+            meals.append(meal)
+
+        for slot, pos, meal in zip(slots, assigned, meals):
+            if "servings" in meal and not meal.get("leftovers"):
+                meal["scale"] = meal_scale(meal["servings"], self.sets.summaries[pos].get('servings'))
+        return meals
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Pantry Inventory
+What is already in the pantry and fridge, kept in <recipes>/pantry.json,
+following recipe-webapp/fridge-inventory.md: quantities in canonical base
+units (ml, g, each, ...) so "1 l milk" and "2 cups milk" are one item,
+and optional expiry dates per lot, used first-expiring-first.
+
+Grocery lists are netted against the inventory (net_totals; lines the
+pantry holds in a unit that does not convert are flagged to check), and
+cook_from_inventory() ranks recipes by how much of them is on hand, using
+the recipe x ingredient bitsets from plan_optimizer instead of opening
+every recipe.
+"""
+
+import json
+from datetime import date, timedelta
+from pathlib import Path
+
+from grocery import format_quantity, ingredient_amount
+from recipe_journal import atomic_write_json
+from units import from_base, normalize_name
+
+PANTRY_VERSION = 1
+
+
+def _today(today=None):
+    return (today or date.today()).isoformat()
+
+
+class Pantry:
+    """
+    On-hand inventory: (name, dimension) -> lots of [base quantity, expiry date or None]
+
+    Names are normalized like grocery list names, so what the list asks
+    for and what the pantry holds line up.
+    """
+
+    def __init__(self, pantry_file):
+        self.pantry_file = Path(pantry_file)
+        self.lots = {}
+        self.mtime = None
+        self.load()
+
+    def load(self):
+        try:
+            self.mtime = self.pantry_file.stat().st_mtime_ns
+            with open(self.pantry_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != PANTRY_VERSION:
+                raise ValueError("pantry version mismatch")
+            self.lots = {(item["name"], item["dimension"]): [list(lot) for lot in item["lots"]]
+                         for item in data["items"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            self.lots = {}
+
+    def changed_on_disk(self):
+        """True if pantry.json was written since it was loaded (e.g. by another process)"""
+        try:
+            return self.pantry_file.stat().st_mtime_ns != self.mtime
+        except OSError:
+            return self.mtime is not None
+
+    def save(self):
+        data = {
+            "version": PANTRY_VERSION,
+            "items": [{"name": name, "dimension": dimension, "lots": lots}
+                      for (name, dimension), lots in sorted(self.lots.items())]
+        }
+        atomic_write_json(self.pantry_file, data)
+        self.mtime = self.pantry_file.stat().st_mtime_ns
+
+    def add(self, name, quantity, unit="", expires=None):
+        """
+        Put something in the pantry
+
+        Args:
+            name: Ingredient name, as a recipe would write it
+            quantity: Amount in unit
+            unit: Any unit spelling units.py knows ("" for whole items)
+            expires: Use-by date as YYYY-MM-DD, or None
+
+        Returns:
+            The (name, dimension) key it was stored under
+        """
+        name, dimension, base_quantity = ingredient_amount(name, quantity, unit)
+        if not name:
+            raise ValueError("ingredient name is empty")
+        if expires is not None:
+            expires = date.fromisoformat(expires).isoformat()
+        lots = self.lots.setdefault((name, dimension), [])
+        for lot in lots:
+            if lot[1] == expires:
+                lot[0] += base_quantity
+                break
+        else:
+            lots.append([base_quantity, expires])
+            # Soonest expiry first; lots that keep go last
+            lots.sort(key=lambda lot: lot[1] or "9999-12-31")
+        return name, dimension
+
+    def remove(self, name):
+        """Drop an ingredient entirely, in any unit; returns False if there was none"""
+        name = normalize_name(name)
+        keys = [key for key in self.lots if key[0] == name]
+        for key in keys:
+            del self.lots[key]
+        return bool(keys)
+
+    def use(self, name, quantity, unit="", today=None):
+        """
+        Take an amount out, from the lots that expire first
+
+        Returns:
+            Base quantity that was missing (0 if there was enough)
+        """
+        name, dimension, base_quantity = ingredient_amount(name, quantity, unit)
+        lots = self.lots.get((name, dimension))
+        if not lots:
+            return base_quantity
+        remaining = self._take(lots, base_quantity, _today(today))
+        if not lots:
+            del self.lots[(name, dimension)]
+        return remaining
+
+    @staticmethod
+    def _take(lots, amount, today):
+        """Remove amount from lots in order (expired lots are thrown out on the way)"""
+        while lots and amount > 0:
+            lot = lots[0]
+            if lot[1] is not None and lot[1] < today:
+                lots.pop(0)
+                continue
+            taken = min(lot[0], amount)
+            lot[0] -= taken
+            amount -= taken
+            if lot[0] <= 1e-9:
+                lots.pop(0)
+        return amount
+
+    def available(self, name, dimension, today=None):
+        """Base quantity on hand that has not expired"""
+        today = _today(today)
+        return sum(quantity for quantity, expires in self.lots.get((name, dimension), ())
+                   if expires is None or expires >= today)
+
+    def names(self, today=None):
+        """Normalized names of everything on hand and not expired"""
+        today = _today(today)
+        return {name for (name, _), lots in self.lots.items()
+                if any(quantity > 0 and (expires is None or expires >= today)
+                       for quantity, expires in lots)}
+
+    def on_hand(self, name, today=None):
+        """Unexpired amounts of a normalized name, in every unit it is kept in, for display"""
+        today = _today(today)
+        amounts = []
+        for (item_name, dimension), lots in sorted(self.lots.items()):
+            if item_name != name:
+                continue
+            total = sum(quantity for quantity, expires in lots if expires is None or expires >= today)
+            if total > 0:
+                amount, unit = from_base(dimension, total)
+                amounts.append(f"{format_quantity(amount)} {unit}".strip())
+        return amounts
+
+    def expiring(self, within_days=3, today=None):
+        """Names of items with a lot expiring within within_days (expired included)"""
+        limit = ((today or date.today()) + timedelta(days=within_days)).isoformat()
+        return {name for (name, _), lots in self.lots.items()
+                if any(expires is not None and expires <= limit for _, expires in lots)}
+
+    def items(self, today=None):
+        """Inventory lines for display, sorted by name"""
+        today = _today(today)
+        items = []
+        for (name, dimension), lots in sorted(self.lots.items()):
+            for quantity, expires in lots:
+                amount, unit = from_base(dimension, quantity)
+                item = {"name": name, "quantity": format_quantity(amount), "unit": unit,
+                        "expires": expires}
+                if expires is not None and expires < today:
+                    item["expired"] = True
+                items.append(item)
+        return items
+
+    def __len__(self):
+        return len(self.lots)
+
+
+def net_totals(totals, pantry, today=None):
+    """
+    Grocery pipeline stage: subtract what is on hand from list totals
+
+    Args:
+        totals: Base-unit totals per (name, dimension), as
+            GroceryAggregator.totals() returns them
+        pantry: Pantry to net against (not modified)
+
+    Returns:
+        (totals still to buy, totals taken from the pantry, totals to check):
+        the last are needed in a unit that does not convert to the one the
+        pantry holds them in ("4 cloves garlic" against 3 whole garlic), so
+        whether there is enough is left to the shopper
+    """
+    to_buy = {}
+    from_pantry = {}
+    to_check = {}
+    names = pantry.names(today)
+    for key, needed in totals.items():
+        on_hand = pantry.available(*key, today=today) if key in pantry.lots else 0
+        if on_hand <= 0:
+            if key[0] in names:
+                to_check[key] = needed
+            else:
+                to_buy[key] = needed
+            continue
+        used = min(on_hand, needed)
+        if used > 0:
+            from_pantry[key] = used
+        if needed - used > 1e-9:
+            to_buy[key] = needed - used
+    return to_buy, from_pantry, to_check
+
+
+def cook_from_inventory(matrix, ids, pantry, limit=10, today=None):
+    """
+    Recipes ranked by how many of their ingredients are on hand
+
+    Only recipes using at least one on-hand ingredient are looked at - the
+    OR of those ingredients' recipe bitsets. Pantry staples are not columns
+    of the matrix, so they count neither for nor against a recipe (as if
+    always on hand). Items expiring soon break ties, so they get used first.
+
+    Args:
+        matrix: plan_optimizer.IngredientMatrix over the catalog
+        ids: Recipe id per matrix position
+        pantry: Pantry
+        limit: Number of recipes to return
+
+    Returns:
+        List of {"id", "coverage", "have", "missing"} dicts, best first
+    """
+    have = matrix.column_bits(pantry.names(today))
+    expiring = matrix.column_bits(pantry.expiring(today=today)) & have
+    candidates = matrix.recipes_sharing(have)
+
+    ranked = []
+    while candidates:
+        low = candidates & -candidates
+        pos = low.bit_length() - 1
+        candidates ^= low
+        row = matrix.rows[pos]
+        needed = row.bit_count()
+        if not needed:
+            continue
+        covered = (row & have).bit_count()
+        ranked.append((-covered / needed, -(row & expiring).bit_count(), needed - covered, pos))
+    ranked.sort()
+
+    results = []
+    for _, _, _, pos in ranked[:limit]:
+        row = matrix.rows[pos]
+        results.append({
+            "id": ids[pos],
+            "coverage": round((row & have).bit_count() / row.bit_count(), 2),
+            "have": [matrix.names[c] for c in _columns(row & have)],
+            "missing": [matrix.names[c] for c in _columns(row & ~have)]
+        })
+    return results
+
+
+def _columns(bits):
+    columns = []
+    while bits:
+        low = bits & -bits
+        columns.append(low.bit_length() - 1)
+        bits ^= low
+    return columns
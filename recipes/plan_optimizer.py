@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Meal Plan Optimizer
+Improves a feasible plan from MealPlanSolver so the week shares
+ingredients: fewer distinct things to buy, fewer perishables bought for a
+single dinner, and big enough batches cooked before leftover nights.
+
+The recipe x ingredient incidence matrix is held as bitsets both ways -
+one int per recipe (bit j = ingredient j) and one per ingredient (bit i =
+recipe i) - so scoring a candidate plan is an OR/AND and a popcount per
+dinner, and "recipes that use something already on the list" is an OR of
+a few columns. A simulated-annealing walk swaps one dinner at a time,
+keeping only swaps that still satisfy every active planning rule.
+"""
+
+import math
+
+from meal_planner import pick_bit
+from secondary_index import bits_from_positions
+
+# Not counted as shopping: kept in every kitchen
+PANTRY_STAPLES = {
+    "salt", "pepper", "black pepper", "water", "olive oil", "vegetable oil", "oil",
+    "all-purpose flour", "flour", "granulated sugar", "sugar",
+}
+
+# An ingredient is perishable if any of its words is one of these
+PERISHABLE_WORDS = {
+    # meat and fish
+    "chicken", "beef", "pork", "turkey", "lamb", "bacon", "sausage", "ham", "salmon",
+    "shrimp", "fish", "cod", "tuna", "tilapia",
+    # dairy
+    "milk", "cream", "cheese", "cheddar", "mozzarella", "parmesan", "yogurt", "buttermilk",
+    # fresh produce and herbs
+    "spinach", "lettuce", "kale", "tomato", "cucumber", "zucchini", "mushroom", "avocado",
+    "berry", "berries", "strawberry", "banana", "basil", "cilantro", "parsley", "dill",
+    "mint", "celery", "bell", "broccoli", "cauliflower", "asparagus", "scallion",
+}
+
+# Score weights (lower scores are better)
+DISTINCT_ITEM_WEIGHT = 1.0
+SINGLE_USE_PERISHABLE_WEIGHT = 2.0
+SMALL_LEFTOVER_BATCH_WEIGHT = 3.0
+
+# A dinner followed by a leftover night should make at least this much
+LEFTOVER_SERVINGS = 6
+
+OPTIMIZE_ITERATIONS = 3000
+START_TEMPERATURE = 2.0
+COOLING = 0.998
+MIN_TEMPERATURE = 0.05
+# How often a swap is drawn from recipes sharing a perishable with the plan
+SHARE_BIAS = 0.8
+
+
+def is_perishable(name):
+    return any(word in PERISHABLE_WORDS for word in name.split(" "))
+
+
+class IngredientMatrix:
+    """Recipe x ingredient incidence over CandidateSets positions"""
+
+    def __init__(self, summaries):
+        """
+        Args:
+            summaries: Recipe summaries by position (CandidateSets.summaries)
+        """
+        self.names = []         # column -> normalized ingredient name
+        self.index = {}         # normalized ingredient name -> column
+        self.rows = []          # recipe position -> bitset of columns
+        self.servings = []
+        columns = self.index
+        recipes_using = []
+        for pos, summary in enumerate(summaries):
+            row = 0
+            for name in summary.get('ingredient_names', ()):
+                if name in PANTRY_STAPLES:
+                    continue
+                column = columns.get(name)
+                if column is None:
+                    column = len(self.names)
+                    columns[name] = column
+                    self.names.append(name)
+                    recipes_using.append([])
+                if not row >> column & 1:
+                    row |= 1 << column
+                    recipes_using[column].append(pos)
+            self.rows.append(row)
+            self.servings.append(summary.get('servings'))
+
+        self.columns = [bits_from_positions(p, len(summaries)) for p in recipes_using]
+        self.perishable = bits_from_positions(
+            [column for column, name in enumerate(self.names) if is_perishable(name)],
+            len(self.names))
+
+    def column_bits(self, names):
+        """Bitset of the columns of the given ingredient names (unknown names are skipped)"""
+        bits = 0
+        for name in names:
+            column = self.index.get(name)
+            if column is not None:
+                bits |= 1 << column
+        return bits
+
+    def recipes_sharing(self, ingredients):
+        """Bitset of recipes using any ingredient in the given column bitset"""
+        recipes = 0
+        while ingredients:
+            low = ingredients & -ingredients
+            recipes |= self.columns[low.bit_length() - 1]
+            ingredients ^= low
+        return recipes
+
+    def usage(self, positions):
+        """
+        Ingredients bought for a list of cooked recipes
+
+        Returns:
+            (bitset of all ingredients, bitset of ingredients used only once)
+        """
+        seen = 0
+        repeated = 0
+        for pos in positions:
+            row = self.rows[pos]
+            repeated |= seen & row
+            seen |= row
+        return seen, seen & ~repeated
+
+
+class PlanOptimizer:
+    """Simulated annealing over the plans a MealPlanSolver would accept"""
+
+    def __init__(self, solver, slots, active, block_quotas, iterations=OPTIMIZE_ITERATIONS):
+        """
+        Args:
+            solver: MealPlanSolver the starting plan came from (rules, rng)
+            slots: Its slots (see MealPlanSolver.build_slots)
+            active: Planning rules still in force after relaxation
+            block_quotas: Dietary minimums per block
+            iterations: Swaps to try
+        """
+        self.solver = solver
+        self.slots = slots
+        self.active = active
+        self.block_quotas = block_quotas
+        self.iterations = iterations
+        # Shared by the optimizers of every track of a plan
+        self.matrix = solver.matrix
+        self.cook_slots = [k for k, slot in enumerate(slots) if slot["kind"] == "cook"]
+        # A swap can only break rules for slots within the longest
+        # look-back window, or in the same week (quotas, max_per_week)
+        self.reach = max([slots[0]["repeat_days"] if slots else 0, *solver.spacing.values()])
+        # Cook slots whose dinner is eaten again the next night
+        self.feeds_leftovers = set()
+        last_cook = None
+        for k, slot in enumerate(slots):
+            if slot["kind"] == "cook":
+                last_cook = k
+            elif slot["kind"] == "leftover" and last_cook is not None:
+                self.feeds_leftovers.add(last_cook)
+
+    def breakdown(self, assigned):
+        """Distinct items, single-use perishables and small leftover batches of a plan"""
+        matrix = self.matrix
+        seen, single = matrix.usage([assigned[k] for k in self.cook_slots
+                                     if assigned[k] is not None])
+        small_batches = 0
+        for k in self.feeds_leftovers:
+            servings = matrix.servings[assigned[k]] if assigned[k] is not None else None
+            if servings is not None and servings < LEFTOVER_SERVINGS:
+                small_batches += 1
+        return {
+            "distinct_items": seen.bit_count(),
+            "single_use_perishables": (single & matrix.perishable).bit_count(),
+            "small_leftover_batches": small_batches
+        }
+
+    def score(self, assigned):
+        parts = self.breakdown(assigned)
+        return (DISTINCT_ITEM_WEIGHT * parts["distinct_items"]
+                + SINGLE_USE_PERISHABLE_WEIGHT * parts["single_use_perishables"]
+                + SMALL_LEFTOVER_BATCH_WEIGHT * parts["small_leftover_batches"])
+
+    def _valid_from(self, start, assigned):
+        """Do the cook slots from start on still satisfy the active rules?"""
+        solver = self.solver
+        changed = self.slots[start - 1]
+        for k in self.cook_slots:
+            if k < start:
+                continue
+            slot = self.slots[k]
+            if slot["block"] != changed["block"] and slot["day_index"] - changed["day_index"] >= self.reach:
+                break
+            domain = solver._domain(k, self.slots, assigned, self.active, self.block_quotas)
+            if not domain >> assigned[k] & 1:
+                return False
+        return True
+
+    def _shared_perishables(self, assigned, skip):
+        """Perishables bought for every dinner except the one in slot skip"""
+        ingredients = 0
+        for k in self.cook_slots:
+            if k != skip:
+                ingredients |= self.matrix.rows[assigned[k]]
+        return ingredients & self.matrix.perishable
+
+    def optimize(self, assigned):
+        """
+        Returns:
+            (best assignment found, report dict)
+        """
+        before = self.breakdown(assigned)
+        if len(self.cook_slots) < 2 or any(assigned[k] is None for k in self.cook_slots):
+            return assigned, {"before": before, "after": before, "plans_evaluated": 0}
+
+        rng = self.solver.rng
+        current = list(assigned)
+        current_score = self.score(current)
+        best = list(current)
+        best_score = current_score
+        temperature = START_TEMPERATURE
+        evaluated = 0
+
+        for _ in range(self.iterations):
+            temperature = max(MIN_TEMPERATURE, temperature * COOLING)
+            k = rng.choice(self.cook_slots)
+            old = current[k]
+            domain = self.solver._domain(k, self.slots, current, self.active, self.block_quotas)
+            domain &= ~(1 << old)
+            if not domain:
+                continue
+            sharing = domain & self.matrix.recipes_sharing(self._shared_perishables(current, k))
+            current[k] = pick_bit(sharing if sharing and rng.random() < SHARE_BIAS else domain, rng)
+            if not self._valid_from(k + 1, current):
+                current[k] = old
+                continue
+
+            evaluated += 1
+            new_score = self.score(current)
+            delta = new_score - current_score
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                current_score = new_score
+                if new_score < best_score:
+                    best = list(current)
+                    best_score = new_score
+            else:
+                current[k] = old
+
+        return best, {"before": before, "after": self.breakdown(best),
+                      "plans_evaluated": evaluated}
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Record IDs
+Time-sortable ids for recipes, meal plans and grocery lists, in the ULID
+layout: a 48-bit millisecond timestamp followed by 80 random bits,
+written as 26 Crockford base32 characters. Ids made later sort later, so
+"recipes added this month" is a range of ids (id_bounds) instead of a
+read of every file, and 80 random bits per millisecond make a collision
+practically impossible; callers that can check the store pass exists=
+anyway, since a colliding id would overwrite a record.
+
+Ids from before this module (8 hex digits) stay valid. migrate_ids() in
+RecipeManager renames them and records old -> new in id-aliases.json
+(IdAliases), so old ids keep resolving.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"   # Crockford base32, no I L O U
+ID_LENGTH = 26
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+_DECODE = {char: value for value, char in enumerate(ALPHABET)}
+
+# Last (milliseconds, random part) handed out, so ids made within the same
+# millisecond still sort in the order they were made
+_last = (0, 0)
+_lock = threading.Lock()
+
+
+def _encode(value):
+    chars = []
+    for _ in range(ID_LENGTH):
+        chars.append(ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def _milliseconds(moment):
+    """Unix milliseconds of a datetime, date or timestamp (naive means local time)"""
+    if isinstance(moment, datetime):
+        return int(moment.timestamp() * 1000)
+    if isinstance(moment, date):
+        return int(datetime(moment.year, moment.month, moment.day).timestamp() * 1000)
+    return int(moment * 1000)
+
+
+def new_id(exists=None, timestamp=None):
+    """
+    New time-sortable id
+
+    Args:
+        exists: Optional callable; ids it reports as taken are skipped
+        timestamp: Time to encode instead of now (datetime, date or Unix
+            seconds), e.g. a migrated record's creation date
+
+    Returns:
+        26-character id string
+    """
+    global _last
+    while True:
+        if timestamp is None:
+            ms = time.time_ns() // 1_000_000
+            with _lock:
+                last_ms, last_random = _last
+                if ms <= last_ms and last_random < _RANDOM_MAX:
+                    # Same millisecond (or the clock stepped back): count up
+                    ms, random_part = last_ms, last_random + 1
+                else:
+                    random_part = int.from_bytes(os.urandom(10), "big")
+                _last = (ms, random_part)
+        else:
+            ms = _milliseconds(timestamp)
+            random_part = int.from_bytes(os.urandom(10), "big")
+        record_id = _encode(ms << _RANDOM_BITS | random_part)
+        if exists is None or not exists(record_id):
+            return record_id
+
+
+def is_time_id(record_id):
+    """True for ids made by new_id(), False for legacy ids"""
+    return (isinstance(record_id, str) and len(record_id) == ID_LENGTH
+            and record_id[0] <= "7" and all(char in _DECODE for char in record_id))
+
+
+def id_time(record_id):
+    """Creation time encoded in an id, as a local datetime, or None for a legacy id"""
+    if not is_time_id(record_id):
+        return None
+    value = 0
+    for char in record_id[:10]:
+        value = value << 5 | _DECODE[char]
+    return datetime.fromtimestamp(value / 1000)
+
+
+def id_bounds(start, end=None):
+    """
+    Lowest and highest id made in [start, end)
+
+    Args:
+        start: datetime, date or Unix seconds
+        end: Same (default: no upper limit)
+
+    Returns:
+        (low, high) id strings; an id made in the window satisfies low <= id <= high
+    """
+    low = _encode(_milliseconds(start) << _RANDOM_BITS)
+    if end is None:
+        return low, "8" + "0" * (ID_LENGTH - 1)
+    return low, _encode((_milliseconds(end) - 1) << _RANDOM_BITS | _RANDOM_MAX)
+
+
+class IdAliases:
+    """
+    Old id -> current id, for records renamed by an id migration
+
+    Kept in <recipes>/id-aliases.json (not under .index/: old ids stop
+    resolving without it) and read on the first lookup of an unknown id.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._aliases = None
+
+    @property
+    def aliases(self):
+        if self._aliases is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._aliases = json.load(f)
+            except FileNotFoundError:
+                self._aliases = {}
+        return self._aliases
+
+    def get(self, old_id):
+        """Current id for an old one, or None"""
+        return self.aliases.get(old_id)
+
+    def update(self, renamed):
+        """Record {old id: new id} renames and save"""
+        from recipe_journal import atomic_write_json
+        aliases = self.aliases
+        # Chains collapse, so every old id resolves in one step
+        for old_id, current in aliases.items():
+            if current in renamed:
+                aliases[old_id] = renamed[current]
+        aliases.update(renamed)
+        atomic_write_json(self.path, aliases)
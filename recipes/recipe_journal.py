@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Recipe Journal
+Crash-safe file writes for the JSON storage backend.
+
+Every record file is written to a temporary file and renamed over the
+target, so a crash leaves either the old or the new version and never a
+truncated one. Batches of writes go through a write-ahead journal: the
+whole batch is logged and fsynced once, then applied; a journal left over
+by a crash is replayed the next time the storage is opened.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from instrumentation import count
+
+
+def atomic_write_json(path, data, indent=2, durable=True):
+    """
+    Write JSON to path via a temporary file and rename
+
+    Args:
+        path: Target file
+        data: JSON-serializable object
+        indent: Passed to json.dump (None for compact output)
+        durable: fsync the file before the rename and its directory
+            after; batches skip this and sync everything once at the end
+            (sync_files)
+    """
+    path = Path(path)
+    # Leading dot and .tmp suffix keep half-written files out of *.json globs
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        count("files_written")
+        count("bytes_written", f.tell())
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if durable:
+        sync_directory(path.parent)
+
+
+def sync_directory(path):
+    """fsync a directory, so renames and unlinks in it survive a crash"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Windows cannot fsync a directory; its renames are durable anyway
+        pass
+    finally:
+        os.close(fd)
+
+
+def sync_files(paths, directories=()):
+    """
+    Make a batch of already written files durable
+
+    Each file is fsynced, then each distinct parent directory once, so
+    the renames that put the files in place are durable too.
+
+    Args:
+        paths: Files written by the batch
+        directories: Further directories to sync, e.g. where files were
+            deleted
+    """
+    parents = dict.fromkeys(directories)
+    for path in paths:
+        path = Path(path)
+        try:
+            with open(path, 'rb') as f:
+                os.fsync(f.fileno())
+        except OSError:
+            pass
+        parents[path.parent] = None
+    for directory in parents:
+        sync_directory(directory)
+
+
+class WriteJournal:
+    """
+    Write-ahead log of storage operations
+
+    Operations are dicts such as {"op": "put_recipe", "record": {...}} or
+    {"op": "delete_recipe", "id": "..."}. commit() writes them followed by
+    a commit marker and fsyncs once; only a journal that ends in a commit
+    marker is ever replayed, so a crash while logging loses the batch
+    instead of applying half of it.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def commit(self, operations):
+        """Durably record a batch of operations"""
+        self.path.parent.mkdir(exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for operation in operations:
+                f.write(json.dumps(operation, ensure_ascii=False))
+                f.write("\n")
+            f.write(json.dumps({"op": "commit", "count": len(operations)}))
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        sync_directory(self.path.parent)
+
+    def pending(self):
+        """
+        Operations of a committed batch that may not have been applied
+
+        Returns:
+            List of operations (empty if there is no complete journal)
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+
+        try:
+            operations = [json.loads(line) for line in lines if line]
+        except ValueError:
+            # Torn write while logging: the batch never committed
+            return []
+        if not operations or operations[-1].get("op") != "commit":
+            return []
+        marker = operations.pop()
+        if marker.get("count") != len(operations):
+            return []
+        return operations
+
+    def clear(self):
+        """Forget the journal once its batch is applied and durable"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
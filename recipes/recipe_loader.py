@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Bulk Recipe Loader
+Reads many recipe files at once: the cold start that builds the manifest
+from nothing, and whole-catalog loads.
+
+- A few hundred files or less are read and parsed in this thread.
+- More files on a machine with several cores go to a process pool in
+  chunks; each worker reads, parses and (for the manifest) summarizes its
+  files, so only small results come back.
+- Otherwise, or if worker processes cannot be started, a thread pool
+  reads the files so the I/O overlaps, and they are parsed here - with
+  orjson when it is installed, which parses several times faster than
+  the json module.
+
+Files that cannot be read or parsed never stop a load and are not
+printed: each one becomes an entry in the returned LoadReport.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+
+from instrumentation import count
+from recipe_model import RecipeSummary, summarize_recipe
+
+# Below this many files, pools cost more than they save
+PARALLEL_THRESHOLD = 512
+CHUNK_SIZE = 256
+MAX_THREADS = 16
+
+_orjson = False     # not looked for yet
+
+
+def _load_orjson():
+    global _orjson
+    if _orjson is False:
+        try:
+            import orjson
+            _orjson = orjson
+        except ImportError:
+            _orjson = None
+    return _orjson
+
+
+def parse_json(data):
+    """Parse JSON bytes or text, with orjson if it is installed"""
+    orjson = _load_orjson()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Let the json module decide (it also accepts NaN) and word the error
+            pass
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+class LoadReport:
+    """What a bulk load did, and every file it could not load"""
+
+    def __init__(self, mode="serial", workers=1):
+        self.mode = mode
+        self.workers = workers
+        self.loaded = 0
+        self.bytes_read = 0
+        self.errors = []    # [{"path": str, "error": str}]
+        self.seconds = 0.0
+
+    def add_error(self, path, error):
+        self.errors.append({"path": str(path), "error": error})
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def to_dict(self):
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "loaded": self.loaded,
+            "failed": self.failed,
+            "bytes_read": self.bytes_read,
+            "seconds": round(self.seconds, 4),
+            "errors": self.errors
+        }
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _parse_one(path, data, summarize):
+    """(value, error) for one file's bytes"""
+    try:
+        recipe = parse_json(data)
+        if not isinstance(recipe, dict) or 'id' not in recipe:
+            return None, "not a recipe (no id)"
+        return (summarize_recipe(recipe) if summarize else recipe), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _load_chunk(paths, summarize):
+    """
+    Process pool task: read and parse a chunk of files
+
+    Returns:
+        List of (path, value, error, bytes read); summaries come back as
+        plain dicts, which pickle smaller than RecipeSummary objects
+    """
+    results = []
+    for path in paths:
+        try:
+            data = _read(path)
+        except OSError as e:
+            results.append((path, None, f"{type(e).__name__}: {e}", 0))
+            continue
+        value, error = _parse_one(path, data, summarize)
+        if summarize and value is not None:
+            value = value.to_dict()
+        results.append((path, value, error, len(data)))
+    return results
+
+
+def _read_chunk(paths):
+    """Thread pool task: read a chunk of files as bytes"""
+    results = []
+    for path in paths:
+        try:
+            results.append((path, _read(path), None))
+        except OSError as e:
+            results.append((path, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _chunks(paths, size):
+    return [paths[i:i + size] for i in range(0, len(paths), size)]
+
+
+def default_mode(file_count, cpus=None):
+    """"serial", "process" or "thread" for a load of file_count files"""
+    cpus = cpus or os.cpu_count() or 1
+    if file_count < PARALLEL_THRESHOLD:
+        return "serial"
+    return "process" if cpus > 1 else "thread"
+
+
+def load_files(paths, summarize=False, mode=None, workers=None):
+    """
+    Load many recipe files
+
+    Args:
+        paths: Recipe file paths
+        summarize: Return catalog summaries (RecipeSummary) instead of bodies
+        mode: "serial", "thread" or "process" (default: by file count and cores)
+        workers: Pool size (default: one process per core, or up to
+            MAX_THREADS threads)
+
+    Returns:
+        (list of (path, recipe or summary) in the order of paths, LoadReport)
+    """
+    paths = list(paths)
+    mode = mode or default_mode(len(paths))
+    start = time.perf_counter()
+
+    loaded = None
+    if mode == "process":
+        workers = workers or os.cpu_count() or 1
+        report = LoadReport("process", workers)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunks = pool.map(_load_chunk, _chunks(paths, CHUNK_SIZE), repeat(summarize))
+                loaded = _collect(report, (item for chunk in chunks for item in chunk), summarize)
+        except (OSError, RuntimeError, ImportError):
+            # No worker processes here (sandbox, frozen app, ...): use threads
+            loaded = None
+            mode = "thread"
+
+    if mode == "thread":
+        workers = workers or min(MAX_THREADS, (os.cpu_count() or 1) + 4)
+        report = LoadReport("thread", workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            chunks = pool.map(_read_chunk, _chunks(paths, CHUNK_SIZE))
+            loaded = _collect(report, _parse_read(chunks, summarize), summarize)
+    elif loaded is None:
+        report = LoadReport("serial", 1)
+        loaded = _collect(report, _parse_read([_read_chunk(paths)], summarize), summarize)
+
+    report.seconds = time.perf_counter() - start
+    count("files_read", report.loaded + report.failed)
+    count("bytes_read", report.bytes_read)
+    return loaded, report
+
+
+def _parse_read(chunks, summarize):
+    """Parse (path, bytes, error) chunks from _read_chunk in this thread"""
+    for chunk in chunks:
+        for path, data, error in chunk:
+            if error is not None:
+                yield path, None, error, 0
+                continue
+            value, error = _parse_one(path, data, summarize)
+            yield path, value, error, len(data)
+
+
+def _collect(report, results, summarize):
+    loaded = []
+    for path, value, error, size in results:
+        report.bytes_read += size
+        if error is not None:
+            report.add_error(path, error)
+            continue
+        if summarize and isinstance(value, dict):
+            # Rebuilt here so strings are interned and tuples shared again
+            value = RecipeSummary.from_dict(value)
+        loaded.append((path, value))
+        report.loaded += 1
+    return loaded
@@ -0,0 +1,942 @@
+#!/usr/bin/env python3
+"""
+Family Recipe Manager
+Local recipe database with meal planning and grocery list generation
+"""
+
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from instrumentation import span, timed
+from recipe_ids import id_bounds, is_time_id, new_id
+from recipe_model import summarize_recipe
+from recipe_stats import RecipeStats
+from recipe_storage import open_storage
+from secondary_index import SecondaryIndex
+
+# search_index, meal_planner and grocery are imported by the methods that
+# use them, so short CLI commands like view don't pay for loading them
+
+class RecipeManager:
+    def __init__(self, base_path, storage="json"):
+        """
+        Args:
+            base_path: Recipe base directory
+            storage: "json" (one file per record, the default), "sqlite"
+                (single recipes.db file) or a storage backend instance
+        """
+        self.base_path = Path(base_path)
+        self.data_path = self.base_path / "data"
+        self.images_path = self.base_path / "images"
+        self.meal_plans_path = self.base_path / "meal-plans"
+        self.grocery_lists_path = self.base_path / "grocery-lists"
+        
+        # Ensure directories exist
+        self.images_path.mkdir(exist_ok=True)
+        
+        # Recipe bodies are read on demand by the storage backend
+        with span("manager.open"):
+            self.storage = open_storage(self.base_path, storage)
+        self.recipes = self.storage.recipes
+        self._search_index = None
+        self._secondary_index = None
+        self._stats = None
+        self._pantry = None
+        self._ingredient_index = None
+        self._duplicate_index = None
+        self._ingredient_vectors = {}   # recipe id -> grocery.recipe_vector()
+        self._batch_saved = None
+    
+    @property
+    def summaries(self):
+        """Recipe summaries keyed by id (name, category, tags, times, ...)"""
+        return self.storage.summaries()
+    
+    @property
+    def search_index(self):
+        """Full-text search index, loaded (and synced with storage) on first use"""
+        if self._search_index is None:
+            with span("search_index.load"):
+                from search_index import SearchIndex
+                index_path = self.base_path / ".index"
+                # Superseded by search-*.db (INDEX_VERSION 2)
+                (index_path / f"search-{self.storage.name}.json").unlink(missing_ok=True)
+                index = SearchIndex(index_path / f"search-{self.storage.name}.db")
+                if index.sync(self.storage):
+                    index.save()
+            self._search_index = index
+        return self._search_index
+    
+    @property
+    def secondary_index(self):
+        """Category/tag/dietary/time/rating bitsets, built on first use"""
+        if self._secondary_index is None:
+            with span("secondary_index.build"):
+                self._secondary_index = SecondaryIndex(self.summaries)
+        return self._secondary_index
+    
+    @property
+    def stats(self):
+        """Running catalog statistics, loaded (and synced with storage) on first use"""
+        if self._stats is None:
+            with span("stats.load"):
+                stats = RecipeStats(self.base_path / ".index" / f"stats-{self.storage.name}.json")
+                if stats.sync(self.storage):
+                    stats.save()
+            self._stats = stats
+        return self._stats
+    
+    @property
+    def pantry(self):
+        """On-hand inventory (pantry.json), reloaded if another process changed it"""
+        if self._pantry is None or self._pantry.changed_on_disk():
+            from pantry import Pantry
+            self._pantry = Pantry(self.base_path / "pantry.json")
+        return self._pantry
+    
+    @property
+    def ingredient_index(self):
+        """(recipe ids, IngredientMatrix) over the catalog, rebuilt after recipe changes"""
+        if self._ingredient_index is None:
+            from plan_optimizer import IngredientMatrix
+            with span("ingredient_index.build"):
+                summaries = self.summaries
+                ids = list(summaries)
+                self._ingredient_index = (ids, IngredientMatrix([summaries[i] for i in ids]))
+        return self._ingredient_index
+    
+    @property
+    def duplicate_index(self):
+        """MinHash/LSH near-duplicate index over the catalog, built on first use"""
+        if self._duplicate_index is None:
+            from duplicate_index import DuplicateIndex
+            with span("duplicate_index.build"):
+                self._duplicate_index = DuplicateIndex(self.summaries)
+        return self._duplicate_index
+    
+    def ingredient_vector(self, recipe_id):
+        """A recipe's ingredients summed per (name, dimension), cached until it is saved or deleted"""
+        vector = self._ingredient_vectors.get(recipe_id)
+        if vector is None:
+            from grocery import recipe_vector
+            recipe = self.recipes.get(recipe_id) or self.recipes.get(self.storage.resolve_id(recipe_id))
+            vector = recipe_vector(recipe) if recipe else ()
+            self._ingredient_vectors[recipe_id] = vector
+        return vector
+    
+    def close(self):
+        """Close the storage backend and the search index"""
+        self.storage.close()
+        if self._search_index is not None:
+            self._search_index.close()
+    
+    def _save_stats(self):
+        """Persist the statistics, unless an open batch will when it ends"""
+        if self._batch_saved is None:
+            self._stats.save(self.storage.fingerprint())
+    
+    def _current_summary(self, recipe_id):
+        """Stored summary of a recipe, counting saves queued by an open batch"""
+        if self._batch_saved is not None and recipe_id in self._batch_saved:
+            recipe = self._batch_saved[recipe_id]
+            return summarize_recipe(recipe) if recipe is not None else None
+        return self.storage.summary(recipe_id)
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group many saves, e.g. a bulk import
+        
+        Storage writes are flushed together when the block ends and the
+        search index and statistics are updated and saved once. If the
+        block raises, nothing in it is saved.
+        """
+        if self._batch_saved is not None:
+            yield self
+            return
+        
+        # Synced before the writes, which are then indexed when the block ends
+        search_index = self.search_index
+        self._batch_saved = {}     # id -> recipe, or None if deleted
+        try:
+            with self.storage.batch():
+                yield self
+            saved = self._batch_saved
+        except BaseException:
+            # The in-memory statistics and duplicate index counted the discarded writes
+            self._stats = None
+            self._duplicate_index = None
+            raise
+        finally:
+            self._batch_saved = None
+        
+        if self._stats is not None:
+            self._save_stats()
+        if not saved:
+            return
+        self._ingredient_index = None
+        if self._secondary_index is not None:
+            for recipe_id, recipe in saved.items():
+                if recipe is None:
+                    self._secondary_index.remove(recipe_id)
+                else:
+                    self._secondary_index.add(summarize_recipe(recipe))
+        for recipe_id, recipe in saved.items():
+            if recipe is None:
+                search_index.remove(recipe_id)
+            else:
+                search_index.add(recipe, self.storage.stamp(recipe_id))
+        search_index.save(self.storage.recipe_fingerprint())
+    
+    @timed("manager.load_recipes")
+    def load_recipes(self, report=False):
+        """
+        Load all recipes from storage
+        
+        Args:
+            report: Also return the recipe_loader.LoadReport (files that
+                could not be read are listed there, not printed)
+        
+        Returns:
+            Dict of recipes by id, or (dict, LoadReport) with report=True
+        """
+        recipes, load_report = self.storage.load_recipes()
+        return (recipes, load_report) if report else recipes
+    
+    def load_errors(self):
+        """Recipe files the last catalog rescan could not read, as {"path", "error"} dicts"""
+        load_report = self.storage.load_report
+        return load_report.errors if load_report is not None else []
+    
+    @timed("manager.save")
+    def save_recipe(self, recipe_data, duplicates="flag"):
+        """
+        Save a recipe to storage
+        
+        A recipe that is not stored yet is first looked up in the
+        near-duplicate index (see duplicate_index.py).
+        
+        Args:
+            recipe_data: Recipe dict; a new time-sortable id (recipe_ids)
+                is assigned if it has none
+            duplicates: "flag" lists look-alikes under possible_duplicates,
+                "merge" also folds the recipe into a stored one that is
+                near-identical (MERGE_THRESHOLD) instead of adding it,
+                None skips the check
+        
+        Returns:
+            Id of the stored recipe (the existing one's after a merge)
+        """
+        if 'id' not in recipe_data:
+            recipe_data['id'] = new_id(exists=lambda i: self._current_summary(i) is not None)
+        
+        # Updates keep the original date
+        recipe_data.setdefault('created_date', datetime.now().strftime('%Y-%m-%d'))
+        
+        # Synced before the write, so the write itself is counted (and indexed) once
+        stats = self.stats
+        search_index = self.search_index
+        previous = self._current_summary(recipe_data['id'])
+        summary = summarize_recipe(recipe_data)
+        sketched = None
+        if previous is None and duplicates:
+            from duplicate_index import sketch
+            # Sketched once, for the lookup and for indexing the new recipe
+            sketched = sketch(summary)
+            matches = self.duplicate_index.find(summary, sketched=sketched)
+            if matches:
+                from duplicate_index import MERGE_THRESHOLD
+                if duplicates == "merge" and matches[0][1] >= MERGE_THRESHOLD:
+                    return self.merge_recipes(matches[0][0], [recipe_data])
+                recipe_data['possible_duplicates'] = [recipe_id for recipe_id, _ in matches]
+        
+        self.storage.put_recipe(recipe_data)
+        stats.replace(previous, summary)
+        self._ingredient_vectors.pop(recipe_data['id'], None)
+        if self._duplicate_index is not None:
+            # Kept current inside batches too, so a batch's own duplicates are seen
+            self._duplicate_index.add(summary, sketched)
+        
+        if self._batch_saved is not None:
+            # Indexed once, when the batch ends
+            self._batch_saved[recipe_data['id']] = recipe_data
+            return recipe_data['id']
+        
+        self._save_stats()
+        self._ingredient_index = None
+        if self._secondary_index is not None:
+            self._secondary_index.add(summary)
+        search_index.add(recipe_data, self.storage.stamp(recipe_data['id']))
+        search_index.save(self.storage.recipe_fingerprint())
+        return recipe_data['id']
+    
+    def find_duplicates(self, recipe, threshold=None):
+        """
+        Stored recipes that look like recipe (a full recipe or a summary)
+        
+        Returns:
+            List of (recipe id, similarity), most similar first
+        """
+        from duplicate_index import DUPLICATE_THRESHOLD
+        summary = recipe if hasattr(recipe, 'ingredient_names') else summarize_recipe(recipe)
+        return self.duplicate_index.find(summary, threshold or DUPLICATE_THRESHOLD)
+    
+    def find_duplicate_groups(self, threshold=None):
+        """Clusters of near-duplicate recipes across the catalog (see DuplicateIndex.groups)"""
+        from duplicate_index import DUPLICATE_THRESHOLD
+        with span("duplicates.groups"):
+            return self.duplicate_index.groups(threshold or DUPLICATE_THRESHOLD)
+    
+    def merge_recipes(self, keep_id, others):
+        """
+        Fold near-duplicates into one stored recipe
+        
+        The kept recipe's own values win; fields it lacks (or has empty)
+        are filled from the others in order. Stored recipes among others
+        are deleted.
+        
+        Args:
+            keep_id: Id of the stored recipe to keep
+            others: Recipe dicts or ids to merge into it
+        
+        Returns:
+            keep_id
+        """
+        merged = dict(self.recipes[keep_id])
+        with self.batch():
+            for other in others:
+                recipe = self.recipes.get(other) if isinstance(other, str) else other
+                if recipe is None:
+                    continue
+                for key, value in recipe.items():
+                    if key not in ('id', 'possible_duplicates') and merged.get(key) in (None, "", [], {}):
+                        merged[key] = value
+                other_id = recipe.get('id')
+                if other_id != keep_id and self._current_summary(other_id) is not None:
+                    self.delete_recipe(other_id)
+            remaining = [rid for rid in merged.get('possible_duplicates', [])
+                         if rid != keep_id and rid in self.recipes]
+            if remaining:
+                merged['possible_duplicates'] = remaining
+            else:
+                merged.pop('possible_duplicates', None)
+            self.save_recipe(merged, duplicates=None)
+        return keep_id
+    
+    def merge_duplicate_groups(self, groups):
+        """
+        Merge each near-duplicate cluster into one recipe
+        
+        The recipe kept is a reviewed one if there is one, then the one
+        with the most ingredients, then the best rated.
+        
+        Args:
+            groups: Clusters from find_duplicate_groups()
+        
+        Returns:
+            List of (kept id, ids merged into it)
+        """
+        results = []
+        with self.batch():
+            for group in groups:
+                recipes = [self.recipes[rid] for rid in group["ids"] if rid in self.recipes]
+                if len(recipes) < 2:
+                    continue
+                recipes.sort(key=lambda r: (bool(r.get('needs_review')), -len(r.get('ingredients') or []),
+                                            -(r.get('rating') or 0), r['id']))
+                keep_id = recipes[0]['id']
+                self.merge_recipes(keep_id, recipes[1:])
+                results.append((keep_id, [r['id'] for r in recipes[1:]]))
+        return results
+    
+    @timed("manager.delete")
+    def delete_recipe(self, recipe_id):
+        """Delete a recipe; returns False if there was no such recipe"""
+        stats = self.stats
+        search_index = self.search_index
+        previous = self._current_summary(recipe_id)
+        if not self.storage.delete_recipe(recipe_id):
+            return False
+        if previous is not None:
+            stats.remove(previous)
+        self._ingredient_vectors.pop(recipe_id, None)
+        if self._duplicate_index is not None:
+            self._duplicate_index.remove(recipe_id)
+        
+        if self._batch_saved is not None:
+            self._batch_saved[recipe_id] = None
+            return True
+        
+        self._save_stats()
+        self._ingredient_index = None
+        if self._secondary_index is not None:
+            self._secondary_index.remove(recipe_id)
+        search_index.remove(recipe_id)
+        search_index.save(self.storage.recipe_fingerprint())
+        return True
+    
+    def recipes_added(self, start, end=None):
+        """
+        Summaries of recipes added in [start, end), oldest first
+        
+        Ids sort by creation time, so this is a range scan over ids; only
+        recipes still under a legacy id are checked by their created_date
+        (day precision), which means opening their files.
+        
+        Args:
+            start: datetime, date or Unix seconds
+            end: Same (default: until now)
+        """
+        summaries = self.summaries
+        # Legacy ids can sort inside the bounds too; they are checked below
+        results = [summaries[recipe_id] for recipe_id in self.storage.ids_between(*id_bounds(start, end))
+                   if recipe_id in summaries and is_time_id(recipe_id)]
+        legacy = [recipe_id for recipe_id in summaries if not is_time_id(recipe_id)]
+        if legacy:
+            first = _as_datetime(start).strftime('%Y-%m-%d')
+            last = _as_datetime(end).strftime('%Y-%m-%d') if end is not None else None
+            older = []
+            for recipe_id in legacy:
+                created = (self.recipes.get(recipe_id) or {}).get('created_date', '')[:10]
+                if created >= first and (last is None or created < last):
+                    older.append((created, recipe_id))
+            results[:0] = [summaries[recipe_id] for _, recipe_id in sorted(older)]
+        return results
+    
+    def migrate_ids(self):
+        """
+        Give recipes with a legacy id (8 hex digits) a time-sortable one
+        
+        The new id encodes the recipe's created_date, so recipes_added()
+        finds migrated recipes too; a recipe without one is dated by its
+        file's mtime (now, in SQLite), written into created_date as well. The body keeps the old id under
+        legacy_id, and id-aliases.json maps old to new, so old ids (in
+        meal plans, scripts, bookmarks) still resolve via
+        storage.resolve_id().
+        
+        Returns:
+            Dict of old id -> new id
+        """
+        taken = set()
+        
+        def exists(recipe_id):
+            return recipe_id in taken or self._current_summary(recipe_id) is not None
+        
+        renamed = {}
+        dated = {}      # old id -> created_date for recipes that had none
+        for old_id in [recipe_id for recipe_id in self.summaries if not is_time_id(recipe_id)]:
+            recipe = self.recipes.get(old_id)
+            if recipe is None:
+                continue
+            created = _created_time(recipe)
+            if created is None:
+                # Undated: the file's mtime (or now) goes into both the id and the body
+                stamp = self.storage.stamp(old_id)
+                created = datetime.fromtimestamp(stamp[0] / 1e9) if stamp else datetime.now()
+                dated[old_id] = created.strftime('%Y-%m-%d')
+            renamed[old_id] = new_id(exists=exists, timestamp=created)
+            taken.add(renamed[old_id])
+        if not renamed:
+            return renamed
+        
+        # Aliases first: until the batch lands, old ids still resolve to themselves
+        self.storage.aliases.update(renamed)
+        with self.batch():
+            for old_id, recipe_id in renamed.items():
+                recipe = dict(self.recipes[old_id], id=recipe_id, legacy_id=old_id)
+                if old_id in dated:
+                    recipe['created_date'] = dated[old_id]
+                if recipe.get('possible_duplicates'):
+                    recipe['possible_duplicates'] = [renamed.get(rid, rid) for rid in recipe['possible_duplicates']]
+                self.delete_recipe(old_id)
+                self.save_recipe(recipe, duplicates=None)
+        return renamed
+    
+    def create_from_photo(self, image_path, extracted_text):
+        """
+        Create recipe from extracted text
+        This would integrate with image analysis
+        """
+        # Placeholder - in reality would parse extracted_text
+        recipe = {
+            "name": "Extracted from photo",
+            "category": ["uncategorized"],
+            "prep_time_minutes": 30,
+            "cook_time_minutes": 30,
+            "total_time_minutes": 60,
+            "servings": 4,
+            "difficulty": "medium",
+            "source": "photo",
+            "source_details": image_path,
+            "ingredients": [],
+            "instructions": ["Instructions extracted from photo"],
+            "notes": "Automatically extracted from image",
+            "tags": ["photo-upload"],
+            "image_path": str(image_path),
+            "rating": 3,
+            "dietary": {
+                "vegetarian": False,
+                "vegan": False,
+                "gluten_free": False,
+                "dairy_free": False
+            }
+        }
+        
+        return self.save_recipe(recipe)
+    
+    @property
+    def households(self):
+        """Household profiles from households.json, or None if there is no such file"""
+        path = self.base_path / "households.json"
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    @timed("manager.plan")
+    def generate_meal_plan(self, days=7, preferences=None, seed=None, optimize=False,
+                           meals=None, households=None):
+        """
+        Generate a meal plan
+        
+        Args:
+            days: Number of days to plan (up to meal_planner.MAX_PLAN_DAYS)
+            preferences: Rule overrides, e.g. max_cooking_time, vegetarian_days,
+                leftover_nights, meals (see meal_planner.DEFAULT_RULES)
+            seed: Optional random seed for a reproducible plan
+            optimize: Prefer recipes that share ingredients, so the grocery
+                list is shorter and fewer perishables go half used
+            meals: Meal types per day, e.g. ["breakfast", "lunch", "dinner"]
+                (default: dinner)
+            households: Household profiles - name, servings, dietary flags,
+                meals (see meal_planner.household_profiles); default: those
+                in households.json, if any. Each household gets its own
+                meals, and their ingredients are scaled to its servings.
+        
+        Raises:
+            ValueError: days is out of range
+        """
+        from meal_planner import MealPlanSolver, household_profiles
+        if households is None:
+            households = self.households
+        solver = MealPlanSolver(self.summaries, preferences, seed=seed)
+        planned, warnings = solver.solve_plan(datetime.now(), days, meals, households, optimize=optimize)
+        for warning in warnings:
+            print(f"Warning: {warning}")
+        
+        meal_plan = {
+            "id": new_id(exists=lambda i: self.storage.load_meal_plan(i) is not None),
+            "start_date": datetime.now().strftime('%Y-%m-%d'),
+            "end_date": (datetime.now() + timedelta(days=days)).strftime('%Y-%m-%d'),
+            "days": days,
+            "meals": planned
+        }
+        if meals:
+            meal_plan["meals_per_day"] = list(meals)
+        if households:
+            meal_plan["households"] = household_profiles(households)
+        if warnings:
+            meal_plan["warnings"] = warnings
+        if solver.optimization is not None:
+            meal_plan["optimization"] = solver.optimization
+        
+        # Save meal plan
+        stats = self.stats
+        self.storage.save_meal_plan(meal_plan)
+        stats.meal_plans += 1
+        self._save_stats()
+        
+        return meal_plan
+    
+    @timed("manager.grocery")
+    def generate_grocery_list(self, meal_plan_id, use_pantry=True):
+        """
+        Generate grocery list from meal plan
+        
+        A plan has one list: generating it again rebuilds it under the
+        same id, and edits to the plan (swap_meal, add_meal, remove_meal)
+        update it in place.
+        
+        Args:
+            meal_plan_id: Meal plan to shop for
+            use_pantry: Leave out what the pantry already holds (listed
+                under "from_pantry" instead, or under "check_pantry" if it
+                is held in a unit that does not convert)
+        """
+        # Load meal plan
+        meal_plan = self.storage.load_meal_plan(meal_plan_id)
+        
+        if meal_plan is None:
+            return None
+        
+        # Sum the plan's cached per-recipe ingredient vectors in canonical units
+        from grocery import GroceryAggregator
+        aggregator = GroceryAggregator()
+        for meal in meal_plan["meals"]:
+            if _shops_for(meal):
+                aggregator.add_vector(self.ingredient_vector(meal["recipe_id"]), meal.get("scale", 1.0))
+        totals = aggregator.totals()
+        
+        list_id = meal_plan.get("grocery_list_id")
+        is_new = list_id is None or self.storage.load_grocery_list(list_id) is None
+        if is_new:
+            list_id = new_id(exists=lambda i: self.storage.load_grocery_list(i) is not None)
+        grocery_list = self._grocery_list(list_id, meal_plan_id, totals, use_pantry)
+        
+        # Save grocery list; the statistics are saved even when no count
+        # changed, so the rewrite does not look like an outside change
+        stats = self.stats
+        self.storage.save_grocery_list(grocery_list)
+        if is_new:
+            meal_plan["grocery_list_id"] = list_id
+            self.storage.save_meal_plan(meal_plan)
+            stats.grocery_lists += 1
+        self._save_stats()
+        
+        return grocery_list
+    
+    def _grocery_list(self, list_id, meal_plan_id, totals, use_pantry):
+        """Grocery list record for base-unit totals, netted against the pantry"""
+        from grocery import format_items, totals_to_json
+        to_buy, from_pantry, to_check = totals, {}, {}
+        if use_pantry and len(self.pantry):
+            from pantry import net_totals
+            to_buy, from_pantry, to_check = net_totals(totals, self.pantry)
+        
+        items = format_items(to_buy)
+        grocery_list = {
+            "id": list_id,
+            "meal_plan_id": meal_plan_id,
+            "generated_date": datetime.now().strftime('%Y-%m-%d'),
+            "items": items,
+            "total_items": len(items),
+            "use_pantry": use_pantry,
+            "totals": totals_to_json(totals)
+        }
+        if from_pantry:
+            grocery_list["from_pantry"] = format_items(from_pantry)
+        if to_check:
+            # On hand in another unit ("4 cloves garlic", 3 garlic at home)
+            check = format_items(to_check)
+            for item in check:
+                item["in_pantry"] = self.pantry.on_hand(item["name"])
+            grocery_list["check_pantry"] = check
+        return grocery_list
+    
+    @timed("manager.plan_edit")
+    def swap_meal(self, meal_plan_id, date, recipe_id, meal_type=None, household=None):
+        """
+        Put another recipe on a planned meal
+        
+        Leftover nights that reused the old recipe follow the new one, and
+        a meal cooked for a household is rescaled to the new recipe.
+        
+        Args:
+            meal_plan_id: Meal plan to edit
+            date: Day of the meal (YYYY-MM-DD)
+            recipe_id: Recipe to cook instead
+            meal_type: Which meal of the day (default: the first one)
+            household: Whose meal, in a plan for several households
+        
+        Returns:
+            The updated meal plan, or None if there is no such plan
+        """
+        meal_plan = self.storage.load_meal_plan(meal_plan_id)
+        if meal_plan is None:
+            return None
+        meals = meal_plan["meals"]
+        index = _find_meal(meals, date, meal_type, household)
+        meal = meals[index]
+        recipe_id, summary = self._plan_recipe(recipe_id)
+        
+        removed = []
+        followers = []
+        if _shops_for(meal):
+            removed.append((meal["recipe_id"], meal.get("scale", 1.0)))
+            followers = _leftovers_of(meals, index, meal["recipe_id"])
+        elif meal.get("leftovers"):
+            # Cooked fresh now: one household's portions, not a batch
+            del meal["leftovers"]
+            meal.pop("servings", None)
+            servings = _household_servings(meal_plan, meal)
+            if servings:
+                meal["servings"] = servings
+        meal.pop("skipped", None)
+        for changed in [meal] + followers:
+            changed.update(recipe_id=recipe_id, recipe_name=summary.get('name', ''))
+        if "servings" in meal:
+            from meal_planner import meal_scale
+            meal["scale"] = meal_scale(meal["servings"], summary.get('servings'))
+        
+        self._update_plan(meal_plan, removed, [(recipe_id, meal.get("scale", 1.0))])
+        return meal_plan
+    
+    @timed("manager.plan_edit")
+    def add_meal(self, meal_plan_id, date, recipe_id, meal_type="dinner", household=None,
+                 servings=None):
+        """
+        Add a meal to a plan (another meal on a planned day, or a new day)
+        
+        Args:
+            household: Who it is for, in a plan for several households
+            servings: Portions to cook (default: the household's servings);
+                the recipe's ingredients are scaled to them
+        
+        Returns:
+            The updated meal plan, or None if there is no such plan
+        """
+        meal_plan = self.storage.load_meal_plan(meal_plan_id)
+        if meal_plan is None:
+            return None
+        try:
+            day = datetime.strptime(date, '%Y-%m-%d').strftime('%A')
+        except ValueError:
+            raise ValueError(f"Not a date (YYYY-MM-DD): {date}")
+        recipe_id, summary = self._plan_recipe(recipe_id)
+        
+        meals = meal_plan["meals"]
+        meal = {"date": date, "day": day, "recipe_id": recipe_id,
+                "recipe_name": summary.get('name', ''), "meal_type": meal_type}
+        if household is not None:
+            meal["household"] = household
+        servings = servings or _household_servings(meal_plan, meal)
+        if servings:
+            from meal_planner import meal_scale
+            meal["servings"] = servings
+            meal["scale"] = meal_scale(servings, summary.get('servings'))
+        # After the day's other meals, so the plan stays in date order
+        index = len(meals)
+        while index and meals[index - 1]["date"] > date:
+            index -= 1
+        meals.insert(index, meal)
+        
+        self._update_plan(meal_plan, [], [(recipe_id, meal.get("scale", 1.0))])
+        return meal_plan
+    
+    @timed("manager.plan_edit")
+    def remove_meal(self, meal_plan_id, date, meal_type=None, household=None):
+        """
+        Take a meal out of a plan; leftover nights that reused it are emptied
+        
+        Returns:
+            The updated meal plan, or None if there is no such plan
+        """
+        meal_plan = self.storage.load_meal_plan(meal_plan_id)
+        if meal_plan is None:
+            return None
+        meals = meal_plan["meals"]
+        index = _find_meal(meals, date, meal_type, household)
+        meal = meals[index]
+        
+        removed = []
+        if _shops_for(meal):
+            removed.append((meal["recipe_id"], meal.get("scale", 1.0)))
+            for later in _leftovers_of(meals, index, meal["recipe_id"]):
+                later.pop("leftovers")
+                later.update(recipe_id=None, recipe_name="No meal planned")
+        del meals[index]
+        
+        self._update_plan(meal_plan, removed, [])
+        return meal_plan
+    
+    def _plan_recipe(self, recipe_id):
+        """(current id, summary) of a recipe to put on a plan"""
+        recipe_id = self.storage.resolve_id(recipe_id)
+        summary = self._current_summary(recipe_id)
+        if summary is None:
+            raise ValueError(f"Recipe not found: {recipe_id}")
+        return recipe_id, summary
+    
+    def _update_plan(self, meal_plan, removed, added):
+        """
+        Save an edited plan and apply the change to its grocery list
+        
+        The list's stored base-unit totals lose the removed recipes'
+        ingredient vectors and gain the added ones', so no other recipe
+        of the plan is read; the list keeps its id.
+        
+        Args:
+            removed, added: (recipe id, scale) of the meals that changed
+        """
+        # Synced before the writes and saved after them, so the statistics
+        # do not take the edit for an outside change and rebuild
+        self.stats
+        self.storage.save_meal_plan(meal_plan)
+        list_id = meal_plan.get("grocery_list_id")
+        grocery_list = self.storage.load_grocery_list(list_id) if list_id else None
+        if grocery_list is None:
+            self._save_stats()
+            return
+        if "totals" not in grocery_list:
+            # Saved before lists kept their totals (saves the statistics too)
+            self.generate_grocery_list(meal_plan["id"], grocery_list.get("use_pantry", True))
+            return
+        
+        from grocery import GroceryAggregator, totals_from_json
+        with span("grocery.delta"):
+            aggregator = GroceryAggregator()
+            aggregator.add_vector(totals_from_json(grocery_list["totals"]))
+            for recipe_id, scale in removed:
+                aggregator.add_vector(self.ingredient_vector(recipe_id), -scale)
+            for recipe_id, scale in added:
+                aggregator.add_vector(self.ingredient_vector(recipe_id), scale)
+            totals = aggregator.totals()
+            updated = self._grocery_list(list_id, meal_plan["id"], totals,
+                                         grocery_list.get("use_pantry", True))
+        updated["generated_date"] = grocery_list.get("generated_date", updated["generated_date"])
+        updated["updated_date"] = datetime.now().strftime('%Y-%m-%d')
+        self.storage.save_grocery_list(updated)
+        self._save_stats()
+    
+    def cook_from_pantry(self, limit=10):
+        """
+        Recipes to cook with what is on hand, best pantry coverage first
+        
+        Returns:
+            List of {"id", "name", "coverage", "have", "missing"} dicts
+        """
+        from pantry import cook_from_inventory
+        ids, matrix = self.ingredient_index
+        results = cook_from_inventory(matrix, ids, self.pantry, limit=limit)
+        summaries = self.summaries
+        for result in results:
+            result["name"] = summaries[result["id"]].get('name', '')
+        return results
+    
+    def list_recipes(self, category=None):
+        """List recipe summaries, optionally filtered by category"""
+        if category:
+            return self.summaries_for(self.secondary_index.category(category))
+        return list(self.summaries.values())
+    
+    def find_recipes(self, category=None, tag=None, max_total_time=None, min_rating=None,
+                     dietary=None, difficulty=None):
+        """Recipe summaries matching all given criteria (e.g. dietary="vegetarian")"""
+        bits = self.secondary_index.find(category=category, tag=tag, max_total_time=max_total_time,
+                                         min_rating=min_rating, dietary=dietary, difficulty=difficulty)
+        return self.summaries_for(bits)
+    
+    def summaries_for(self, bits):
+        """Recipe summaries for a secondary_index bitset"""
+        summaries = self.summaries
+        return [summaries[recipe_id] for recipe_id in self.secondary_index.ids_for(bits)
+                if recipe_id in summaries]
+    
+    @timed("manager.search")
+    def search_recipes(self, query, limit=None):
+        """
+        Full-text search over name, tags, categories, ingredients and instructions
+        
+        Args:
+            query: Terms are ANDed, "OR" separates alternatives, and every
+                term also matches as a prefix
+            limit: Maximum number of results
+            
+        Returns:
+            Recipe summaries, best match first, each with a "score"
+        """
+        results = []
+        for recipe_id, score in self.search_index.search(query, limit=limit):
+            # Looked up one by one, so a search never reads the whole catalog
+            summary = self.storage.summary(recipe_id)
+            if summary is not None:
+                results.append(dict(summary.to_dict(), score=round(score, 3)))
+        return results
+    
+    def get_stats(self):
+        """
+        Get database statistics
+        
+        Read from the running aggregates in self.stats, so no recipe is
+        opened: totals, averages, category/tag/dietary counts, rating and
+        difficulty distributions and total-time percentiles.
+        """
+        return self.stats.report()
+    
+    def get_categories(self):
+        """Get all unique categories"""
+        return sorted(self.stats.categories)
+    
+    def get_category_counts(self):
+        """Number of recipes per category"""
+        return dict(self.stats.categories)
+    
+    def get_avg_prep_time(self):
+        """Calculate average prep time"""
+        return self.stats.avg_prep_time()
+
+def _shops_for(meal):
+    """Whether a planned meal needs shopping (leftover nights reuse bought food)"""
+    return bool(meal.get("recipe_id")) and not meal.get("leftovers")
+
+def _find_meal(meals, date, meal_type=None, household=None):
+    """Index of the plan's meal on date (of meal_type and household, if given)"""
+    for index, meal in enumerate(meals):
+        if (meal["date"] == date and (meal_type is None or meal.get("meal_type") == meal_type)
+                and (household is None or meal.get("household") == household)):
+            return index
+    whose = f"{household}'s " if household else ""
+    raise ValueError(f"No {whose}{meal_type or 'meal'} planned on {date}")
+
+def _household_servings(meal_plan, meal):
+    """Servings of the household a meal is for, from the plan's profiles"""
+    for profile in meal_plan.get("households", []):
+        if profile["name"] == meal.get("household"):
+            return profile.get("servings")
+    return None
+
+def _leftovers_of(meals, index, recipe_id):
+    """Leftover meals right after meals[index] (same meal and household) that reuse its recipe"""
+    track = (meals[index].get("meal_type"), meals[index].get("household"))
+    result = []
+    for meal in meals[index + 1:]:
+        if (meal.get("meal_type"), meal.get("household")) != track:
+            continue
+        if not (meal.get("leftovers") and meal.get("recipe_id") == recipe_id):
+            break
+        result.append(meal)
+    return result
+
+def _as_datetime(moment):
+    if isinstance(moment, datetime):
+        return moment
+    if isinstance(moment, date):
+        return datetime(moment.year, moment.month, moment.day)
+    return datetime.fromtimestamp(moment)
+
+def _created_time(recipe):
+    """A recipe's created_date as a datetime, or None if it has no valid one"""
+    try:
+        return datetime.fromisoformat(recipe.get('created_date', ''))
+    except (TypeError, ValueError):
+        return None
+
+def main():
+    # Example usage
+    manager = RecipeManager("C:/Users/Home/.openclaw/workspace/recipes")
+    
+    print("=== Family Recipe Manager ===")
+    print(f"Loaded {len(manager.recipes)} recipes")
+    
+    if manager.recipes:
+        stats = manager.get_stats()
+        print(f"Categories: {', '.join(stats['categories'])}")
+        print(f"Average prep time: {stats['avg_prep_time']:.1f} minutes")
+        
+        # Example: Generate a meal plan
+        print("\nGenerating sample meal plan...")
+        meal_plan = manager.generate_meal_plan(days=5)
+        print(f"Created meal plan for {meal_plan['days']} days")
+        
+        # Example: Generate grocery list
+        grocery_list = manager.generate_grocery_list(meal_plan['id'])
+        print(f"Generated grocery list with {grocery_list['total_items']} items")
+    else:
+        print("No recipes yet. Add your first recipe!")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
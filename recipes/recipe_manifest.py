@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Recipe Manifest
+Persistent id -> file index so RecipeManager can start without parsing
+every recipe JSON in data/
+"""
+
+import json
+import os
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+
+from instrumentation import count, timed
+from recipe_model import SUMMARY_FIELDS, RecipeSummary, summarize_recipe
+
+MANIFEST_VERSION = 3     # 3: SQLite rows instead of one JSON document
+
+# Recipe bodies kept in memory; the rest stay on disk until opened again
+BODY_CACHE_SIZE = 256
+
+# SQL is kept in module constants so sqlite3's statement cache reuses the
+# prepared statements across calls
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+-- Bumped by every row write, so derived data (RecipeStats, SearchIndex)
+-- can tell whether the catalog changed, in-place edits included
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+CREATE TRIGGER IF NOT EXISTS files_insert_generation AFTER INSERT ON files
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'generation'; END;
+CREATE TRIGGER IF NOT EXISTS files_update_generation AFTER UPDATE ON files
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'generation'; END;
+CREATE TRIGGER IF NOT EXISTS files_delete_generation AFTER DELETE ON files
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'generation'; END;
+"""
+SQL_MANIFEST_META = "SELECT key, value FROM meta"
+SQL_SET_MANIFEST_META = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+SQL_MANIFEST_GENERATION = "SELECT value FROM meta WHERE key = 'generation'"
+SQL_ALL_FILES = "SELECT id, filename, mtime, size, summary FROM files"
+SQL_ALL_FILE_INFO = "SELECT id, filename, mtime, size FROM files"
+SQL_FILE = "SELECT filename, mtime, size FROM files WHERE id = ?"
+SQL_FILE_SUMMARY = "SELECT summary FROM files WHERE id = ?"
+SQL_FILE_IDS = "SELECT id FROM files"
+SQL_FILE_IDS_BETWEEN = "SELECT id FROM files WHERE id >= ? AND id <= ? ORDER BY id"
+SQL_COUNT_FILES = "SELECT COUNT(*) FROM files"
+SQL_PUT_FILE = "INSERT OR REPLACE INTO files (id, filename, mtime, size, summary) VALUES (?, ?, ?, ?, ?)"
+SQL_DELETE_FILE = "DELETE FROM files WHERE id = ?"
+SQL_CLEAR_FILES = "DELETE FROM files"
+
+
+def read_recipe_file(filepath):
+    """Parse one recipe JSON file"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        text = f.read()
+    count("files_read")
+    count("bytes_read", len(text))
+    return json.loads(text)
+
+
+def _summary_row(summary):
+    return json.dumps(summary.to_row(), ensure_ascii=False, separators=(',', ':'))
+
+
+class RecipeManifest:
+    """
+    On-disk manifest of the recipe data directory
+
+    Stores, per recipe id, the file it lives in, that file's mtime/size and
+    a small summary. Opening it stats every file in the data directory (no
+    file is read) and re-parses only files that are new or whose mtime or
+    size changed - an edit in place leaves the directory mtime alone, so
+    that cannot be trusted on its own.
+
+    The manifest is a SQLite file with one row per recipe. Looking up one
+    recipe (summary(), file_info()) is a point query, and update() and
+    remove() write one row, committed by save(). The whole catalog
+    (entries, files) is only read when something asks for it.
+    """
+
+    def __init__(self, data_path, manifest_path):
+        self.data_path = Path(data_path)
+        self.manifest_path = Path(manifest_path)
+        self._entries = None    # id -> RecipeSummary, once read
+        self._files = None      # id -> (filename, mtime_ns, size), once read
+        self.load_report = None     # recipe_loader.LoadReport of the last rescan
+        self.conn = None
+        self.load()
+
+    def _connect(self):
+        # Imported here so commands that never open the manifest don't load it
+        import sqlite3
+        self.manifest_path.parent.mkdir(exist_ok=True)
+        # Callers serialize writes (ocr_intake saves from executor threads
+        # under a lock), so the connection may move between threads
+        conn = sqlite3.connect(str(self.manifest_path), timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Rebuildable from data/, so a lost commit only costs a rescan
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(MANIFEST_SCHEMA)
+        return conn
+
+    @timed("manifest.load")
+    def load(self):
+        """Open the manifest and bring it in line with the data directory"""
+        import sqlite3
+        try:
+            self.conn = self._connect()
+            meta = dict(self.conn.execute(SQL_MANIFEST_META))
+        except sqlite3.DatabaseError:
+            # Unreadable: start over, data/ has everything
+            if self.conn is not None:
+                self.conn.close()
+            self.manifest_path.unlink(missing_ok=True)
+            self.conn = self._connect()
+            meta = {}
+
+        if (meta.get("version") != str(MANIFEST_VERSION)
+                or meta.get("fields") != json.dumps(SUMMARY_FIELDS)):
+            self.conn.execute(SQL_CLEAR_FILES)
+            self.conn.execute(SQL_SET_MANIFEST_META, ("version", str(MANIFEST_VERSION)))
+            self.conn.execute(SQL_SET_MANIFEST_META, ("fields", json.dumps(SUMMARY_FIELDS)))
+            self._entries = {}
+            self._files = {}
+        self.refresh()
+
+    def _read_all(self):
+        from recipe_loader import parse_json
+        rows = self.conn.execute(SQL_ALL_FILES).fetchall()
+        # One parse of all summary rows beats one call per row
+        summaries = parse_json("[" + ",".join(row[4] for row in rows) + "]")
+        self._files = {row[0]: row[1:4] for row in rows}
+        self._entries = {row[0]: RecipeSummary(row[0], *values) for row, values in zip(rows, summaries)}
+
+    @property
+    def entries(self):
+        """Summary per recipe id (the whole catalog, read on first use)"""
+        if self._entries is None:
+            self._read_all()
+        return self._entries
+
+    @property
+    def files(self):
+        """(filename, mtime_ns, size) per recipe id (read on first use, without the summaries)"""
+        if self._files is None:
+            self._files = {row[0]: row[1:] for row in self.conn.execute(SQL_ALL_FILE_INFO)}
+        return self._files
+
+    def summary(self, recipe_id):
+        """Summary of one recipe, or None"""
+        if self._entries is not None:
+            return self._entries.get(recipe_id)
+        row = self.conn.execute(SQL_FILE_SUMMARY, (recipe_id,)).fetchone()
+        return RecipeSummary(recipe_id, *json.loads(row[0])) if row else None
+
+    def file_info(self, recipe_id):
+        """(filename, mtime_ns, size) of one recipe, or None"""
+        if self._files is not None:
+            return self._files.get(recipe_id)
+        row = self.conn.execute(SQL_FILE, (recipe_id,)).fetchone()
+        return tuple(row) if row else None
+
+    def ids(self):
+        """Every recipe id, without reading summaries"""
+        if self._entries is not None:
+            return list(self._entries)
+        return [row[0] for row in self.conn.execute(SQL_FILE_IDS)]
+
+    def ids_between(self, low, high):
+        """Recipe ids with low <= id <= high, in order"""
+        return [row[0] for row in self.conn.execute(SQL_FILE_IDS_BETWEEN, (low, high))]
+
+    def __len__(self):
+        if self._entries is not None:
+            return len(self._entries)
+        return self.conn.execute(SQL_COUNT_FILES).fetchone()[0]
+
+    @timed("manifest.refresh")
+    def refresh(self):
+        """
+        Rescan the data directory
+
+        Every file is stat'ed, but only new files and files whose mtime or
+        size differ from their row are parsed, and only their rows (and
+        those of files that are gone) are written. Files that cannot be
+        parsed are left out and listed in load_report.
+
+        Returns:
+            True if any row changed
+        """
+        files = self.files
+        known = {info[0]: recipe_id for recipe_id, info in files.items()}
+        unchanged = set()
+        changed = {}    # path -> (filename, stat) of new or changed files
+
+        with os.scandir(self.data_path) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(".json") or not dir_entry.is_file():
+                    continue
+                stat = dir_entry.stat()
+                recipe_id = known.get(dir_entry.name)
+                if recipe_id is not None:
+                    _, mtime, size = files[recipe_id]
+                    if mtime == stat.st_mtime_ns and size == stat.st_size:
+                        unchanged.add(recipe_id)
+                        continue
+                changed[dir_entry.path] = (dir_entry.name, stat)
+
+        # Rows of changed files are dropped too: an edit may change the id
+        gone = [recipe_id for recipe_id in files if recipe_id not in unchanged]
+        if not gone and not changed:
+            return False
+        self.conn.executemany(SQL_DELETE_FILE, [(recipe_id,) for recipe_id in gone])
+        for recipe_id in gone:
+            del files[recipe_id]
+            if self._entries is not None:
+                self._entries.pop(recipe_id, None)
+
+        if changed:
+            # A cold start parses every file; spread that over workers
+            from recipe_loader import load_files
+            summaries, self.load_report = load_files(changed, summarize=True)
+            rows = []
+            for path, summary in summaries:
+                filename, stat = changed[path]
+                info = (filename, stat.st_mtime_ns, stat.st_size)
+                files[summary.id] = info
+                if self._entries is not None:
+                    self._entries[summary.id] = summary
+                rows.append((summary.id, *info, _summary_row(summary)))
+            self.conn.executemany(SQL_PUT_FILE, rows)
+        self.save()
+        return True
+
+    def update(self, recipe, filepath):
+        """Record a recipe that was just written to filepath (persisted by save())"""
+        filepath = Path(filepath)
+        stat = filepath.stat()
+        summary = summarize_recipe(recipe)
+        info = (filepath.name, stat.st_mtime_ns, stat.st_size)
+        self.conn.execute(SQL_PUT_FILE, (recipe['id'], *info, _summary_row(summary)))
+        if self._entries is not None:
+            self._entries[recipe['id']] = summary
+        if self._files is not None:
+            self._files[recipe['id']] = info
+
+    def remove(self, recipe_id):
+        """Forget a recipe (persisted by save())"""
+        self.conn.execute(SQL_DELETE_FILE, (recipe_id,))
+        if self._entries is not None:
+            self._entries.pop(recipe_id, None)
+        if self._files is not None:
+            self._files.pop(recipe_id, None)
+
+    def path_for(self, recipe_id):
+        """Path of the file holding recipe_id, or None"""
+        info = self.file_info(recipe_id)
+        if info is None:
+            return None
+        return self.data_path / info[0]
+
+    def generation(self):
+        """Row write counter (see MANIFEST_SCHEMA); changes whenever the catalog does"""
+        return int(self.conn.execute(SQL_MANIFEST_GENERATION).fetchone()[0])
+
+    def save(self):
+        """Commit the rows changed since the last save"""
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class LazyRecipes(MutableMapping):
+    """
+    Dict-like view of recipe bodies, loaded from disk on first access
+
+    Recipes are normally stored as data/<id>.json, so a single lookup never
+    needs the manifest. The most recently used bodies are cached together
+    with the file's mtime/size and re-parsed only when those change; the
+    cache is bounded, so walking the whole catalog does not keep every
+    body (instructions, OCR text, ...) resident.
+    """
+
+    def __init__(self, data_path, get_manifest):
+        self.data_path = Path(data_path)
+        self._get_manifest = get_manifest
+        self._manifest_loaded = False
+        self._cache = OrderedDict()     # id -> (mtime_ns, size, recipe), LRU order
+        self.pending = {}   # id -> recipe (None if deleted) queued by a storage batch
+
+    @property
+    def manifest(self):
+        self._manifest_loaded = True
+        return self._get_manifest()
+
+    def _locate(self, recipe_id):
+        if "/" not in recipe_id and "\\" not in recipe_id:
+            filepath = self.data_path / f"{recipe_id}.json"
+            try:
+                return filepath, filepath.stat()
+            except (OSError, ValueError):
+                pass
+
+        # Not stored under its own id - fall back to the manifest
+        filepath = self.manifest.path_for(recipe_id)
+        if filepath is None:
+            return None, None
+        try:
+            return filepath, filepath.stat()
+        except OSError:
+            return None, None
+
+    def __getitem__(self, recipe_id):
+        if not isinstance(recipe_id, str):
+            raise KeyError(recipe_id)
+        if recipe_id in self.pending:
+            recipe = self.pending[recipe_id]
+            if recipe is None:
+                raise KeyError(recipe_id)
+            return recipe
+
+        filepath, stat = self._locate(recipe_id)
+        if filepath is None:
+            raise KeyError(recipe_id)
+
+        cached = self._cache.get(recipe_id)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            self._cache.move_to_end(recipe_id)
+            return cached[2]
+
+        try:
+            recipe = read_recipe_file(filepath)
+        except Exception as e:
+            print(f"Error loading {filepath}: {e}")
+            raise KeyError(recipe_id)
+        if recipe.get('id') != recipe_id:
+            raise KeyError(recipe_id)
+
+        self._remember(recipe_id, stat, recipe)
+
+        # Keep an already-loaded manifest in step with edits made outside
+        if self._manifest_loaded:
+            manifest = self.manifest
+            if (manifest.file_info(recipe_id) or (None,))[1:] != (stat.st_mtime_ns, stat.st_size):
+                manifest.update(recipe, filepath)
+                manifest.save()
+        return recipe
+
+    def __setitem__(self, recipe_id, recipe):
+        filepath, stat = self._locate(recipe_id)
+        if stat is not None:
+            self._remember(recipe_id, stat, recipe)
+
+    def _remember(self, recipe_id, stat, recipe):
+        self._cache[recipe_id] = (stat.st_mtime_ns, stat.st_size, recipe)
+        self._cache.move_to_end(recipe_id)
+        if len(self._cache) > BODY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def __delitem__(self, recipe_id):
+        if self._cache.pop(recipe_id, None) is None and self.manifest.file_info(recipe_id) is None:
+            raise KeyError(recipe_id)
+
+    def __contains__(self, recipe_id):
+        if not isinstance(recipe_id, str):
+            return False
+        if recipe_id in self.pending:
+            return self.pending[recipe_id] is not None
+        return self._locate(recipe_id)[0] is not None
+
+    def __iter__(self):
+        return iter(self.manifest.ids())
+
+    def __len__(self):
+        return len(self.manifest)
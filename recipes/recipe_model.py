@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Recipe Model
+Compact in-memory records for the recipe catalog.
+
+The catalog (manifest / SQLite summaries) keeps one RecipeSummary per
+recipe instead of a dict: a __slots__ object whose category, tag and
+difficulty strings are interned and whose category/tag tuples are shared
+between recipes, so 100k recipes hold one copy of ("dinner", "pasta").
+Summaries read like the dicts they replace (summary['name'],
+summary.get('category', [])); full bodies - ingredient quantities,
+instructions, OCR text - stay on disk until a recipe is opened. Only the
+normalized ingredient names are kept, for plans that share ingredients.
+"""
+
+import sys
+from collections.abc import Mapping
+
+from units import normalize_name
+
+# Fields copied into the catalog - enough for list/search/plan without
+# opening the recipe file itself
+SUMMARY_FIELDS = [
+    "name",
+    "category",
+    "tags",
+    "prep_time_minutes",
+    "cook_time_minutes",
+    "total_time_minutes",
+    "servings",
+    "difficulty",
+    "rating",
+    "dietary",
+    "ingredient_names",
+]
+
+# Bumped whenever SUMMARY_FIELDS changes; stored summaries from an older
+# version are rebuilt from the recipe bodies
+SUMMARY_VERSION = 2
+
+DIETARY_FLAGS = ["vegetarian", "vegan", "gluten_free", "dairy_free"]
+
+_intern = sys.intern
+_shared_tuples = {}
+_FIELDS = frozenset(["id"] + SUMMARY_FIELDS)
+# Attribute holding each field; dietary is kept packed (see _pack_dietary)
+_ROW_SLOTS = ["_dietary" if field == "dietary" else field for field in SUMMARY_FIELDS]
+
+
+def intern_tuple(values):
+    """One shared tuple of interned strings per distinct list of labels"""
+    key = tuple(_intern(v) if isinstance(v, str) else v for v in values)
+    return _shared_tuples.setdefault(key, key)
+
+
+def _pack_dietary(dietary):
+    """
+    Dietary flags as an int: low nibble = flag values, high nibble = which
+    flags are present. Dicts with other keys are kept as they are.
+    """
+    if not isinstance(dietary, dict):
+        return dietary
+    packed = 0
+    for bit, flag in enumerate(DIETARY_FLAGS):
+        if flag in dietary:
+            packed |= (16 | bool(dietary[flag])) << bit
+    if len(dietary) != bin(packed >> 4).count("1"):
+        return dietary
+    return packed
+
+
+def _unpack_dietary(packed):
+    if not isinstance(packed, int):
+        return packed
+    return {flag: bool(packed & (1 << bit))
+            for bit, flag in enumerate(DIETARY_FLAGS) if packed & (16 << bit)}
+
+
+class RecipeSummary(Mapping):
+    """
+    Read-only catalog entry for one recipe
+
+    Behaves like the summary dict it replaces: missing fields are absent
+    keys, category/tags are sequences and dietary is a dict of flags.
+    """
+
+    __slots__ = ("id", "name", "category", "tags", "prep_time_minutes", "cook_time_minutes",
+                 "total_time_minutes", "servings", "difficulty", "rating", "_dietary",
+                 "ingredient_names")
+
+    def __init__(self, id, name=None, category=None, tags=None, prep_time_minutes=None,
+                 cook_time_minutes=None, total_time_minutes=None, servings=None,
+                 difficulty=None, rating=None, dietary=None, ingredient_names=None):
+        # Positional order matches SUMMARY_FIELDS, so manifest rows unpack directly
+        self.id = id
+        self.name = name
+        self.category = intern_tuple(category) if isinstance(category, list) else category
+        self.tags = intern_tuple(tags) if isinstance(tags, list) else tags
+        self.prep_time_minutes = prep_time_minutes
+        self.cook_time_minutes = cook_time_minutes
+        self.total_time_minutes = total_time_minutes
+        self.servings = servings
+        self.difficulty = _intern(difficulty) if isinstance(difficulty, str) else difficulty
+        self.rating = rating
+        self._dietary = _pack_dietary(dietary)
+        # Combinations rarely repeat, so only the names themselves are shared
+        self.ingredient_names = (tuple(_intern(n) for n in ingredient_names)
+                                 if isinstance(ingredient_names, list) else ingredient_names)
+
+    @classmethod
+    def from_dict(cls, recipe):
+        """Summary of a full recipe (or of a summary dict)"""
+        summary = cls(recipe["id"], *(recipe.get(field) for field in SUMMARY_FIELDS))
+        if summary.ingredient_names is None and recipe.get("ingredients"):
+            summary.ingredient_names = ingredient_names(recipe)
+        return summary
+
+    def get(self, key, default=None):
+        if key == "dietary":
+            value = self._dietary
+            return default if value is None else _unpack_dietary(value)
+        value = getattr(self, key) if key in _FIELDS else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        if key == "dietary":
+            return self._dietary is not None
+        return key in _FIELDS and getattr(self, key) is not None
+
+    def __iter__(self):
+        yield "id"
+        for field in SUMMARY_FIELDS:
+            if field in self:
+                yield field
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_row(self):
+        """Values in SUMMARY_FIELDS order as stored (dietary packed); RecipeSummary(id, *row) restores it"""
+        return [getattr(self, slot) for slot in _ROW_SLOTS]
+
+    def to_dict(self):
+        """Plain dict, e.g. for JSON"""
+        return {key: (list(value) if isinstance(value, tuple) else value)
+                for key, value in self.items()}
+
+    def __repr__(self):
+        return f"RecipeSummary({self.id!r}, {self.name!r})"
+
+
+def ingredient_names(recipe):
+    """Distinct normalized ingredient names of a full recipe, in recipe order"""
+    names = {}
+    for ingredient in recipe.get("ingredients", []):
+        if isinstance(ingredient, dict):
+            name = normalize_name(ingredient.get("name", ""))
+            if name:
+                names[_intern(name)] = None
+    return tuple(names)
+
+
+def summarize_recipe(recipe):
+    """Extract the catalog summary of a full recipe"""
+    return RecipeSummary.from_dict(recipe)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Recipe Statistics
+Running aggregates over the recipe catalog - counts, sums for averages,
+category/tag histograms, rating, difficulty and dietary distributions and
+a total-time histogram for percentiles - updated on every save and delete
+instead of being recomputed from all recipes.
+
+The aggregates are persisted next to the other derived files in .index/
+together with the storage fingerprint they were computed at; when the
+fingerprint no longer matches (recipes changed behind the manager's back)
+they are rebuilt once from the catalog summaries.
+"""
+
+import json
+from pathlib import Path
+
+from recipe_journal import atomic_write_json
+from secondary_index import recipe_time
+
+STATS_VERSION = 1
+
+# Fields averaged over the recipes that have them
+NUMERIC_FIELDS = ["prep_time_minutes", "cook_time_minutes", "total_time_minutes", "servings"]
+
+PERCENTILES = [25, 50, 75, 90]
+
+
+def _bump(histogram, key, sign):
+    """Add sign to one histogram bucket, dropping buckets that reach zero"""
+    count = histogram.get(key, 0) + sign
+    if count > 0:
+        histogram[key] = count
+    else:
+        histogram.pop(key, None)
+
+
+class RecipeStats:
+    """
+    Incrementally maintained catalog statistics
+
+    add() and remove() are O(labels of one recipe); reading the
+    statistics never touches the recipes themselves.
+    """
+
+    def __init__(self, stats_file):
+        self.stats_file = Path(stats_file)
+        self.fingerprint = None
+        self.reset()
+        self.load()
+
+    def reset(self):
+        self.total = 0
+        self.sums = {field: [0, 0] for field in NUMERIC_FIELDS}   # field -> [sum, count]
+        self.categories = {}
+        self.tags = {}
+        self.ratings = {}
+        self.difficulties = {}
+        self.dietary = {}
+        self.times = {}     # total time in minutes -> recipes
+        self.meal_plans = 0
+        self.grocery_lists = 0
+
+    def load(self):
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != STATS_VERSION:
+                raise ValueError("stats version mismatch")
+            self.total = data["total"]
+            self.sums = data["sums"]
+            self.categories = data["categories"]
+            self.tags = data["tags"]
+            self.dietary = data["dietary"]
+            # Numeric keys are stored as pairs so they come back as numbers
+            self.ratings = {key: count for key, count in data["ratings"]}
+            self.difficulties = data["difficulties"]
+            self.times = {key: count for key, count in data["times"]}
+            self.meal_plans = data["meal_plans"]
+            self.grocery_lists = data["grocery_lists"]
+            self.fingerprint = data["fingerprint"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.reset()
+            self.fingerprint = None
+
+    def save(self, fingerprint=None):
+        """Write the statistics; fingerprint is the storage state they describe"""
+        if fingerprint is not None:
+            self.fingerprint = fingerprint
+        data = {
+            "version": STATS_VERSION,
+            "fingerprint": self.fingerprint,
+            "total": self.total,
+            "sums": self.sums,
+            "categories": self.categories,
+            "tags": self.tags,
+            "dietary": self.dietary,
+            "ratings": list(self.ratings.items()),
+            "difficulties": self.difficulties,
+            "times": list(self.times.items()),
+            "meal_plans": self.meal_plans,
+            "grocery_lists": self.grocery_lists
+        }
+        self.stats_file.parent.mkdir(exist_ok=True)
+        atomic_write_json(self.stats_file, data, indent=None, durable=False)
+
+    def sync(self, storage):
+        """
+        Rebuild from the storage backend if it changed since the last save
+
+        Returns:
+            True if the statistics were rebuilt
+        """
+        fingerprint = storage.fingerprint()
+        if fingerprint == self.fingerprint:
+            return False
+        self.rebuild(storage.summaries().values(), storage.count_meal_plans(),
+                     storage.count_grocery_lists())
+        self.fingerprint = fingerprint
+        return True
+
+    def rebuild(self, summaries, meal_plans=0, grocery_lists=0):
+        """Recompute everything from recipe summaries"""
+        self.reset()
+        for summary in summaries:
+            self.add(summary)
+        self.meal_plans = meal_plans
+        self.grocery_lists = grocery_lists
+
+    def _count(self, summary, sign):
+        self.total += sign
+        for field in NUMERIC_FIELDS:
+            value = summary.get(field)
+            if isinstance(value, (int, float)):
+                totals = self.sums[field]
+                totals[0] += sign * value
+                totals[1] += sign
+        for category in summary.get('category', []):
+            _bump(self.categories, category, sign)
+        for tag in summary.get('tags', []):
+            _bump(self.tags, tag, sign)
+        for flag, value in summary.get('dietary', {}).items():
+            if value:
+                _bump(self.dietary, flag, sign)
+        if summary.get('rating') is not None:
+            _bump(self.ratings, summary['rating'], sign)
+        if summary.get('difficulty') is not None:
+            _bump(self.difficulties, summary['difficulty'], sign)
+        minutes = recipe_time(summary)
+        if minutes is not None:
+            _bump(self.times, minutes, sign)
+
+    def add(self, summary):
+        """Count one recipe summary"""
+        self._count(summary, 1)
+
+    def remove(self, summary):
+        """Stop counting a recipe summary that was previously added"""
+        self._count(summary, -1)
+
+    def replace(self, old, new):
+        """Count a re-saved recipe: old summary out (if any), new one in"""
+        if old is not None:
+            self.remove(old)
+        self.add(new)
+
+    def average(self, field):
+        """Average of a numeric field over the recipes that have it"""
+        value_sum, count = self.sums[field]
+        return value_sum / count if count else 0
+
+    def avg_prep_time(self):
+        """Average prep time over all recipes, missing times counting as 0"""
+        return self.sums["prep_time_minutes"][0] / self.total if self.total else 0
+
+    def avg_rating(self):
+        rated = sum(self.ratings.values())
+        return sum(r * n for r, n in self.ratings.items()) / rated if rated else 0
+
+    def time_percentiles(self, percentiles=PERCENTILES):
+        """Total-time percentiles (nearest rank) from the time histogram"""
+        known = sum(self.times.values())
+        if not known:
+            return {}
+        result = {}
+        ranks = sorted(percentiles)
+        seen = 0
+        minutes = sorted(self.times)
+        i = 0
+        for p in ranks:
+            rank = max(1, -(-p * known // 100))
+            while seen + self.times[minutes[i]] < rank:
+                seen += self.times[minutes[i]]
+                i += 1
+            result[p] = minutes[i]
+        return result
+
+    def report(self):
+        """Everything as one dictionary (see RecipeManager.get_stats)"""
+        by_count = lambda histogram: dict(sorted(histogram.items(), key=lambda kv: (-kv[1], str(kv[0]))))
+        return {
+            "total_recipes": self.total,
+            "categories": sorted(self.categories),
+            "avg_prep_time": self.avg_prep_time(),
+            "meal_plans_count": self.meal_plans,
+            "grocery_lists_count": self.grocery_lists,
+            "averages": {field: self.average(field) for field in NUMERIC_FIELDS},
+            "avg_rating": self.avg_rating(),
+            "category_counts": by_count(self.categories),
+            "tag_counts": by_count(self.tags),
+            "dietary_counts": by_count(self.dietary),
+            "rating_distribution": dict(sorted(self.ratings.items(), reverse=True)),
+            "difficulty_distribution": by_count(self.difficulties),
+            "total_time_percentiles": self.time_percentiles()
+        }
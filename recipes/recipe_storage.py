@@ -0,0 +1,853 @@
+#!/usr/bin/env python3
+"""
+Recipe Storage
+Pluggable storage backends for RecipeManager:
+- JsonStorage: one JSON file per recipe / meal plan / grocery list (original layout)
+- SQLiteStorage: single-file SQLite database with indexed columns
+
+The JSON directory layout doubles as the import/export format; see
+migrate_json_to_sqlite() and export_sqlite_to_json().
+"""
+
+import json
+import os
+import sys
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from instrumentation import count, span
+from recipe_ids import IdAliases
+from recipe_journal import WriteJournal, atomic_write_json, sync_directory, sync_files
+from recipe_manifest import LazyRecipes, RecipeManifest, read_recipe_file
+from recipe_model import DIETARY_FLAGS, SUMMARY_VERSION, RecipeSummary, summarize_recipe
+
+
+def _matches(summary, category=None, tag=None, max_total_time=None, min_rating=None, dietary=None):
+    """Check a recipe summary against find() criteria"""
+    if category and category not in summary.get('category', []):
+        return False
+    if tag and tag not in summary.get('tags', []):
+        return False
+    if max_total_time is not None and summary.get('total_time_minutes', 0) > max_total_time:
+        return False
+    if min_rating is not None and summary.get('rating', 0) < min_rating:
+        return False
+    if dietary and not summary.get('dietary', {}).get(dietary, False):
+        return False
+    return True
+
+
+class JsonStorage:
+    """
+    Recipes, meal plans and grocery lists as individual JSON files
+
+    Files are replaced atomically. Inside batch() writes are queued, then
+    journaled and applied together when the block ends.
+    """
+
+    name = "json"
+
+    def __init__(self, base_path):
+        self.base_path = Path(base_path)
+        self.data_path = self.base_path / "data"
+        self.meal_plans_path = self.base_path / "meal-plans"
+        self.grocery_lists_path = self.base_path / "grocery-lists"
+        self.index_path = self.base_path / ".index"
+
+        self.data_path.mkdir(exist_ok=True)
+        self.meal_plans_path.mkdir(exist_ok=True)
+        self.grocery_lists_path.mkdir(exist_ok=True)
+
+        # Bodies are read on demand; the manifest is only opened once
+        # something needs the whole catalog
+        self._manifest = None
+        self.recipes = LazyRecipes(self.data_path, lambda: self.manifest)
+        self.aliases = IdAliases(self.base_path / "id-aliases.json")
+
+        # Operations queued by an open batch(), and the plans/lists among
+        # them so they can be read back before the batch is flushed
+        self._batch = None
+        self._batch_records = {}
+        # Not under .index/: unlike the indexes it cannot be rebuilt
+        self.journal = WriteJournal(self.base_path / ".journal.ndjson")
+        self._replay_journal()
+
+    @property
+    def manifest(self):
+        """Recipe manifest (id -> file + summary), loaded on first use"""
+        if self._manifest is None:
+            # Superseded by manifest.db (MANIFEST_VERSION 3)
+            (self.index_path / "manifest.json").unlink(missing_ok=True)
+            self._manifest = RecipeManifest(self.data_path, self.index_path / "manifest.db")
+        return self._manifest
+
+    def summaries(self):
+        """Recipe summaries keyed by id"""
+        return self.manifest.entries
+
+    def stamps(self):
+        """Change stamp per recipe id ([mtime_ns, size] of its file)"""
+        return {recipe_id: [info[1], info[2]] for recipe_id, info in self.manifest.files.items()}
+
+    def stamp(self, recipe_id):
+        info = self.manifest.file_info(recipe_id)
+        return [info[1], info[2]] if info else None
+
+    def summary(self, recipe_id):
+        """Summary of one recipe, or None"""
+        return self.manifest.summary(recipe_id)
+
+    def ids_between(self, low, high):
+        """Recipe ids with low <= id <= high, in order (see recipe_ids.id_bounds)"""
+        return self.manifest.ids_between(low, high)
+
+    def resolve_id(self, recipe_id):
+        """Current id of a recipe, following renames by RecipeManager.migrate_ids()"""
+        if recipe_id in self.recipes:
+            return recipe_id
+        return self.aliases.get(recipe_id) or recipe_id
+
+    def fingerprint(self):
+        """
+        Cheap marker of the stored state, for derived data such as
+        RecipeStats: the manifest's write counter for recipes (opening the
+        manifest stats every recipe file, so edits in place count), and
+        the directory mtimes, which change whenever a file is added,
+        replaced through a rename or removed
+        """
+        return [self.recipe_fingerprint()] + [os.stat(path).st_mtime_ns for path in (
+            self.data_path, self.meal_plans_path, self.grocery_lists_path)]
+
+    def recipe_fingerprint(self):
+        """Like fingerprint(), for recipes only (meal plans and lists do not change it)"""
+        return self.manifest.generation()
+
+    def watch_fingerprint(self):
+        """
+        Like fingerprint(), for a process that keeps the manifest open (the
+        CLI server): the recipe files are re-stat'ed first, so edits in
+        place bump the manifest's counter, and every meal plan and grocery
+        list file is stamped ([name, mtime_ns, size]) as well
+        """
+        self.manifest.refresh()
+        stamps = []
+        for path in (self.meal_plans_path, self.grocery_lists_path):
+            with os.scandir(path) as it:
+                for entry in it:
+                    stat = entry.stat()
+                    stamps.append([entry.name, stat.st_mtime_ns, stat.st_size])
+        return self.fingerprint() + sorted(stamps)
+
+    def _apply(self, operation, durable=True):
+        """Carry out one storage operation; returns the file written, if any"""
+        op = operation["op"]
+        if op == "put_recipe":
+            filepath = self.data_path / f"{operation['record']['id']}.json"
+        elif op == "put_meal_plan":
+            filepath = self.meal_plans_path / f"meal-plan-{operation['record']['id']}.json"
+        elif op == "put_grocery_list":
+            filepath = self.grocery_lists_path / f"grocery-list-{operation['record']['id']}.json"
+        elif op == "delete_recipe":
+            (self.data_path / operation["file"]).unlink(missing_ok=True)
+            if durable:
+                sync_directory(self.data_path)
+            return None
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+
+        atomic_write_json(filepath, operation["record"], durable=durable)
+        return filepath
+
+    def _record(self, operation):
+        """Apply an operation now, or queue it if a batch is open"""
+        if self._batch is None:
+            return self._apply(operation)
+        self._batch.append(operation)
+        return None
+
+    def _replay_journal(self):
+        """Finish a batch that was journaled but maybe not fully applied"""
+        operations = self.journal.pending()
+        if operations:
+            print(f"Replaying {len(operations)} journaled writes")
+            written = [self._apply(operation, durable=False) for operation in operations]
+            sync_files([path for path in written if path is not None], [self.data_path])
+            # The manifest notices the rewritten files by their stamps when it opens
+        self.journal.clear()
+
+    @contextmanager
+    def batch(self):
+        """
+        Group writes into one journaled flush
+
+        Recipe bodies, meal plans and grocery lists written in the block
+        can be read back straight away; summaries and counts catch up when
+        the block ends. If the block raises, its writes are discarded.
+        """
+        if self._batch is not None:
+            yield self
+            return
+
+        # Open the manifest first so the flush updates it instead of
+        # rescanning every file the batch wrote
+        manifest = self.manifest
+        self._batch = []
+        try:
+            yield self
+            operations = self._batch
+        finally:
+            self._batch = None
+            self._batch_records = {}
+            self.recipes.pending.clear()
+
+        if not operations:
+            return
+        with span("json.batch_flush"):
+            self.journal.commit(operations)
+            written = []
+            for operation in operations:
+                filepath = self._apply(operation, durable=False)
+                if filepath is not None:
+                    written.append(filepath)
+                if operation["op"] == "put_recipe":
+                    self.recipes[operation["record"]["id"]] = operation["record"]
+                    manifest.update(operation["record"], filepath)
+                elif operation["op"] == "delete_recipe":
+                    self.recipes.pop(operation["id"], None)
+                    manifest.remove(operation["id"])
+            deleted = any(operation["op"] == "delete_recipe" for operation in operations)
+            sync_files(written, [self.data_path] if deleted else ())
+            manifest.save()
+            self.journal.clear()
+
+    def put_recipe(self, recipe):
+        """Write a recipe and record it in the manifest"""
+        filepath = self._record({"op": "put_recipe", "record": recipe})
+        if filepath is None:
+            self.recipes.pending[recipe['id']] = recipe
+            return
+
+        self.recipes[recipe['id']] = recipe
+        self.manifest.update(recipe, filepath)
+        self.manifest.save()
+
+    def delete_recipe(self, recipe_id):
+        """Remove a recipe file; returns False if it did not exist"""
+        if recipe_id not in self.recipes:
+            return False
+        filepath = self.manifest.path_for(recipe_id) or self.data_path / f"{recipe_id}.json"
+        self._record({"op": "delete_recipe", "id": recipe_id, "file": filepath.name})
+        if self._batch is not None:
+            self.recipes.pending[recipe_id] = None
+            return True
+
+        self.recipes.pop(recipe_id, None)
+        self.manifest.remove(recipe_id)
+        self.manifest.save()
+        return True
+
+    def iter_recipes(self, offset=0):
+        """
+        Yield every recipe body, in file name order
+
+        Args:
+            offset: Skip this many files first (to resume an export)
+        """
+        names = sorted(entry.name for entry in os.scandir(self.data_path)
+                       if entry.name.endswith(".json") and entry.is_file())
+        for name in names[offset:]:
+            json_file = self.data_path / name
+            try:
+                yield read_recipe_file(json_file)
+            except Exception as e:
+                print(f"Error loading {json_file}: {e}")
+
+    def load_recipes(self):
+        """
+        Every recipe body at once, read in parallel (see recipe_loader)
+
+        Returns:
+            (dict of recipes by id, LoadReport listing unreadable files)
+        """
+        from recipe_loader import load_files
+        paths = sorted(entry.path for entry in os.scandir(self.data_path)
+                       if entry.name.endswith(".json") and entry.is_file())
+        loaded, report = load_files(paths)
+        return {recipe['id']: recipe for _, recipe in loaded}, report
+
+    @property
+    def load_report(self):
+        """LoadReport of the manifest's last rescan, or None if none ran in this process"""
+        return self._manifest.load_report if self._manifest is not None else None
+
+    def find(self, category=None, tag=None, max_total_time=None, min_rating=None, dietary=None):
+        """Summaries matching all of the given criteria"""
+        return [s for s in self.summaries().values()
+                if _matches(s, category, tag, max_total_time, min_rating, dietary)]
+
+    def category_counts(self):
+        """Number of recipes per category"""
+        counts = {}
+        for summary in self.summaries().values():
+            for category in summary.get('category', []):
+                counts[category] = counts.get(category, 0) + 1
+        return counts
+
+    def avg_prep_time(self):
+        """Average prep_time_minutes over all recipes"""
+        times = [s.get('prep_time_minutes', 0) for s in self.summaries().values()]
+        return sum(times) / len(times) if times else 0
+
+    def save_meal_plan(self, meal_plan):
+        self._record({"op": "put_meal_plan", "record": meal_plan})
+        if self._batch is not None:
+            self._batch_records[("meal_plan", meal_plan['id'])] = meal_plan
+
+    def load_meal_plan(self, meal_plan_id):
+        if ("meal_plan", meal_plan_id) in self._batch_records:
+            return self._batch_records[("meal_plan", meal_plan_id)]
+        filepath = self.meal_plans_path / f"meal-plan-{meal_plan_id}.json"
+        if not filepath.exists():
+            return None
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def iter_meal_plans(self):
+        for json_file in self.meal_plans_path.glob("*.json"):
+            with open(json_file, 'r', encoding='utf-8') as f:
+                yield json.load(f)
+
+    def count_meal_plans(self):
+        return len(list(self.meal_plans_path.glob("*.json")))
+
+    def save_grocery_list(self, grocery_list):
+        self._record({"op": "put_grocery_list", "record": grocery_list})
+        if self._batch is not None:
+            self._batch_records[("grocery_list", grocery_list['id'])] = grocery_list
+
+    def load_grocery_list(self, grocery_list_id):
+        if ("grocery_list", grocery_list_id) in self._batch_records:
+            return self._batch_records[("grocery_list", grocery_list_id)]
+        filepath = self.grocery_lists_path / f"grocery-list-{grocery_list_id}.json"
+        if not filepath.exists():
+            return None
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def iter_grocery_lists(self):
+        for json_file in self.grocery_lists_path.glob("*.json"):
+            with open(json_file, 'r', encoding='utf-8') as f:
+                yield json.load(f)
+
+    def count_grocery_lists(self):
+        return len(list(self.grocery_lists_path.glob("*.json")))
+
+    def close(self):
+        if self._manifest is not None:
+            self._manifest.close()
+
+
+# SQL is kept in module constants so sqlite3's statement cache reuses the
+# prepared statements across calls
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    prep_time INTEGER,
+    cook_time INTEGER,
+    total_time INTEGER,
+    servings INTEGER,
+    difficulty TEXT,
+    rating INTEGER,
+    vegetarian INTEGER NOT NULL DEFAULT 0,
+    vegan INTEGER NOT NULL DEFAULT 0,
+    gluten_free INTEGER NOT NULL DEFAULT 0,
+    dairy_free INTEGER NOT NULL DEFAULT 0,
+    created_date TEXT,
+    summary TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recipe_categories (
+    recipe_id TEXT NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    PRIMARY KEY (recipe_id, category)
+);
+CREATE TABLE IF NOT EXISTS recipe_tags (
+    recipe_id TEXT NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (recipe_id, tag)
+);
+CREATE TABLE IF NOT EXISTS meal_plans (
+    id TEXT PRIMARY KEY,
+    start_date TEXT,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS grocery_lists (
+    id TEXT PRIMARY KEY,
+    meal_plan_id TEXT,
+    generated_date TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_categories_category ON recipe_categories(category);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON recipe_tags(tag);
+CREATE INDEX IF NOT EXISTS idx_recipes_total_time ON recipes(total_time);
+CREATE INDEX IF NOT EXISTS idx_recipes_prep_time ON recipes(prep_time);
+CREATE INDEX IF NOT EXISTS idx_recipes_rating ON recipes(rating);
+CREATE INDEX IF NOT EXISTS idx_recipes_vegetarian ON recipes(vegetarian);
+CREATE INDEX IF NOT EXISTS idx_recipes_vegan ON recipes(vegan);
+CREATE INDEX IF NOT EXISTS idx_recipes_gluten_free ON recipes(gluten_free);
+CREATE INDEX IF NOT EXISTS idx_recipes_dairy_free ON recipes(dairy_free);
+CREATE INDEX IF NOT EXISTS idx_grocery_lists_plan ON grocery_lists(meal_plan_id);
+
+-- Bumped by every write, including ones made outside SQLiteStorage, so
+-- derived data (RecipeStats) can tell whether it is still current
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+CREATE TRIGGER IF NOT EXISTS recipes_insert_generation AFTER INSERT ON recipes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'generation'; END;
+CREATE TRIGGER IF NOT EXISTS recipes_update_generation AFTER UPDATE ON recipes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'generation'; END;
+CREATE TRIGGER IF NOT EXISTS recipes_delete_generation AFTER DELETE ON recipes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'generation'; END;
+CREATE TRIGGER IF NOT EXISTS meal_plans_insert_generation AFTER INSERT ON meal_plans
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'generation'; END;
+CREATE TRIGGER IF NOT EXISTS meal_plans_delete_generation AFTER DELETE ON meal_plans
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'generation'; END;
+CREATE TRIGGER IF NOT EXISTS grocery_lists_insert_generation AFTER INSERT ON grocery_lists
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'generation'; END;
+CREATE TRIGGER IF NOT EXISTS grocery_lists_delete_generation AFTER DELETE ON grocery_lists
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'generation'; END;
+-- Recipe writes only, for derived data that ignores plans and lists (SearchIndex)
+INSERT OR IGNORE INTO meta (key, value) VALUES ('recipe_generation', 0);
+CREATE TRIGGER IF NOT EXISTS recipes_insert_recipe_generation AFTER INSERT ON recipes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'recipe_generation'; END;
+CREATE TRIGGER IF NOT EXISTS recipes_update_recipe_generation AFTER UPDATE ON recipes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'recipe_generation'; END;
+CREATE TRIGGER IF NOT EXISTS recipes_delete_recipe_generation AFTER DELETE ON recipes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'recipe_generation'; END;
+"""
+
+SQL_UPSERT_RECIPE = """
+INSERT OR REPLACE INTO recipes (
+    id, name, prep_time, cook_time, total_time, servings, difficulty, rating,
+    vegetarian, vegan, gluten_free, dairy_free, created_date, summary, body
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_DELETE_CATEGORIES = "DELETE FROM recipe_categories WHERE recipe_id = ?"
+SQL_DELETE_TAGS = "DELETE FROM recipe_tags WHERE recipe_id = ?"
+SQL_INSERT_CATEGORY = "INSERT OR IGNORE INTO recipe_categories (recipe_id, category) VALUES (?, ?)"
+SQL_INSERT_TAG = "INSERT OR IGNORE INTO recipe_tags (recipe_id, tag) VALUES (?, ?)"
+SQL_DELETE_RECIPE = "DELETE FROM recipes WHERE id = ?"
+SQL_GET_RECIPE = "SELECT body FROM recipes WHERE id = ?"
+SQL_GET_SUMMARY = "SELECT summary FROM recipes WHERE id = ?"
+SQL_GENERATION = "SELECT value FROM meta WHERE key = 'generation'"
+SQL_RECIPE_GENERATION = "SELECT value FROM meta WHERE key = 'recipe_generation'"
+SQL_SUMMARY_VERSION = "SELECT value FROM meta WHERE key = 'summary_version'"
+SQL_SET_SUMMARY_VERSION = "INSERT OR REPLACE INTO meta (key, value) VALUES ('summary_version', ?)"
+SQL_BODIES_AFTER = "SELECT id, body FROM recipes WHERE id > ? ORDER BY id LIMIT ?"
+SQL_UPDATE_SUMMARY = "UPDATE recipes SET summary = ? WHERE id = ?"
+SQL_HAS_RECIPE = "SELECT 1 FROM recipes WHERE id = ?"
+SQL_RECIPE_IDS = "SELECT id FROM recipes"
+SQL_IDS_BETWEEN = "SELECT id FROM recipes WHERE id >= ? AND id <= ? ORDER BY id"
+SQL_COUNT_RECIPES = "SELECT COUNT(*) FROM recipes"
+SQL_ALL_RECIPES = "SELECT body FROM recipes ORDER BY id LIMIT -1 OFFSET ?"
+SQL_SUMMARIES = "SELECT id, summary FROM recipes"
+SQL_CATEGORY_COUNTS = "SELECT category, COUNT(*) FROM recipe_categories GROUP BY category"
+SQL_AVG_PREP_TIME = "SELECT AVG(COALESCE(prep_time, 0)) FROM recipes"
+SQL_UPSERT_MEAL_PLAN = "INSERT OR REPLACE INTO meal_plans (id, start_date, body) VALUES (?, ?, ?)"
+SQL_GET_MEAL_PLAN = "SELECT body FROM meal_plans WHERE id = ?"
+SQL_ALL_MEAL_PLANS = "SELECT body FROM meal_plans"
+SQL_COUNT_MEAL_PLANS = "SELECT COUNT(*) FROM meal_plans"
+SQL_UPSERT_GROCERY_LIST = """
+INSERT OR REPLACE INTO grocery_lists (id, meal_plan_id, generated_date, body) VALUES (?, ?, ?, ?)
+"""
+SQL_GET_GROCERY_LIST = "SELECT body FROM grocery_lists WHERE id = ?"
+SQL_ALL_GROCERY_LISTS = "SELECT body FROM grocery_lists"
+SQL_COUNT_GROCERY_LISTS = "SELECT COUNT(*) FROM grocery_lists"
+
+
+class SQLiteRecipes(Mapping):
+    """Read-only dict-like view of recipe bodies stored in SQLite"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __getitem__(self, recipe_id):
+        row = self.conn.execute(SQL_GET_RECIPE, (recipe_id,)).fetchone()
+        if row is None:
+            raise KeyError(recipe_id)
+        count("rows_read")
+        count("bytes_read", len(row[0]))
+        return json.loads(row[0])
+
+    def __contains__(self, recipe_id):
+        return self.conn.execute(SQL_HAS_RECIPE, (recipe_id,)).fetchone() is not None
+
+    def __iter__(self):
+        return iter([row[0] for row in self.conn.execute(SQL_RECIPE_IDS)])
+
+    def __len__(self):
+        return self.conn.execute(SQL_COUNT_RECIPES).fetchone()[0]
+
+
+class SQLiteStorage:
+    """All recipes, meal plans and grocery lists in one SQLite file"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path):
+        # Imported here so the default JSON store never loads it
+        import sqlite3
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self.recipes = SQLiteRecipes(self.conn)
+        self.aliases = IdAliases(self.db_path.parent / "id-aliases.json")
+        self._summaries = None
+        self._in_batch = False
+        self._upgrade_summaries()
+
+    def _upgrade_summaries(self, chunk_size=1000):
+        """Rebuild summaries stored before the current SUMMARY_FIELDS"""
+        row = self.conn.execute(SQL_SUMMARY_VERSION).fetchone()
+        if row is not None and row[0] >= SUMMARY_VERSION:
+            return
+        with self.conn:
+            last_id = ""
+            while True:
+                rows = self.conn.execute(SQL_BODIES_AFTER, (last_id, chunk_size)).fetchall()
+                if not rows:
+                    break
+                self.conn.executemany(SQL_UPDATE_SUMMARY, [
+                    (json.dumps(summarize_recipe(json.loads(body)).to_dict(), ensure_ascii=False),
+                     recipe_id)
+                    for recipe_id, body in rows])
+                last_id = rows[-1][0]
+            self.conn.execute(SQL_SET_SUMMARY_VERSION, (SUMMARY_VERSION,))
+
+    def _transaction(self):
+        """Commit per call, unless a batch() transaction is already open"""
+        return nullcontext() if self._in_batch else self.conn
+
+    @contextmanager
+    def batch(self):
+        """Run every write in the block as one transaction"""
+        if self._in_batch:
+            yield self
+            return
+
+        self._in_batch = True
+        try:
+            with self.conn:
+                yield self
+        except BaseException:
+            # Rolled back: drop summaries cached from uncommitted writes
+            self._summaries = None
+            raise
+        finally:
+            self._in_batch = False
+
+    def summaries(self):
+        """Recipe summaries keyed by id"""
+        if self._summaries is None:
+            with span("sqlite.load_summaries"):
+                self._summaries = {row[0]: RecipeSummary.from_dict(json.loads(row[1]))
+                                   for row in self.conn.execute(SQL_SUMMARIES)}
+        return self._summaries
+
+    def stamps(self):
+        """Change stamp per recipe id; every write goes through this class,
+        so ids alone are enough"""
+        return {row[0]: None for row in self.conn.execute(SQL_RECIPE_IDS)}
+
+    def stamp(self, recipe_id):
+        return None
+
+    def summary(self, recipe_id):
+        """Summary of one recipe, or None"""
+        if self._summaries is not None:
+            return self._summaries.get(recipe_id)
+        row = self.conn.execute(SQL_GET_SUMMARY, (recipe_id,)).fetchone()
+        return RecipeSummary.from_dict(json.loads(row[0])) if row else None
+
+    def ids_between(self, low, high):
+        """Recipe ids with low <= id <= high, in order - a primary key range scan"""
+        return [row[0] for row in self.conn.execute(SQL_IDS_BETWEEN, (low, high))]
+
+    def resolve_id(self, recipe_id):
+        """Current id of a recipe, following renames by RecipeManager.migrate_ids()"""
+        if recipe_id in self.recipes:
+            return recipe_id
+        return self.aliases.get(recipe_id) or recipe_id
+
+    def fingerprint(self):
+        """Write counter maintained by triggers (see SCHEMA)"""
+        return self.conn.execute(SQL_GENERATION).fetchone()[0]
+
+    def recipe_fingerprint(self):
+        """Like fingerprint(), counting recipe writes only"""
+        return self.conn.execute(SQL_RECIPE_GENERATION).fetchone()[0]
+
+    def watch_fingerprint(self):
+        """Every write, in place or not, goes through the triggers: same as fingerprint()"""
+        return self.fingerprint()
+
+    def _write_recipe(self, recipe):
+        dietary = recipe.get('dietary', {})
+        summary = summarize_recipe(recipe)
+        body = json.dumps(recipe, ensure_ascii=False)
+        count("rows_written")
+        count("bytes_written", len(body))
+        self.conn.execute(SQL_UPSERT_RECIPE, (
+            recipe['id'],
+            recipe.get('name', ''),
+            recipe.get('prep_time_minutes'),
+            recipe.get('cook_time_minutes'),
+            recipe.get('total_time_minutes'),
+            recipe.get('servings'),
+            recipe.get('difficulty'),
+            recipe.get('rating'),
+            *(int(bool(dietary.get(flag, False))) for flag in DIETARY_FLAGS),
+            recipe.get('created_date'),
+            json.dumps(summary.to_dict(), ensure_ascii=False),
+            body
+        ))
+        self.conn.execute(SQL_DELETE_CATEGORIES, (recipe['id'],))
+        self.conn.execute(SQL_DELETE_TAGS, (recipe['id'],))
+        self.conn.executemany(SQL_INSERT_CATEGORY,
+                              [(recipe['id'], c) for c in recipe.get('category', [])])
+        self.conn.executemany(SQL_INSERT_TAG,
+                              [(recipe['id'], t) for t in recipe.get('tags', [])])
+        if self._summaries is not None:
+            self._summaries[recipe['id']] = summary
+
+    def put_recipe(self, recipe):
+        """Insert or replace a recipe"""
+        with self._transaction():
+            self._write_recipe(recipe)
+
+    def put_recipes(self, recipes):
+        """Insert many recipes in a single transaction"""
+        written = 0
+        with self._transaction():
+            for recipe in recipes:
+                self._write_recipe(recipe)
+                written += 1
+        return written
+
+    def delete_recipe(self, recipe_id):
+        """Remove a recipe; returns False if it did not exist"""
+        with self._transaction():
+            deleted = self.conn.execute(SQL_DELETE_RECIPE, (recipe_id,)).rowcount
+        if self._summaries is not None:
+            self._summaries.pop(recipe_id, None)
+        return deleted > 0
+
+    def iter_recipes(self, offset=0):
+        """
+        Yield every recipe body, in id order
+
+        Args:
+            offset: Skip this many recipes first (to resume an export)
+        """
+        for row in self.conn.execute(SQL_ALL_RECIPES, (offset,)):
+            yield json.loads(row[0])
+
+    def load_recipes(self):
+        """
+        Every recipe body at once
+
+        Returns:
+            (dict of recipes by id, LoadReport)
+        """
+        from recipe_loader import LoadReport, parse_json
+        report = LoadReport()
+        recipes = {}
+        for row in self.conn.execute(SQL_ALL_RECIPES, (0,)):
+            recipe = parse_json(row[0])
+            recipes[recipe['id']] = recipe
+        report.loaded = len(recipes)
+        return recipes, report
+
+    # Rows are validated on write, so there is nothing to report
+    load_report = None
+
+    def find(self, category=None, tag=None, max_total_time=None, min_rating=None, dietary=None):
+        """Summaries matching all of the given criteria, via indexed columns"""
+        clauses = []
+        params = []
+        if category:
+            clauses.append("id IN (SELECT recipe_id FROM recipe_categories WHERE category = ?)")
+            params.append(category)
+        if tag:
+            clauses.append("id IN (SELECT recipe_id FROM recipe_tags WHERE tag = ?)")
+            params.append(tag)
+        if max_total_time is not None:
+            clauses.append("COALESCE(total_time, 0) <= ?")
+            params.append(max_total_time)
+        if min_rating is not None:
+            clauses.append("COALESCE(rating, 0) >= ?")
+            params.append(min_rating)
+        if dietary:
+            if dietary not in DIETARY_FLAGS:
+                return []
+            clauses.append(f"{dietary} = 1")
+
+        sql = "SELECT summary FROM recipes"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return [RecipeSummary.from_dict(json.loads(row[0])) for row in self.conn.execute(sql, params)]
+
+    def category_counts(self):
+        """Number of recipes per category"""
+        return dict(self.conn.execute(SQL_CATEGORY_COUNTS).fetchall())
+
+    def avg_prep_time(self):
+        """Average prep_time_minutes over all recipes"""
+        return self.conn.execute(SQL_AVG_PREP_TIME).fetchone()[0] or 0
+
+    def save_meal_plan(self, meal_plan, commit=True):
+        self.conn.execute(SQL_UPSERT_MEAL_PLAN, (
+            meal_plan['id'], meal_plan.get('start_date'), json.dumps(meal_plan, ensure_ascii=False)))
+        if commit and not self._in_batch:
+            self.conn.commit()
+
+    def load_meal_plan(self, meal_plan_id):
+        row = self.conn.execute(SQL_GET_MEAL_PLAN, (meal_plan_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_meal_plans(self):
+        for row in self.conn.execute(SQL_ALL_MEAL_PLANS):
+            yield json.loads(row[0])
+
+    def count_meal_plans(self):
+        return self.conn.execute(SQL_COUNT_MEAL_PLANS).fetchone()[0]
+
+    def save_grocery_list(self, grocery_list, commit=True):
+        self.conn.execute(SQL_UPSERT_GROCERY_LIST, (
+            grocery_list['id'], grocery_list.get('meal_plan_id'), grocery_list.get('generated_date'),
+            json.dumps(grocery_list, ensure_ascii=False)))
+        if commit and not self._in_batch:
+            self.conn.commit()
+
+    def load_grocery_list(self, grocery_list_id):
+        row = self.conn.execute(SQL_GET_GROCERY_LIST, (grocery_list_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_grocery_lists(self):
+        for row in self.conn.execute(SQL_ALL_GROCERY_LISTS):
+            yield json.loads(row[0])
+
+    def count_grocery_lists(self):
+        return self.conn.execute(SQL_COUNT_GROCERY_LISTS).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def open_storage(base_path, storage="json"):
+    """
+    Open a storage backend
+
+    Args:
+        base_path: Recipe base directory
+        storage: "json", "sqlite", or an already constructed backend
+
+    Returns:
+        Storage backend instance
+    """
+    if not isinstance(storage, str):
+        return storage
+    if storage == "json":
+        return JsonStorage(base_path)
+    if storage == "sqlite":
+        return SQLiteStorage(Path(base_path) / "recipes.db")
+    raise ValueError(f"Unknown storage backend: {storage}")
+
+
+def migrate_json_to_sqlite(base_path, db_path=None):
+    """
+    Bulk import the JSON directories (data/, meal-plans/, grocery-lists/)
+    into a SQLite database
+
+    Returns:
+        Dictionary with counts of migrated records
+    """
+    source = JsonStorage(base_path)
+    target = SQLiteStorage(db_path or Path(base_path) / "recipes.db")
+    try:
+        recipes = target.put_recipes(source.iter_recipes())
+        meal_plans = 0
+        grocery_lists = 0
+        with target.conn:
+            for meal_plan in source.iter_meal_plans():
+                target.save_meal_plan(meal_plan, commit=False)
+                meal_plans += 1
+            for grocery_list in source.iter_grocery_lists():
+                target.save_grocery_list(grocery_list, commit=False)
+                grocery_lists += 1
+    finally:
+        target.close()
+
+    return {"recipes": recipes, "meal_plans": meal_plans, "grocery_lists": grocery_lists}
+
+
+def export_sqlite_to_json(db_path, base_path):
+    """
+    Write every record of a SQLite database back out as the JSON directory
+    layout
+
+    Returns:
+        Dictionary with counts of exported records
+    """
+    source = SQLiteStorage(db_path)
+    target = JsonStorage(base_path)
+    counts = {"recipes": 0, "meal_plans": 0, "grocery_lists": 0}
+    try:
+        # One journaled flush and manifest save instead of one per record
+        with target.batch():
+            for recipe in source.iter_recipes():
+                target.put_recipe(recipe)
+                counts["recipes"] += 1
+            for meal_plan in source.iter_meal_plans():
+                target.save_meal_plan(meal_plan)
+                counts["meal_plans"] += 1
+            for grocery_list in source.iter_grocery_lists():
+                target.save_grocery_list(grocery_list)
+                counts["grocery_lists"] += 1
+    finally:
+        source.close()
+
+    return counts
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("migrate", "export"):
+        print("Usage:")
+        print("  recipe_storage.py migrate <recipes_dir> [db_file]   JSON folders -> SQLite")
+        print("  recipe_storage.py export <db_file> <recipes_dir>    SQLite -> JSON folders")
+        return
+
+    if sys.argv[1] == "migrate":
+        db_path = sys.argv[3] if len(sys.argv) > 3 else None
+        counts = migrate_json_to_sqlite(sys.argv[2], db_path)
+    else:
+        if len(sys.argv) < 4:
+            print("Error: Please provide the target recipes directory")
+            return
+        counts = export_sqlite_to_json(sys.argv[2], sys.argv[3])
+
+    print(f"Recipes: {counts['recipes']}")
+    print(f"Meal plans: {counts['meal_plans']}")
+    print(f"Grocery lists: {counts['grocery_lists']}")
+
+
+if __name__ == "__main__":
+    main()
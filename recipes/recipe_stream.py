@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Recipe Streams
+Streaming export and import of recipe collections as NDJSON (one recipe
+per line), optionally gzip or zstd compressed, with constant memory.
+
+The compression is picked from the file name: .gz for gzip, .zst for
+zstd (needs Python 3.14+ or the zstandard package), anything else is
+plain text; "-" means stdin/stdout. Both directions take an offset so an
+interrupted run can be resumed where it stopped.
+"""
+
+import gzip
+import json
+import sys
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+COMPRESSED_SUFFIXES = {".gz", ".zst"}
+IMPORT_BATCH_SIZE = 2000
+
+
+def is_stream_path(path):
+    """True for NDJSON files (compressed or not) and "-"""
+    if str(path) == "-":
+        return True
+    suffixes = Path(path).suffixes
+    if suffixes and suffixes[-1] in COMPRESSED_SUFFIXES:
+        suffixes = suffixes[:-1]
+    return bool(suffixes) and suffixes[-1] in NDJSON_SUFFIXES
+
+
+def open_stream(path, mode="r"):
+    """
+    Open a text stream, compressed according to the file name
+
+    Args:
+        path: File path, or "-" for stdin/stdout
+        mode: "r", "w" or "a"
+
+    Returns:
+        Text file object
+    """
+    if str(path) == "-":
+        stream = sys.stdin if mode == "r" else sys.stdout
+        # Don't let the caller's with-block close the process streams
+        return open(stream.fileno(), "r" if mode == "r" else "w", encoding='utf-8', closefd=False)
+
+    suffix = Path(path).suffix
+    if suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding='utf-8', compresslevel=6)
+    if suffix == ".zst":
+        if zstd is None:
+            raise ValueError("zstd needs Python 3.14+ or the zstandard package; use .gz instead")
+        return zstd.open(path, mode + "t", encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def export_ndjson(storage, path, offset=0, append=False):
+    """
+    Write every recipe as one JSON line
+
+    Args:
+        storage: Storage backend (RecipeManager.storage)
+        path: Output file (see open_stream)
+        offset: Skip this many recipes (resume a previous export)
+        append: Add to an existing file instead of replacing it; the
+            default when resuming
+
+    Returns:
+        Dictionary with the number exported and the offset to resume from
+    """
+    exported = 0
+    mode = "a" if append or offset else "w"
+    try:
+        with open_stream(path, mode) as f:
+            for recipe in storage.iter_recipes(offset):
+                f.write(json.dumps(recipe, ensure_ascii=False, separators=(',', ':')))
+                f.write("\n")
+                exported += 1
+    except KeyboardInterrupt:
+        print(f"Export interrupted; resume with offset {offset + exported}")
+        raise
+    return {"exported": exported, "next_offset": offset + exported}
+
+
+def export_json(storage, path, total=None):
+    """
+    Write the legacy single-file export ({"export_date", "total_recipes",
+    "recipes": [...]}) one recipe at a time
+
+    Returns:
+        Number of recipes exported
+    """
+    exported = 0
+    with open_stream(path, "w") as f:
+        f.write('{\n  "export_date": %s,\n' % json.dumps(datetime.now().strftime('%Y-%m-%d')))
+        if total is not None:
+            f.write(f'  "total_recipes": {total},\n')
+        f.write('  "recipes": [')
+        for recipe in storage.iter_recipes():
+            f.write(",\n    " if exported else "\n    ")
+            f.write(json.dumps(recipe, ensure_ascii=False))
+            exported += 1
+        f.write("\n  ]\n}\n")
+    return exported
+
+
+def iter_ndjson(path, offset=0, errors=None):
+    """
+    Yield (line number, recipe) from an NDJSON stream
+
+    Args:
+        path: Input file (see open_stream)
+        offset: Skip this many lines first
+        errors: Optional list that receives {"line", "error"} for bad lines
+    """
+    with open_stream(path, "r") as f:
+        for line_number, line in enumerate(islice(f, offset, None), offset + 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                recipe = json.loads(line)
+                if not isinstance(recipe, dict):
+                    raise ValueError("not a JSON object")
+            except ValueError as e:
+                if errors is not None:
+                    errors.append({"line": line_number, "error": str(e)})
+                continue
+            yield line_number, recipe
+
+
+def iter_json_dir(directory, offset=0, errors=None):
+    """Yield (position, recipe) for the *.json files of a directory, in name order"""
+    files = sorted(p for p in Path(directory).glob("*.json") if p.is_file())
+    for position, json_file in enumerate(files[offset:], offset + 1):
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                recipe = json.load(f)
+            if not isinstance(recipe, dict):
+                raise ValueError("not a JSON object")
+        except (OSError, ValueError) as e:
+            if errors is not None:
+                errors.append({"file": str(json_file), "error": str(e)})
+            continue
+        yield position, recipe
+
+
+def import_recipes(manager, source, offset=0, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Add recipes from an NDJSON stream or a directory of JSON files
+
+    Recipes are saved in manager.batch() groups of batch_size, so only one
+    group is held in memory and each group is one storage flush.
+
+    Args:
+        manager: RecipeManager
+        source: NDJSON file / "-" or a directory
+        offset: Lines (or files) to skip, to resume an interrupted import
+        batch_size: Recipes per batch
+
+    Returns:
+        Report with counts, errors and the offset to resume from
+    """
+    errors = []
+    if Path(source).is_dir():
+        records = iter_json_dir(source, offset, errors)
+    else:
+        records = iter_ndjson(source, offset, errors)
+
+    report = {"added": 0, "failed": 0, "next_offset": offset, "errors": errors}
+    try:
+        while True:
+            chunk = list(islice(records, batch_size))
+            if not chunk:
+                break
+            with manager.batch():
+                for position, recipe in chunk:
+                    manager.save_recipe(recipe)
+            report["added"] += len(chunk)
+            report["next_offset"] = chunk[-1][0]
+    except KeyboardInterrupt:
+        # The unfinished batch was discarded, so resume after the last flushed one
+        print(f"Import interrupted; resume with offset {report['next_offset']}")
+        raise
+
+    report["failed"] = len(errors)
+    return report
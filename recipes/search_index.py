@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Recipe Search Index
+Persisted inverted index over recipe name, tags, categories, ingredient
+names and instructions, with BM25 ranking and prefix matching
+
+The index is a SQLite file with one row per (term, recipe), so saving or
+deleting a recipe writes that recipe's rows and nothing else. Each term
+also keeps its document frequency and the largest term frequency and
+smallest recipe length among its postings - an upper bound on any score it
+can give - so a search with a limit stops reading prefix expansions once
+none of the rest could reach the results.
+"""
+
+import heapq
+import json
+import math
+import re
+from itertools import islice
+from pathlib import Path
+
+INDEX_VERSION = 2     # 2: SQLite postings instead of one JSON document
+
+# Matches in the name count more than matches deep in the instructions
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "tags": 2.0,
+    "category": 2.0,
+    "ingredients": 1.5,
+    "instructions": 1.0,
+}
+
+# Recipes whose rows add_many() writes together
+ADD_CHUNK = 2000
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "into", "is", "it", "of", "on", "or", "the", "then", "to", "until",
+    "with",
+}
+
+# SQL is kept in module constants so sqlite3's statement cache reuses the
+# prepared statements across calls
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    recipe_id TEXT NOT NULL,
+    tf REAL NOT NULL,
+    length REAL NOT NULL,
+    PRIMARY KEY (term, recipe_id)
+) WITHOUT ROWID;
+-- max_tf and min_length only ever widen, so they stay valid bounds after removals
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL,
+    max_tf REAL NOT NULL,
+    min_length REAL NOT NULL
+) WITHOUT ROWID;
+-- terms: the recipe's index terms, space separated, so removing it is a few point deletes
+CREATE TABLE IF NOT EXISTS docs (
+    recipe_id TEXT PRIMARY KEY,
+    length REAL NOT NULL,
+    stamp TEXT NOT NULL,
+    terms TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+SQL_INDEX_META = "SELECT key, value FROM meta"
+SQL_SET_INDEX_META = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+SQL_CLEAR = "DELETE FROM postings; DELETE FROM terms; DELETE FROM docs; DELETE FROM meta;"
+SQL_DOC = "SELECT length, terms FROM docs WHERE recipe_id = ?"
+SQL_DOC_STAMPS = "SELECT recipe_id, stamp FROM docs"
+SQL_PUT_DOC = "INSERT OR REPLACE INTO docs (recipe_id, length, stamp, terms) VALUES (?, ?, ?, ?)"
+SQL_DELETE_DOC = "DELETE FROM docs WHERE recipe_id = ?"
+SQL_PUT_POSTING = "INSERT OR REPLACE INTO postings (term, recipe_id, tf, length) VALUES (?, ?, ?, ?)"
+SQL_DELETE_POSTING = "DELETE FROM postings WHERE term = ? AND recipe_id = ?"
+SQL_ADD_TERM = """
+INSERT INTO terms (term, df, max_tf, min_length) VALUES (?, ?, ?, ?)
+ON CONFLICT (term) DO UPDATE SET df = df + excluded.df, max_tf = max(max_tf, excluded.max_tf),
+    min_length = min(min_length, excluded.min_length)
+"""
+SQL_DROP_TERM = "UPDATE terms SET df = df - 1 WHERE term = ?"
+SQL_DELETE_UNUSED_TERM = "DELETE FROM terms WHERE term = ? AND df <= 0"
+SQL_TERM = "SELECT term, df, max_tf, min_length FROM terms WHERE term = ?"
+SQL_TERMS_PREFIXED = "SELECT term, df, max_tf, min_length FROM terms WHERE term >= ? AND term < ?"
+# BM25 of each posting of one term: weight * tf / (tf + K1 * (1 - B + B * length / avg))
+SQL_TERM_TOP = """
+SELECT recipe_id, ? * tf / (tf + ? + ? * length) AS score FROM postings
+WHERE term = ? ORDER BY score DESC, recipe_id LIMIT ?
+"""
+
+
+def tokenize(text):
+    """Lowercase text and split it into index terms"""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def recipe_terms(recipe):
+    """Weighted term frequencies for one recipe"""
+    fields = {
+        "name": [recipe.get('name', '')],
+        "tags": recipe.get('tags', []),
+        "category": recipe.get('category', []),
+        "ingredients": [i.get('name', '') for i in recipe.get('ingredients', [])],
+        "instructions": recipe.get('instructions', []),
+    }
+    terms = {}
+    for field, values in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for value in values:
+            for term in tokenize(str(value)):
+                terms[term] = terms.get(term, 0) + weight
+    return terms
+
+
+def parse_query(query):
+    """
+    Split a query into OR-groups of AND-terms
+
+    "chicken rice OR beef" -> [["chicken", "rice"], ["beef"]]
+    """
+    groups = []
+    current = []
+    for word in query.split():
+        if word == "OR":
+            if current:
+                groups.append(current)
+            current = []
+            continue
+        current.extend(tokenize(word))
+    if current:
+        groups.append(current)
+    return groups
+
+
+class SearchIndex:
+    """
+    Inverted index: term -> (recipe_id, weighted term frequency) rows in SQLite
+
+    Each indexed recipe also remembers the storage stamp it was built from,
+    so sync() only re-reads recipes that were added or changed behind the
+    manager's back - and only looks once the storage's recipe fingerprint
+    differs from the one the index was saved at.
+    """
+
+    def __init__(self, index_file):
+        self.index_file = Path(index_file)
+        self.conn = None
+        self.n_docs = 0
+        self.total_length = 0.0
+        self.fingerprint = None
+        self.load()
+
+    def _connect(self):
+        import sqlite3
+        self.index_file.parent.mkdir(exist_ok=True)
+        # Written from the thread that saves a recipe (ocr_intake uses executor threads)
+        conn = sqlite3.connect(self.index_file, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Rebuildable from storage, so a lost commit only costs a resync
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.executescript(INDEX_SCHEMA)
+        return conn
+
+    def load(self):
+        import sqlite3
+        try:
+            self.conn = self._connect()
+            meta = dict(self.conn.execute(SQL_INDEX_META))
+        except sqlite3.DatabaseError:
+            # Unreadable: start over, storage has everything
+            if self.conn is not None:
+                self.conn.close()
+            self.index_file.unlink(missing_ok=True)
+            self.conn = self._connect()
+            meta = {}
+
+        if meta.get("version") != str(INDEX_VERSION):
+            self.conn.executescript(SQL_CLEAR)
+            self.conn.execute(SQL_SET_INDEX_META, ("version", str(INDEX_VERSION)))
+            self.conn.commit()
+            meta = {}
+        self.n_docs = int(meta.get("n_docs", 0))
+        self.total_length = float(meta.get("total_length", 0.0))
+        self.fingerprint = json.loads(meta["fingerprint"]) if meta.get("fingerprint") else None
+
+    def save(self, fingerprint=None):
+        """Commit the rows changed since the last save; fingerprint is the storage state they describe"""
+        if fingerprint is not None:
+            self.fingerprint = fingerprint
+        self.conn.executemany(SQL_SET_INDEX_META, [
+            ("n_docs", str(self.n_docs)),
+            ("total_length", repr(self.total_length)),
+            ("fingerprint", json.dumps(self.fingerprint)),
+        ])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def sync(self, storage):
+        """
+        Bring the index in line with a storage backend
+
+        Returns:
+            True if anything changed
+        """
+        fingerprint = storage.recipe_fingerprint()
+        if fingerprint == self.fingerprint:
+            return False
+        self.fingerprint = fingerprint
+
+        current = storage.stamps()
+        indexed = {recipe_id: json.loads(stamp) for recipe_id, stamp in self.conn.execute(SQL_DOC_STAMPS)}
+        stale = [rid for rid, stamp in indexed.items() if current.get(rid, False) != stamp]
+        for recipe_id in stale:
+            self.remove(recipe_id)
+            del indexed[recipe_id]
+
+        added = ((storage.recipes.get(recipe_id), stamp)
+                 for recipe_id, stamp in current.items() if recipe_id not in indexed)
+        self.add_many((recipe, stamp) for recipe, stamp in added if recipe is not None)
+        # The fingerprint moved, so it is saved even if no recipe had
+        return True
+
+    def add(self, recipe, stamp=None):
+        """Index (or re-index) a recipe (persisted by save())"""
+        self.add_many([(recipe, stamp)])
+
+    def add_many(self, items):
+        """
+        Index (or re-index) (recipe, stamp) pairs (persisted by save())
+
+        Rows are written a chunk of recipes at a time, so each term's
+        statistics are updated once per chunk rather than once per recipe.
+        """
+        items = iter(items)
+        while True:
+            chunk = {recipe['id']: (recipe, stamp) for recipe, stamp in islice(items, ADD_CHUNK)}
+            if not chunk:
+                break
+            postings = []
+            term_stats = {}     # term -> [df, max tf, min length]
+            docs = []
+            for recipe_id, (recipe, stamp) in chunk.items():
+                self.remove(recipe_id)
+                terms = recipe_terms(recipe)
+                length = sum(terms.values())
+                for term, tf in terms.items():
+                    postings.append((term, recipe_id, tf, length))
+                    stats = term_stats.get(term)
+                    if stats is None:
+                        term_stats[term] = [1, tf, length]
+                    else:
+                        stats[0] += 1
+                        stats[1] = max(stats[1], tf)
+                        stats[2] = min(stats[2], length)
+                docs.append((recipe_id, length, json.dumps(stamp), " ".join(terms)))
+                self.n_docs += 1
+                self.total_length += length
+            self.conn.executemany(SQL_PUT_POSTING, postings)
+            self.conn.executemany(SQL_ADD_TERM, [(term, *stats) for term, stats in sorted(term_stats.items())])
+            self.conn.executemany(SQL_PUT_DOC, docs)
+
+    def remove(self, recipe_id):
+        """Drop a recipe from the index (persisted by save())"""
+        row = self.conn.execute(SQL_DOC, (recipe_id,)).fetchone()
+        if row is None:
+            return
+        length, terms = row
+        terms = terms.split()
+        self.conn.executemany(SQL_DELETE_POSTING, [(term, recipe_id) for term in terms])
+        self.conn.executemany(SQL_DROP_TERM, [(term,) for term in terms])
+        self.conn.executemany(SQL_DELETE_UNUSED_TERM, [(term,) for term in terms])
+        self.conn.execute(SQL_DELETE_DOC, (recipe_id,))
+        self.n_docs -= 1
+        self.total_length -= length
+
+    def _expand(self, term, prefix, norm):
+        """
+        Index terms matching a query term
+
+        Returns:
+            List of (index term, BM25 weight, score upper bound, document frequency)
+        """
+        if prefix:
+            # Terms are [a-z0-9]+, so every extension sorts below term + U+FFFF
+            rows = self.conn.execute(SQL_TERMS_PREFIXED, (term, term + "\uffff"))
+        else:
+            rows = self.conn.execute(SQL_TERM, (term,))
+        base, per_length = norm
+        expansions = []
+        for index_term, df, max_tf, min_length in rows:
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            weight = idf * (K1 + 1)
+            bound = weight * max_tf / (max_tf + base + per_length * min_length)
+            expansions.append((index_term, weight, bound, df))
+        return expansions
+
+    def _term_scores(self, expansions, norm, limit):
+        """
+        BM25 score per recipe for one query term (best prefix expansion)
+
+        With a limit only the best `limit` postings of each expansion are
+        read, best bound first, and expansions whose bound is below the
+        limit-th score so far are skipped.
+        """
+        base, per_length = norm
+        expansions = sorted(expansions, key=lambda expansion: -expansion[2])
+        scores = {}
+        floor = 0.0     # the limit-th best score, once there are that many
+        for index_term, weight, bound, _ in expansions:
+            if limit and len(scores) >= limit:
+                if bound < floor:
+                    break
+                floor = heapq.nlargest(limit, scores.values())[-1]
+                if bound < floor:
+                    break
+            rows = self.conn.execute(SQL_TERM_TOP, (weight, base, per_length, index_term, limit or -1))
+            for recipe_id, score in rows:
+                if score > scores.get(recipe_id, 0):
+                    scores[recipe_id] = score
+        return scores.items()
+
+    def _group_scores(self, expansions, norm, limit):
+        """
+        BM25 score per recipe having every query term of a group
+
+        One query: the query term with the fewest postings is scanned
+        (best expansion per recipe), and each other term is either looked
+        up for those recipes by primary key or scanned and joined on id,
+        whichever reads fewer postings. Only the results come back to
+        Python.
+        """
+        base, per_length = norm
+        expansions = sorted(expansions, key=lambda rows: sum(row[3] for row in rows))
+        driving = sum(row[3] for row in expansions[0])
+        scanned = [0]
+        looked_up = []
+        for i, rows in enumerate(expansions[1:], 1):
+            if driving * len(rows) <= sum(row[3] for row in rows):
+                looked_up.append(i)
+            else:
+                scanned.append(i)
+
+        ctes = []
+        params = []
+        for i, rows in enumerate(expansions):
+            if len(rows) > 1:
+                ctes.append(f"q{i} (term, weight) AS (VALUES {', '.join(['(?, ?)'] * len(rows))})")
+                params.extend(value for row in rows for value in row[:2])
+        for i in scanned:
+            if len(expansions[i]) == 1:
+                # A single expansion needs no grouping: one row per recipe already
+                ctes.append(f"s{i} AS (SELECT recipe_id AS id, ? * tf / (tf + ? + ? * length) AS score"
+                            f" FROM postings WHERE term = ?)")
+                params.extend((expansions[i][0][1], base, per_length, expansions[i][0][0]))
+            else:
+                ctes.append(f"s{i} AS (SELECT p.recipe_id AS id, MAX(q{i}.weight * p.tf / (p.tf + ? + ? * p.length))"
+                            f" AS score FROM q{i} JOIN postings p ON p.term = q{i}.term GROUP BY p.recipe_id)")
+                params.extend((base, per_length))
+        terms = [f"s{i}.score" for i in scanned]
+        for i in looked_up:
+            if len(expansions[i]) == 1:
+                terms.append("(SELECT ? * tf / (tf + ? + ? * length) FROM postings"
+                             " WHERE term = ? AND recipe_id = s0.id)")
+                params.extend((expansions[i][0][1], base, per_length, expansions[i][0][0]))
+            else:
+                terms.append(f"(SELECT MAX(q{i}.weight * p.tf / (p.tf + ? + ? * p.length)) FROM q{i}"
+                             f" JOIN postings p ON p.term = q{i}.term AND p.recipe_id = s0.id)")
+                params.extend((base, per_length))
+        joins = " ".join(f"JOIN s{i} USING (id)" for i in scanned[1:])
+        # A recipe missing a looked-up term sums to NULL, which sorts last
+        sql = (f"WITH {', '.join(ctes)} SELECT s0.id, {' + '.join(terms)} AS total FROM s0 {joins}"
+               f" ORDER BY total DESC, s0.id LIMIT ?")
+        rows = self.conn.execute(sql, params + [limit or -1])
+        return [(recipe_id, total) for recipe_id, total in rows if total is not None]
+
+    def search(self, query, prefix=True, limit=None):
+        """
+        Ranked search
+
+        Args:
+            query: Space separated terms are ANDed; "OR" separates alternatives
+            prefix: Let every term match as a prefix ("spag" -> "spaghetti")
+            limit: Maximum number of results
+
+        Returns:
+            List of (recipe_id, score), best first
+        """
+        if not self.n_docs:
+            return []
+        avg_length = self.total_length / self.n_docs
+        norm = (K1 * (1 - B), K1 * B / avg_length)
+
+        results = {}
+        for group in parse_query(query):
+            expansions = [self._expand(term, prefix, norm) for term in group]
+            if not all(expansions):
+                continue
+            if len(expansions) == 1:
+                scores = self._term_scores(expansions[0], norm, limit)
+            else:
+                scores = self._group_scores(expansions, norm, limit)
+            # A recipe matching several groups keeps its best score; each
+            # group's top results are enough for the overall top results
+            for recipe_id, score in scores:
+                if score > results.get(recipe_id, 0):
+                    results[recipe_id] = score
+
+        key = lambda item: (-item[1], item[0])
+        if limit:
+            return heapq.nsmallest(limit, results.items(), key=key)
+        return sorted(results.items(), key=key)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Secondary Indexes
+Label -> recipe bitsets for filtering the catalog without scanning it:
+category, tag, dietary flag, total-time bucket, rating and difficulty.
+
+Each index entry is an integer bitset (bit i = the recipe at position i),
+so filters compose with plain integer operators:
+
+    ix = manager.secondary_index
+    bits = ix.dietary("vegetarian") & ix.max_time(30) & ix.min_rating(4)
+    manager.summaries_for(bits)
+
+The indexes live in memory; they are built from the catalog summaries on
+first use and kept current by RecipeManager.save_recipe.
+"""
+
+from bisect import bisect_left
+
+# Upper bounds (minutes) of the total-time buckets; the last bucket is open
+TIME_BUCKETS = [15, 30, 45, 60, 90, 120]
+
+INDEX_NAMES = ["category", "tag", "dietary", "time", "rating", "difficulty"]
+
+
+def bits_from_positions(positions, size):
+    """Build an integer bitset with the given bit positions set"""
+    buf = bytearray((size + 7) // 8)
+    for pos in positions:
+        buf[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def positions_from_bits(bits):
+    """Yield the set bit positions of a bitset, lowest first"""
+    for byte_index, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, 'little')):
+        if byte:
+            base = byte_index * 8
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield base + bit
+
+
+def recipe_time(summary):
+    """Total time of a recipe, or None if unknown"""
+    if 'total_time_minutes' in summary:
+        return summary['total_time_minutes']
+    if 'prep_time_minutes' in summary or 'cook_time_minutes' in summary:
+        return summary.get('prep_time_minutes', 0) + summary.get('cook_time_minutes', 0)
+    return None
+
+
+def time_bucket(minutes):
+    """Bucket number for a total time (None for unknown)"""
+    return None if minutes is None else bisect_left(TIME_BUCKETS, minutes)
+
+
+def recipe_labels(summary):
+    """(index name, key) pairs a recipe summary belongs to"""
+    labels = [("category", c) for c in summary.get('category', [])]
+    labels.extend(("tag", t) for t in summary.get('tags', []))
+    labels.extend(("dietary", flag) for flag, value in summary.get('dietary', {}).items() if value)
+    labels.append(("time", time_bucket(recipe_time(summary))))
+    if summary.get('rating') is not None:
+        labels.append(("rating", summary['rating']))
+    if summary.get('difficulty') is not None:
+        labels.append(("difficulty", summary['difficulty']))
+    return labels
+
+
+class SecondaryIndex:
+    """
+    Maintained label -> bitset indexes over recipe summaries
+
+    Positions freed by remove() are reused, so bitsets stay as wide as the
+    catalog rather than growing with every save.
+    """
+
+    def __init__(self, summaries=None):
+        self.ids = []           # position -> recipe id (None if free)
+        self.positions = {}     # recipe id -> position
+        self.times = []         # position -> total time, for partial time buckets
+        self.live = 0           # bitset of occupied positions
+        self.indexes = {name: {} for name in INDEX_NAMES}
+        self._labels = []       # position -> labels, so remove() knows what to clear
+        self._free = []
+        if summaries:
+            self.build(summaries)
+
+    def build(self, summaries):
+        """Index a whole catalog at once (id -> summary mapping)"""
+        members = {name: {} for name in INDEX_NAMES}
+        for recipe_id, summary in summaries.items():
+            pos = len(self.ids)
+            labels = recipe_labels(summary)
+            self.ids.append(recipe_id)
+            self.positions[recipe_id] = pos
+            self.times.append(recipe_time(summary))
+            self._labels.append(labels)
+            for name, key in labels:
+                members[name].setdefault(key, []).append(pos)
+
+        size = len(self.ids)
+        for name, keys in members.items():
+            self.indexes[name] = {key: bits_from_positions(p, size) for key, p in keys.items()}
+        self.live = (1 << size) - 1
+
+    def add(self, summary):
+        """Index (or re-index) one recipe summary"""
+        recipe_id = summary['id']
+        self.remove(recipe_id)
+        if self._free:
+            pos = self._free.pop()
+        else:
+            pos = len(self.ids)
+            self.ids.append(None)
+            self.times.append(None)
+            self._labels.append(None)
+
+        labels = recipe_labels(summary)
+        self.ids[pos] = recipe_id
+        self.positions[recipe_id] = pos
+        self.times[pos] = recipe_time(summary)
+        self._labels[pos] = labels
+        bit = 1 << pos
+        self.live |= bit
+        for name, key in labels:
+            index = self.indexes[name]
+            index[key] = index.get(key, 0) | bit
+
+    def remove(self, recipe_id):
+        """Drop a recipe from every index; returns False if it was not indexed"""
+        pos = self.positions.pop(recipe_id, None)
+        if pos is None:
+            return False
+        bit = 1 << pos
+        self.live &= ~bit
+        for name, key in self._labels[pos]:
+            index = self.indexes[name]
+            bits = index[key] & ~bit
+            if bits:
+                index[key] = bits
+            else:
+                del index[key]
+        self.ids[pos] = None
+        self.times[pos] = None
+        self._labels[pos] = None
+        self._free.append(pos)
+        return True
+
+    def _any(self, name, keys):
+        index = self.indexes[name]
+        bits = 0
+        for key in keys:
+            bits |= index.get(key, 0)
+        return bits
+
+    def all(self):
+        return self.live
+
+    def category(self, *names):
+        """Recipes in any of the given categories"""
+        return self._any("category", names)
+
+    def tag(self, *tags):
+        """Recipes with any of the given tags"""
+        return self._any("tag", tags)
+
+    def dietary(self, *flags):
+        """Recipes with any of the given dietary flags set"""
+        return self._any("dietary", flags)
+
+    def difficulty(self, *levels):
+        """Recipes at any of the given difficulty levels"""
+        return self._any("difficulty", levels)
+
+    def min_rating(self, rating):
+        """Recipes rated at least rating"""
+        return self._any("rating", [r for r in self.indexes["rating"] if r >= rating])
+
+    def max_time(self, minutes, include_unknown=True):
+        """Recipes with a total time of at most minutes"""
+        index = self.indexes["time"]
+        bucket = time_bucket(minutes)
+        bits = self._any("time", [b for b in index if b is not None and b < bucket])
+        # The bucket holding the limit is only partly inside it
+        for pos in positions_from_bits(index.get(bucket, 0)):
+            if self.times[pos] <= minutes:
+                bits |= 1 << pos
+        if include_unknown:
+            bits |= index.get(None, 0)
+        return bits
+
+    def find(self, category=None, tag=None, max_total_time=None, min_rating=None,
+             dietary=None, difficulty=None):
+        """Bitset of recipes matching all of the given criteria"""
+        bits = self.live
+        if category:
+            bits &= self.category(category)
+        if tag:
+            bits &= self.tag(tag)
+        if dietary:
+            bits &= self.dietary(dietary)
+        if difficulty:
+            bits &= self.difficulty(difficulty)
+        if min_rating is not None:
+            bits &= self.min_rating(min_rating)
+        if max_total_time is not None:
+            bits &= self.max_time(max_total_time)
+        return bits
+
+    def ids_for(self, bits):
+        """Recipe ids of a bitset, in position order"""
+        ids = self.ids
+        return [ids[pos] for pos in positions_from_bits(bits & self.live)]
+
+    def counts(self, name):
+        """Recipes per key of one index (e.g. per category), from bitset sizes"""
+        return {key: bits.bit_count() for key, bits in self.indexes[name].items()}
+
+    def __len__(self):
+        return len(self.positions)
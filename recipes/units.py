@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Measurement Units
+Shared unit vocabulary for the OCR parser and the grocery aggregator,
+and the ingredient name normalization they and the catalog share.
+
+Every spelling in UNIT_ALIASES maps to a canonical unit; UNITS gives each
+canonical unit a dimension and its factor to that dimension's base unit
+(ml for volume, g for mass). Factors match the metric conversions in
+recipe-webapp/meal-planner-rules.js (1 cup = 250 ml).
+"""
+
+import re
+from functools import lru_cache
+
+VOLUME = "volume"
+MASS = "mass"
+EACH = "each"
+
+UNITS = {
+    # Volume (base: ml)
+    "ml": (VOLUME, 1),
+    "l": (VOLUME, 1000),
+    "tsp": (VOLUME, 5),
+    "tbsp": (VOLUME, 15),
+    "cup": (VOLUME, 250),
+    "fl oz": (VOLUME, 30),
+    "pint": (VOLUME, 473),
+    "quart": (VOLUME, 946),
+    "gallon": (VOLUME, 3785),
+    # Mass (base: g)
+    "g": (MASS, 1),
+    "kg": (MASS, 1000),
+    "oz": (MASS, 28),
+    "lb": (MASS, 454),
+    # Whole items - "1 large onion" and "2 onions" are both onions
+    "each": (EACH, 1),
+    # Countable units that only add up with themselves
+    "clove": ("clove", 1),
+    "slice": ("slice", 1),
+    "can": ("can", 1),
+    "package": ("package", 1),
+    "bunch": ("bunch", 1),
+    "pinch": ("pinch", 1),
+    "dash": ("dash", 1),
+    "to taste": ("to taste", 1),
+}
+
+UNIT_ALIASES = {
+    "ml": "ml", "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "l": "l", "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "tsp": "tsp", "teaspoon": "tsp", "teaspoons": "tsp",
+    "tbsp": "tbsp", "tablespoon": "tbsp", "tablespoons": "tbsp", "tbs": "tbsp",
+    "cup": "cup", "cups": "cup",
+    "fl oz": "fl oz", "fl-oz": "fl oz", "fluid-ounce": "fl oz", "fluid ounce": "fl oz",
+    "pint": "pint", "pints": "pint",
+    "quart": "quart", "quarts": "quart",
+    "gallon": "gallon", "gallons": "gallon",
+    "g": "g", "gram": "g", "grams": "g", "gr": "g",
+    "kg": "kg", "kilogram": "kg", "kilograms": "kg", "kilo": "kg", "kilos": "kg",
+    "oz": "oz", "ounce": "oz", "ounces": "oz",
+    "lb": "lb", "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "": "each", "each": "each", "piece": "each", "pieces": "each", "whole": "each",
+    "large": "each", "medium": "each", "small": "each",
+    "clove": "clove", "cloves": "clove",
+    "slice": "slice", "slices": "slice",
+    "can": "can", "cans": "can", "tin": "can", "tins": "can",
+    "package": "package", "packages": "package", "pack": "package", "packs": "package",
+    "bunch": "bunch", "bunches": "bunch",
+    "pinch": "pinch", "pinches": "pinch",
+    "dash": "dash", "dashes": "dash",
+    "to taste": "to taste",
+}
+
+# Grams per ml for dry goods that recipes give both by volume and by weight,
+# so the two can be merged (liquids stay in volume)
+DENSITIES = {
+    "all-purpose flour": 0.53,
+    "flour": 0.53,
+    "granulated sugar": 0.85,
+    "sugar": 0.85,
+    "brown sugar": 0.83,
+    "packed brown sugar": 0.83,
+    "butter": 0.96,
+    "rice": 0.85,
+    "salt": 1.2,
+    "baking soda": 0.96,
+    "semisweet chocolate chips": 0.72,
+    "chocolate chips": 0.72,
+}
+
+
+def canonical_unit(unit):
+    """Canonical form of a unit spelling, or None if it is not a known unit"""
+    if unit is None:
+        return "each"
+    return UNIT_ALIASES.get(unit.strip().lower().rstrip('.'))
+
+
+def to_base(quantity, unit):
+    """
+    Convert a quantity to its dimension's base unit
+
+    Returns:
+        (dimension, base quantity, canonical unit); unknown units form their
+        own dimension so they only add up with themselves
+    """
+    canonical = canonical_unit(unit)
+    if canonical is None:
+        canonical = unit.strip().lower()
+        return f"unit:{canonical}", quantity, canonical
+    dimension, factor = UNITS[canonical]
+    return dimension, quantity * factor, canonical
+
+
+def from_base(dimension, quantity):
+    """Pick a readable (quantity, unit) for a base quantity"""
+    if dimension == VOLUME:
+        return (quantity / 1000, "l") if quantity >= 1000 else (quantity, "ml")
+    if dimension == MASS:
+        return (quantity / 1000, "kg") if quantity >= 1000 else (quantity, "g")
+    if dimension == EACH:
+        return quantity, ""
+    if dimension.startswith("unit:"):
+        return quantity, dimension[5:]
+    return quantity, dimension
+
+
+# Words that do not change what you buy
+_NAME_NOISE = re.compile(r"\b(fresh|freshly|chopped|diced|minced|sliced|grated|softened|optional)\b")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=8192)
+def normalize_name(name):
+    """Canonical ingredient name: lowercase, no noise words, singular"""
+    name = _NAME_NOISE.sub(" ", name.lower().replace(",", " "))
+    name = _SPACES.sub(" ", name).strip()
+    if not name:
+        return name
+
+    words = name.split(" ")
+    last = words[-1]
+    if len(last) > 3:
+        if last.endswith("ies"):
+            last = last[:-3] + "y"
+        elif last.endswith("oes"):
+            last = last[:-2]
+        elif last.endswith("s") and not last.endswith(("ss", "us", "is")):
+            last = last[:-1]
+    words[-1] = last
+    return " ".join(words)